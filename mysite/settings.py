@@ -27,6 +27,9 @@ DEBUG = True
 
 ALLOWED_HOSTS = []
 
+# Clients allowed to read /metrics.
+INTERNAL_IPS = ['127.0.0.1']
+
 
 # Application definition
 
@@ -41,6 +44,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'polls.profiling.ProfilerMiddleware',
+    'polls.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -54,7 +59,9 @@ ROOT_URLCONF = 'mysite.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # Django's backend, timing template rendering for polls.metrics.
+        'BACKEND': 'polls.metrics.TimedDjangoTemplates',
+        'NAME': 'django',
         'DIRS': [os.path.join(BASE_DIR, 'templates')],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -70,6 +77,35 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'mysite.wsgi.application'
 
+# Warms up each WSGI worker when it starts (see mysite/warmup.py), keeping
+# compiled templates in memory with the cached template loader.
+WSGI_WARMUP = os.environ.get('DJANGO_WSGI_WARMUP') == '1'
+
+if WSGI_WARMUP:
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'mysite': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}
+
 
 # Database
 # https://docs.djangoproject.com/en/1.10/ref/settings/#databases
@@ -81,6 +117,29 @@ DATABASES = {
     }
 }
 
+# Switches on WAL mode and the pragmas below for SQLite, persistent
+# connections, and a `replica` alias that the detail and results views read
+# their question from (see polls.db.replica).
+DATABASE_PERFORMANCE_PROFILE = os.environ.get('DJANGO_DATABASE_PERFORMANCE_PROFILE') == '1'
+
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'busy_timeout': 5000,
+}
+
+if DATABASE_PERFORMANCE_PROFILE:
+    DATABASES['default']['CONN_MAX_AGE'] = 600
+    # With SQLite in WAL mode the replica is a second, read-only use of the
+    # same file; point it elsewhere for a real replica.
+    DATABASES['replica'] = dict(
+        DATABASES['default'],
+        NAME=os.environ.get('DJANGO_REPLICA_DB_NAME', DATABASES['default']['NAME']),
+        TEST={'MIRROR': 'default'},
+    )
+    DATABASE_ROUTERS = ['polls.db.PrimaryReplicaRouter']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/1.10/ref/settings/#auth-password-validators
@@ -119,3 +178,80 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/1.10/howto/static-files/
 
 STATIC_URL = '/static/'
+
+
+# Polls
+
+# Collect votes in a process-local buffer and write them behind in batches
+# instead of updating the choice row on every request.
+POLLS_VOTE_BUFFER = False
+
+# Seconds between vote buffer flushes.
+POLLS_VOTE_BUFFER_INTERVAL = 1.0
+
+# Number of buffered votes that triggers an early flush.
+POLLS_VOTE_BUFFER_SIZE = 100
+
+# Seconds to keep the precomputed tallies of a question's results page.
+POLLS_RESULTS_CACHE_TIMEOUT = 300
+
+# Longest time in seconds to cache the index page's question list. It is
+# also dropped as soon as the next scheduled question is published.
+POLLS_INDEX_CACHE_TIMEOUT = 300
+
+# Cache the rendered detail page of each question, with the CSRF token
+# spliced in per request.
+POLLS_DETAIL_PAGE_CACHE = False
+POLLS_DETAIL_PAGE_CACHE_TIMEOUT = 300
+
+# Largest number of records accepted by the batch vote endpoint, and the
+# largest count of a single record.
+POLLS_VOTE_BATCH_MAX_RECORDS = 500
+POLLS_VOTE_BATCH_MAX_COUNT = 1000
+
+# Secrets of the clients allowed to post to the batch vote endpoint, by key
+# id. Every batch must be signed with one (see polls.views.vote_batch).
+# Signatures are valid for POLLS_VOTE_BATCH_SIGNATURE_MAX_AGE seconds.
+POLLS_VOTE_BATCH_KEYS = {}
+POLLS_VOTE_BATCH_SIGNATURE_MAX_AGE = 300
+
+# Unfiltered admin changelists of tables larger than this many rows show
+# the database's row estimate instead of running COUNT(*).
+POLLS_ADMIN_ESTIMATED_COUNT_THRESHOLD = 100000
+
+# (host, port) that `manage.py runlive` receives vote notifications on.
+# None disables notifications.
+POLLS_LIVE_NOTIFY_ADDRESS = None
+
+# Count only the first vote of each voter on a question, recording a ballot
+# per vote. Voters are told apart by POLLS_VOTER_IDENTITY: 'session', 'user'
+# (the session for anonymous voters) or 'ip'. Voters without a session are
+# always told apart by IP address. Batches from the trusted clients of
+# POLLS_VOTE_BATCH_KEYS are counted as they are.
+POLLS_ONE_VOTE_PER_VOTER = False
+POLLS_VOTER_IDENTITY = 'session'
+
+# Size of the per-process filter of ballots that turns away repeated votes
+# without a write: ballots per generation (two are kept) and the false
+# positive rate. The defaults take about 240KB.
+POLLS_VOTER_FILTER_CAPACITY = 100000
+POLLS_VOTER_FILTER_ERROR_RATE = 0.01
+
+# (burst, seconds): each client IP address may cast `burst` votes, refilled
+# over `seconds`. None disables rate limiting. Each process keeps the
+# buckets of at most POLLS_VOTE_RATE_LIMIT_CLIENTS recent clients.
+POLLS_VOTE_RATE_LIMIT = None
+POLLS_VOTE_RATE_LIMIT_CLIENTS = 10000
+
+# Directory `manage.py prerender_polls` writes the static poll pages to.
+POLLS_PRERENDER_ROOT = os.path.join(BASE_DIR, 'prerendered')
+
+# Fraction of requests ProfilerMiddleware profiles, besides those with a
+# valid X-Polls-Profile header (see polls/profiling.py). Profiles are kept
+# in POLLS_PROFILE_DIR, up to the POLLS_PROFILE_MAX_FILES most recent.
+POLLS_PROFILE_RATE = 0
+POLLS_PROFILE_DIR = os.path.join(BASE_DIR, 'profiles')
+POLLS_PROFILE_MAX_FILES = 1000
+
+# Seconds an X-Polls-Profile header value stays valid.
+POLLS_PROFILE_TOKEN_MAX_AGE = 3600
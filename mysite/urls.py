@@ -1,7 +1,12 @@
 from django.conf.urls import include, url
 from django.contrib import admin
 
+from mysite.warmup import ready
+from polls.metrics import metrics
+
 urlpatterns = [
+    url(r'^ready/$', ready, name='ready'),
+    url(r'^metrics$', metrics, name='metrics'),
     url(r'^polls/', include('polls.urls')),
     url(r'^admin/', admin.site.urls),
 ]
@@ -0,0 +1,235 @@
+"""
+Warm-up of WSGI workers, so that the first requests after a deploy don't
+pay for work every later request gets for free.
+
+With ``DJANGO_WSGI_WARMUP=1`` in the environment, `mysite.wsgi` starts
+`warm_up()` in a background thread when it is imported. It compiles the
+URL patterns and the templates of the polls and the admin, checks the
+database connections and sends a request to each public page through the
+application. Settings switch to the cached template loader, so the
+compiled templates are kept.
+
+Every step is best-effort: a failure is logged and the warm-up retried a
+little later, and the worker keeps serving requests in the meantime.
+``/ready/`` answers 503 until a warm-up has succeeded.
+
+The thread runs in the process importing the module, so a worker forked
+after the import, as with gunicorn's ``--preload``, is never warmed up.
+"""
+import io
+import itertools
+import logging
+import os
+import threading
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connections
+from django.http import JsonResponse
+from django.template import TemplateSyntaxError
+from django.template.loader import get_template
+from django.urls import RegexURLResolver, get_resolver, reverse
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Apps whose templates are compiled ahead of the first request.
+TEMPLATE_APPS = ('polls', 'admin')
+
+# Seconds between attempts while the warm-up fails; the last one repeats.
+RETRY_DELAYS = (1, 2, 5, 10, 30)
+
+# Seconds the successful warm-up took, None until there has been one.
+warmed_up_in = None
+
+
+def populate_urls(resolver=None):
+    """
+    Compiles the patterns and builds the reverse lookups of every URL
+    resolver.
+    """
+    if resolver is None:
+        resolver = get_resolver()
+    resolver.reverse_dict
+    for pattern in resolver.url_patterns:
+        if isinstance(pattern, RegexURLResolver):
+            populate_urls(pattern)
+        else:
+            pattern.regex
+
+
+def compile_templates():
+    """
+    Loads every template of `TEMPLATE_APPS` and returns how many there
+    were.
+    """
+    count = 0
+    for label in TEMPLATE_APPS:
+        directory = os.path.join(apps.get_app_config(label).path, 'templates')
+        for root, _, files in os.walk(directory):
+            for name in files:
+                if not name.endswith(('.html', '.txt')):
+                    continue
+                template_name = os.path.relpath(os.path.join(root, name), directory).replace(os.sep, '/')
+                try:
+                    get_template(template_name)
+                except TemplateSyntaxError:
+                    # Fragments that only compile as part of another template.
+                    logger.debug('Could not compile %s', template_name, exc_info=True)
+                count += 1
+    return count
+
+
+def connect():
+    for connection in connections.all():
+        connection.ensure_connection()
+
+
+def warm_up_host():
+    """
+    Returns a host name the synthetic requests can use, taken from
+    ``ALLOWED_HOSTS``.
+    """
+    for host in settings.ALLOWED_HOSTS:
+        if host != '*':
+            return host.lstrip('.')
+    return 'localhost'
+
+
+def warm_up_paths():
+    """
+    Returns the paths of the pages requested during the warm-up, using the
+    latest published question for the question pages.
+    """
+    from polls.models import Question
+
+    paths = [
+        reverse('polls:index'), reverse('polls:archive'), reverse('polls:trending'),
+        reverse('polls:search') + '?q=poll', reverse('admin:login'),
+    ]
+    question_id = Question.objects.filter(
+        pub_date__lte=timezone.now()
+    ).order_by('-pub_date').values_list('pk', flat=True).first()
+    if question_id is not None:
+        paths += [
+            reverse('polls:detail', args=(question_id,)),
+            reverse('polls:results', args=(question_id,)),
+            reverse('polls:results_json', args=(question_id,)),
+        ]
+    return paths
+
+
+def request(application, path):
+    """
+    Sends a GET request for `path` through the WSGI `application` and
+    returns the response status.
+    """
+    path, _, query_string = path.partition('?')
+    host = warm_up_host()
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': query_string,
+        'SCRIPT_NAME': '',
+        'SERVER_NAME': host,
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': host,
+        'REMOTE_ADDR': '127.0.0.1',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': io.StringIO(),
+        'wsgi.multithread': False,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    statuses = []
+    response = application(environ, lambda status, headers, exc_info=None: statuses.append(status))
+    try:
+        for _ in response:
+            pass
+    finally:
+        response.close()
+    return statuses[0]
+
+
+def request_pages(application):
+    """
+    Requests every page of `warm_up_paths()` through `application`, and
+    returns how many there were.
+    """
+    paths = warm_up_paths()
+    for path in paths:
+        status = request(application, path)
+        if not status.startswith(('2', '3')):
+            logger.warning('Warm-up request for %s answered %s', path, status)
+    return len(paths)
+
+
+def warm_up(application):
+    """
+    Warms up `application` and returns the seconds each step that succeeded
+    took. Failed steps are logged, and leave the worker unready.
+    """
+    global warmed_up_in
+    steps = (
+        ('urls', populate_urls),
+        ('templates', compile_templates),
+        ('database', connect),
+        ('requests', lambda: request_pages(application)),
+    )
+    timings, results = {}, {}
+    start = time.time()
+    for name, step in steps:
+        step_start = time.time()
+        try:
+            results[name] = step()
+        except Exception:
+            logger.exception('Warm-up step %s failed', name)
+            continue
+        timings[name] = time.time() - step_start
+
+    if len(timings) < len(steps):
+        return timings
+    warmed_up_in = time.time() - start
+    logger.info(
+        'Warmed up in %.2fs: URLs %.2fs, %d templates %.2fs, database %.2fs, %d requests %.2fs',
+        warmed_up_in, timings['urls'], results['templates'], timings['templates'], timings['database'],
+        results['requests'], timings['requests'],
+    )
+    return timings
+
+
+def start_warm_up(application):
+    """
+    Warms up `application` in a daemon thread, retrying until it succeeds,
+    so that importing the WSGI module neither waits for it nor fails with
+    it. Returns the thread.
+    """
+    def run():
+        delays = itertools.chain(RETRY_DELAYS, itertools.repeat(RETRY_DELAYS[-1]))
+        while True:
+            try:
+                warm_up(application)
+            finally:
+                # Connections belong to the thread, requests can't reuse them.
+                connections.close_all()
+            if warmed_up_in is not None:
+                return
+            time.sleep(next(delays))
+
+    thread = threading.Thread(target=run, name='warm-up')
+    thread.daemon = True
+    thread.start()
+    return thread
+
+
+def ready(request):
+    """
+    Tells load balancers whether this worker has been warmed up.
+    """
+    if settings.WSGI_WARMUP and warmed_up_in is None:
+        return JsonResponse({'ready': False}, status=503)
+    return JsonResponse({'ready': True, 'warmup_seconds': warmed_up_in})
@@ -1,6 +1,13 @@
+import datetime
+
 from django.contrib import admin
+from django.db.models import BooleanField, Case, Count, IntegerField, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 
 from .models import Question, Choice
+from .pagination import EstimatedCountPaginator
+from .search import filter_questions
 
 
 class ChoiceInline(admin.TabularInline):
@@ -12,11 +19,57 @@ class QuestionAdmin(admin.ModelAdmin):
     fieldsets = [
         (None,               {'fields': ['question_text']}),
         ('Date information', {'fields': ['pub_date'], 'classes': ['collapse']}),
+        ('Performance',      {'fields': ['vote_shards'], 'classes': ['collapse']}),
     ]
     inlines = [ChoiceInline]
-    list_display = ('question_text', 'pub_date', 'was_published_recently')
+    list_display = ('question_text', 'pub_date', 'published_recently', 'choice_count', 'vote_count')
     list_filter = ['pub_date']
     search_fields = ['question_text']
+    date_hierarchy = 'pub_date'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        """
+        Annotates the columns of the changelist so that a page of questions
+        is fetched in a single query.
+        """
+        now = timezone.now()
+        choices = Choice.objects.filter(question=OuterRef('pk')).order_by().values('question')
+        return super().get_queryset(request).annotate(
+            published_recently=Case(
+                When(pub_date__range=(now - datetime.timedelta(days=1), now), then=Value(True)),
+                default=Value(False),
+                output_field=BooleanField(),
+            ),
+            choice_count=Coalesce(Subquery(
+                choices.annotate(count=Count('pk')).values('count'), output_field=IntegerField()
+            ), 0),
+        )
+
+    def published_recently(self, obj):
+        return obj.published_recently
+    published_recently.admin_order_field = 'pub_date'
+    published_recently.boolean = True
+    published_recently.short_description = 'Published recently?'
+
+    def choice_count(self, obj):
+        return obj.choice_count
+    choice_count.admin_order_field = 'choice_count'
+    choice_count.short_description = 'Choices'
+
+    def vote_count(self, obj):
+        return obj.total_votes
+    vote_count.admin_order_field = 'total_votes'
+    vote_count.short_description = 'Votes'
+
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Searches the full-text index instead of scanning with LIKE.
+        """
+        if not search_term:
+            return queryset, False
+        return filter_questions(queryset, search_term), False
 
 
 admin.site.register(Question, QuestionAdmin)
@@ -5,3 +5,6 @@ from django.apps import AppConfig
 
 class PollsConfig(AppConfig):
     name = 'polls'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,242 @@
+"""
+One vote per voter, and rate limiting of votes.
+
+With ``POLLS_ONE_VOTE_PER_VOTER`` enabled every counted vote records a
+`Ballot`, whose unique index on question and voter key is what enforces
+the limit. Each process also keeps a Bloom filter of the ballots it has
+seen, so a repeated vote is turned away with one indexed read instead of
+the vote's transaction, and a first vote needs no read at all.
+
+``POLLS_VOTE_RATE_LIMIT`` gives each client IP address a token bucket.
+Votes over the limit are refused before any query runs.
+
+Both structures have a fixed size, whatever the number of voters. What
+falls out of them is still caught by the ledger, or allowed a fresh burst.
+"""
+import collections
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import IntegrityError, transaction
+from django.dispatch import receiver
+from django.test.signals import setting_changed
+from django.utils.crypto import salted_hmac
+
+from .cache import _incr
+from .models import Ballot
+
+RATE_LIMITED_KEY = 'polls:voters:rate-limited'
+FILTERED_KEY = 'polls:voters:filtered'
+FALSE_POSITIVES_KEY = 'polls:voters:false-positives'
+LEDGER_DUPLICATES_KEY = 'polls:voters:ledger-duplicates'
+
+
+class VoterFilter(object):
+    """
+    Bloom filter of (question, voter key) pairs.
+
+    Holds two generations of up to `capacity` pairs, each with the given
+    false positive `error_rate`. Once the current generation is full it
+    replaces the previous one, so memory stays fixed and the oldest pairs
+    are forgotten.
+    """
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.bits = int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, int(round(self.bits / capacity * math.log(2))))
+        self._current = bytearray((self.bits + 7) // 8)
+        self._previous = bytearray(len(self._current))
+        self._count = 0
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self):
+        return len(self._current) + len(self._previous)
+
+    def _positions(self, question_id, voter_key):
+        digest = hashlib.md5('{}:{}'.format(question_id, voter_key).encode()).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.bits for i in range(self.hashes)]
+
+    @staticmethod
+    def _test(bits, positions):
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in positions)
+
+    def add(self, question_id, voter_key):
+        positions = self._positions(question_id, voter_key)
+        with self._lock:
+            if self._test(self._current, positions):
+                return
+            if self._count >= self.capacity:
+                self._previous, self._current = self._current, bytearray(len(self._current))
+                self._count = 0
+            for position in positions:
+                self._current[position >> 3] |= 1 << (position & 7)
+            self._count += 1
+
+    def __contains__(self, item):
+        positions = self._positions(*item)
+        with self._lock:
+            return self._test(self._current, positions) or self._test(self._previous, positions)
+
+
+class RateLimiter(object):
+    """
+    Token buckets allowing each key bursts of `burst` votes, refilled evenly
+    over `period` seconds.
+
+    Only the `max_keys` most recently seen keys keep a bucket. A key whose
+    bucket was evicted starts again with a full one.
+    """
+
+    def __init__(self, burst, period, max_keys, clock=time.monotonic):
+        self.burst = burst
+        self.rate = burst / period
+        self.max_keys = max_keys
+        self.clock = clock
+        # Key -> (tokens, time of last refill), least recently used first.
+        self._buckets = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key):
+        """
+        Takes a token for `key`. Returns 0 if there was one, or else the
+        number of seconds until there will be.
+        """
+        now = self.clock()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0
+            else:
+                wait = (1 - tokens) / self.rate
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+
+_voter_filter = None
+_rate_limiter = None
+_lock = threading.Lock()
+
+
+def get_voter_filter():
+    global _voter_filter
+    if _voter_filter is None:
+        with _lock:
+            if _voter_filter is None:
+                _voter_filter = VoterFilter(
+                    settings.POLLS_VOTER_FILTER_CAPACITY, settings.POLLS_VOTER_FILTER_ERROR_RATE,
+                )
+    return _voter_filter
+
+
+def get_rate_limiter():
+    global _rate_limiter
+    if _rate_limiter is None:
+        with _lock:
+            if _rate_limiter is None:
+                burst, period = settings.POLLS_VOTE_RATE_LIMIT
+                _rate_limiter = RateLimiter(burst, period, settings.POLLS_VOTE_RATE_LIMIT_CLIENTS)
+    return _rate_limiter
+
+
+@receiver(setting_changed)
+def reset(setting, **kwargs):
+    global _voter_filter, _rate_limiter
+    if setting.startswith('POLLS_VOTER_FILTER_'):
+        _voter_filter = None
+    elif setting.startswith('POLLS_VOTE_RATE_LIMIT'):
+        _rate_limiter = None
+
+
+def check_rate_limit(request):
+    """
+    Returns 0 if the client may vote, or else the number of seconds it has
+    to wait. Always 0 unless ``POLLS_VOTE_RATE_LIMIT`` is set.
+    """
+    if settings.POLLS_VOTE_RATE_LIMIT is None:
+        return 0
+    wait = get_rate_limiter().take(request.META.get('REMOTE_ADDR', ''))
+    if wait:
+        _incr(RATE_LIMITED_KEY)
+    return wait
+
+
+def get_voter_key(request):
+    """
+    Returns the key telling voters apart, according to
+    ``POLLS_VOTER_IDENTITY``. Voters without a session are told apart by
+    their IP address. Starting a session for them would give a client that
+    drops its cookies a new key, and cost a write, on every vote.
+    """
+    identity = settings.POLLS_VOTER_IDENTITY
+    if identity not in ('session', 'user', 'ip'):
+        raise ImproperlyConfigured(
+            "POLLS_VOTER_IDENTITY must be 'session', 'user' or 'ip', not {!r}.".format(identity)
+        )
+    if identity == 'user' and request.user.is_authenticated:
+        value = 'user:{}'.format(request.user.pk)
+    elif identity != 'ip' and request.session.session_key is not None:
+        value = 'session:' + request.session.session_key
+    else:
+        value = 'ip:' + request.META.get('REMOTE_ADDR', '')
+    return salted_hmac('polls.ballots.voter_key', value).hexdigest()
+
+
+def has_voted(question_id, voter_key):
+    """
+    Returns whether the voter has a ballot for the question. Runs no query
+    unless the voter filter has seen the pair before, and then confirms it
+    so that a false positive never turns a voter away.
+    """
+    if (question_id, voter_key) not in get_voter_filter():
+        return False
+    if Ballot.objects.filter(question_id=question_id, voter_key=voter_key).exists():
+        _incr(FILTERED_KEY)
+        return True
+    _incr(FALSE_POSITIVES_KEY)
+    return False
+
+
+def cast_ballot(choice, voter_key):
+    """
+    Records the voter's ballot for `choice`. Returns False if the voter
+    already has a ballot for the question.
+    """
+    get_voter_filter().add(choice.question_id, voter_key)
+    try:
+        with transaction.atomic():
+            Ballot.objects.create(question_id=choice.question_id, choice_id=choice.pk, voter_key=voter_key)
+    except IntegrityError:
+        _incr(LEDGER_DUPLICATES_KEY)
+        return False
+    return True
+
+
+def voter_stats():
+    """
+    Returns how many votes were refused: `rate_limited` and `filtered`
+    before anything was written (together `writes_avoided`), and
+    `ledger_duplicates` by the ledger's unique index. `false_positives`
+    counts voter filter hits that turned out to be first votes.
+    """
+    counts = cache.get_many([RATE_LIMITED_KEY, FILTERED_KEY, LEDGER_DUPLICATES_KEY, FALSE_POSITIVES_KEY])
+    stats = {
+        'rate_limited': counts.get(RATE_LIMITED_KEY, 0),
+        'filtered': counts.get(FILTERED_KEY, 0),
+        'ledger_duplicates': counts.get(LEDGER_DUPLICATES_KEY, 0),
+        'false_positives': counts.get(FALSE_POSITIVES_KEY, 0),
+    }
+    stats['writes_avoided'] = stats['rate_limited'] + stats['filtered']
+    return stats
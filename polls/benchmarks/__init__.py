@@ -0,0 +1,5 @@
+"""
+Benchmarks, kept out of the regular test run. Run them with:
+
+    python manage.py test polls.benchmarks --pattern="bench_*.py"
+"""
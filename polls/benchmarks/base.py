@@ -0,0 +1,147 @@
+"""
+Measuring views and comparing them against a stored baseline.
+
+Benchmarks are configured through the environment:
+
+* ``BENCHMARK_SIZES``: comma-separated numbers of questions to benchmark
+  with (default ``10,1000``).
+* ``BENCHMARK_ITERATIONS``: timed calls per measurement (default 200).
+* ``BENCHMARK_THRESHOLD``: slowdown or memory growth against the baseline
+  that fails a benchmark, as a fraction (default 0.5).
+* ``BENCHMARK_UPDATE``: set to 1 to record the results as the new baseline
+  instead of comparing against it.
+
+Query counts must never exceed the baseline.
+"""
+import datetime
+import json
+import os
+import time
+import tracemalloc
+
+from django.db import connection, reset_queries
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from polls.bulk import bulk_create_polls
+from polls.models import Choice, Question
+from polls.tests import base
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+SIZES = [int(size) for size in os.environ.get('BENCHMARK_SIZES', '10,1000').split(',')]
+ITERATIONS = int(os.environ.get('BENCHMARK_ITERATIONS', 200))
+THRESHOLD = float(os.environ.get('BENCHMARK_THRESHOLD', 0.5))
+UPDATE = os.environ.get('BENCHMARK_UPDATE') == '1'
+
+
+def percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def measure(func, iterations=ITERATIONS):
+    """
+    Calls `func` repeatedly and returns its latency percentiles in
+    milliseconds, the number of queries and the peak memory in bytes
+    allocated by one call.
+    """
+    func()
+
+    # Requests made through the test Client reset the query log when they
+    # start, so it has to be empty for the count to be right.
+    reset_queries()
+    with CaptureQueriesContext(connection) as queries:
+        func()
+    # Read now, since captured queries are looked up in the live query log.
+    query_count = len(queries)
+
+    tracemalloc.start()
+    try:
+        func()
+        _, memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+
+    return {
+        'p50': percentile(timings, 0.5),
+        'p90': percentile(timings, 0.9),
+        'p99': percentile(timings, 0.99),
+        'queries': query_count,
+        'memory': memory,
+    }
+
+
+class BenchmarkCase(base.BaseTestCase):
+    baseline = None
+    results = {}
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        if BenchmarkCase.baseline is None:
+            try:
+                with open(BASELINE_PATH) as f:
+                    BenchmarkCase.baseline = json.load(f)
+            except FileNotFoundError:
+                BenchmarkCase.baseline = {}
+
+    @classmethod
+    def tearDownClass(cls):
+        if UPDATE and cls.results:
+            BenchmarkCase.baseline.update(cls.results)
+            with open(BASELINE_PATH, 'w') as f:
+                json.dump(BenchmarkCase.baseline, f, indent=2, sort_keys=True)
+                f.write('\n')
+        super().tearDownClass()
+
+    def populate(self, size, choices=4):
+        """
+        Tops the database up to `size` published questions with `choices`
+        choices each.
+        """
+        existing = Question.objects.count()
+        if existing < size:
+            pub_date = timezone.now() - datetime.timedelta(days=1)
+            questions = []
+            for i in range(existing, size):
+                question = Question(question_text='Question {}'.format(i), pub_date=pub_date)
+                question.new_choices = [
+                    Choice(choice_text='Choice {}'.format(j), votes=j) for j in range(choices)
+                ]
+                questions.append(question)
+            bulk_create_polls(questions)
+        return Question.objects.order_by('-pk').first()
+
+    def benchmark(self, name, func):
+        """
+        Measures `func`, records the result under `name` and fails if it
+        regressed against the baseline.
+        """
+        result = measure(func)
+        self.results[name] = result
+        print('\n{:<32} p50 {p50:7.2f}ms  p90 {p90:7.2f}ms  p99 {p99:7.2f}ms  '
+              '{queries:2d} queries  {memory:7d}B'.format(name, **result), end='')
+
+        expected = self.baseline.get(name)
+        if expected is None or UPDATE:
+            return result
+        failures = []
+        if result['queries'] > expected['queries']:
+            failures.append('{} queries, baseline {}'.format(result['queries'], expected['queries']))
+        for key in ('p50', 'memory'):
+            limit = expected[key] * (1 + THRESHOLD)
+            if result[key] > limit:
+                failures.append('{} {:.2f}, baseline {:.2f} (limit {:.2f})'.format(
+                    key, result[key], expected[key], limit,
+                ))
+        if failures:
+            self.fail('{} regressed: {}'.format(name, '; '.join(failures)))
+        return result
@@ -0,0 +1,37 @@
+from django.http import HttpResponse
+from django.test import Client, modify_settings
+from django.urls import resolve, reverse
+
+from polls.benchmarks.base import BenchmarkCase
+from polls.metrics import MetricsMiddleware, registry
+
+
+class MetricsBenchmark(BenchmarkCase):
+    """
+    Measures the overhead of MetricsMiddleware: on its own around a view
+    that does nothing, and on the results page through the full middleware
+    stack with and without it.
+    """
+
+    def test_overhead(self):
+        question = self.populate(10)
+        url = reverse('polls:results', args=(question.id,))
+
+        request = self.request_factory.get(url)
+        request.resolver_match = resolve(url)
+        response = HttpResponse()
+        middleware = MetricsMiddleware(lambda request: response)
+        alone = self.benchmark('metrics.middleware', lambda: middleware(request))
+        registry.clear()
+
+        off_client, on_client = Client(), Client()
+        with modify_settings(MIDDLEWARE={'remove': 'polls.metrics.MetricsMiddleware'}):
+            # Clients load the middleware on their first request.
+            off_client.get(url)
+        off = self.benchmark('metrics.off.results', lambda: off_client.get(url))
+        self.benchmark('metrics.on.results', lambda: on_client.get(url))
+        registry.clear()
+
+        print('\nMetricsMiddleware overhead: {:.1f}us per request, {:.1%} of the results page'.format(
+            1000 * alone['p50'], alone['p50'] / off['p50'],
+        ))
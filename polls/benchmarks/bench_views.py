@@ -0,0 +1,76 @@
+from django.urls import reverse
+
+from polls.benchmarks.base import SIZES, BenchmarkCase
+from polls.views import DetailView, IndexView, ResultsView, results_json, vote
+
+
+class ViewBenchmarks(BenchmarkCase):
+    """
+    Every view in polls.views, called directly with RequestFactory requests
+    and through the full middleware stack with the test Client.
+    """
+
+    def render(self, response):
+        if hasattr(response, 'render'):
+            response.render()
+        return response
+
+    def run_sizes(self, name, factory_call, client_call):
+        for size in SIZES:
+            question = self.populate(size)
+            with self.subTest(size=size):
+                self.benchmark('{}.factory.{}'.format(name, size), lambda: factory_call(question))
+                self.benchmark('{}.client.{}'.format(name, size), lambda: client_call(question))
+
+    def test_index(self):
+        url = reverse('polls:index')
+        self.run_sizes(
+            'index',
+            lambda question: self.render(IndexView.as_view()(self.request_factory.get(url))),
+            lambda question: self.client.get(url),
+        )
+
+    def test_detail(self):
+        def url(question):
+            return reverse('polls:detail', args=(question.id,))
+        self.run_sizes(
+            'detail',
+            lambda question: self.render(
+                DetailView.as_view()(self.request_factory.get(url(question)), pk=str(question.id))
+            ),
+            lambda question: self.client.get(url(question)),
+        )
+
+    def test_results(self):
+        def url(question):
+            return reverse('polls:results', args=(question.id,))
+        self.run_sizes(
+            'results',
+            lambda question: self.render(
+                ResultsView.as_view()(self.request_factory.get(url(question)), pk=str(question.id))
+            ),
+            lambda question: self.client.get(url(question)),
+        )
+
+    def test_results_json(self):
+        def url(question):
+            return reverse('polls:results_json', args=(question.id,))
+        self.run_sizes(
+            'results_json',
+            lambda question: results_json(self.request_factory.get(url(question)), pk=str(question.id)),
+            lambda question: self.client.get(url(question)),
+        )
+
+    def test_vote(self):
+        def url(question):
+            return reverse('polls:vote', args=(question.id,))
+
+        def data(question):
+            if not hasattr(question, 'vote_data'):
+                question.vote_data = {'choice': question.choice_set.values_list('pk', flat=True).first()}
+            return question.vote_data
+        self.run_sizes(
+            'vote',
+            lambda question: vote(self.request_factory.post(url(question), data(question)), str(question.id)),
+            lambda question: self.client.post(url(question), data(question)),
+        )
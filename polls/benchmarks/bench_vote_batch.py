@@ -0,0 +1,54 @@
+import json
+import time
+
+from django.test import override_settings
+from django.urls import reverse
+
+from polls.models import Choice
+from polls.tests import base
+from polls.views import vote_batch_signature
+
+VOTES = 500
+
+
+@override_settings(POLLS_VOTE_BATCH_KEYS={'benchmark': 'secret'})
+class VoteBatchBenchmark(base.BaseTestCase):
+    """
+    Compares replaying votes one POST at a time through vote() with sending
+    them to the batch endpoint, both through the full middleware stack.
+    """
+
+    def setUp(self):
+        super().setUp()
+
+        self.question = self.create_question(question_text='Some question.', days=-1)
+        self.choices = [
+            Choice.objects.create(question=self.question, choice_text='Choice {}'.format(i))
+            for i in range(10)
+        ]
+
+    def test_batch_vs_single_votes(self):
+        url = reverse('polls:vote', args=(self.question.id,))
+        start = time.perf_counter()
+        for i in range(VOTES):
+            self.client.post(url, {'choice': self.choices[i % 10].id})
+        single = time.perf_counter() - start
+
+        records = [
+            {'question': self.question.id, 'choice': self.choices[i % 10].id}
+            for i in range(VOTES)
+        ]
+        body = json.dumps(records)
+        timestamp = str(int(time.time()))
+        start = time.perf_counter()
+        self.client.post(
+            reverse('polls:vote_batch'), body, content_type='application/json',
+            HTTP_X_POLLS_KEY='benchmark', HTTP_X_POLLS_TIMESTAMP=timestamp,
+            HTTP_X_POLLS_SIGNATURE=vote_batch_signature('secret', timestamp, body.encode()),
+        )
+        batch = time.perf_counter() - start
+
+        self.assertEqual(sum(Choice.objects.values_list('votes', flat=True)), 2 * VOTES)
+        print()
+        print('vote()      {:10.0f} votes/s'.format(VOTES / single))
+        print('vote_batch  {:10.0f} votes/s ({:.0f}x)'.format(VOTES / batch, single / batch))
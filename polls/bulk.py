@@ -0,0 +1,60 @@
+"""
+Bulk writes that need the primary keys of the inserted rows.
+"""
+from django.db import connections, transaction
+from django.db.models import Max
+
+from .models import Choice, Question
+from .search import index_questions
+
+
+def bulk_create_with_ids(model, objs, using='default'):
+    """
+    Inserts `objs` with ``bulk_create()`` and sets their primary keys, also
+    on backends that can't return them from a bulk insert (SQLite).
+
+    There the new rows are found as those above the highest key before the
+    insert, which requires no other process to insert into the table at the
+    same time. A concurrent insert is detected and raises RuntimeError.
+    """
+    objs = list(objs)
+    if not objs:
+        return objs
+    if connections[using].features.can_return_ids_from_bulk_insert:
+        return model._default_manager.using(using).bulk_create(objs)
+
+    manager = model._default_manager.db_manager(using)
+    with transaction.atomic(using=using, savepoint=False):
+        highest = manager.aggregate(highest=Max('pk'))['highest'] or 0
+        manager.bulk_create(objs)
+        pks = list(manager.filter(pk__gt=highest).order_by('pk').values_list('pk', flat=True))
+        if len(pks) != len(objs):
+            raise RuntimeError(
+                "Expected {} new {} rows but found {}; was the table written to "
+                "concurrently?".format(len(objs), model._meta.label, len(pks))
+            )
+    for obj, pk in zip(objs, pks):
+        obj.pk = pk
+    return objs
+
+
+def bulk_create_polls(questions, using='default'):
+    """
+    Inserts unsaved questions together with the unsaved choices in their
+    `new_choices` attribute, and indexes them for search. The questions'
+    `total_votes` are set from their choices. Returns the number of choices
+    created.
+    """
+    if not questions:
+        return 0
+    for question in questions:
+        question.total_votes = sum(choice.votes for choice in question.new_choices)
+    bulk_create_with_ids(Question, questions, using=using)
+    choices = []
+    for question in questions:
+        for choice in question.new_choices:
+            choice.question_id = question.pk
+            choices.append(choice)
+    Choice.objects.using(using).bulk_create(choices)
+    index_questions(min(q.pk for q in questions), max(q.pk for q in questions), using=using)
+    return len(choices)
@@ -0,0 +1,155 @@
+"""
+Caching of poll data in Django's cache framework.
+"""
+import math
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import Choice, Question
+from .pagination import keyset_page
+
+INDEX_KEY = 'polls:index'
+DETAIL_PAGE_KEY = 'polls:detail:{}'
+LAST_MODIFIED_KEY = 'polls:last-modified:{}'
+PUB_DATE_KEY = 'polls:pub-date:{}'
+RESULTS_KEY = 'polls:results:{}'
+RESULTS_HITS_KEY = 'polls:results:hits'
+RESULTS_MISSES_KEY = 'polls:results:misses'
+
+
+def _incr(key):
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Evicted between add() and incr().
+            cache.add(key, 1, timeout=None)
+
+
+def get_latest_questions():
+    """
+    Returns the last five published questions. The list is cached until the
+    next question is due to be published, so future questions still appear
+    on time.
+    """
+    now = timezone.now()
+    cached = cache.get(INDEX_KEY)
+    if cached is not None:
+        next_publish, questions = cached
+        if next_publish is None or now < next_publish:
+            return questions
+
+    questions = keyset_page(Question.objects.filter(pub_date__lte=now), 5).object_list
+    next_publish = Question.objects.filter(
+        pub_date__gt=now
+    ).order_by('pub_date').values_list('pub_date', flat=True).first()
+    timeout = settings.POLLS_INDEX_CACHE_TIMEOUT
+    if next_publish is not None:
+        timeout = min(timeout, math.ceil((next_publish - now).total_seconds()))
+    cache.set(INDEX_KEY, (next_publish, questions), timeout)
+    return questions
+
+
+def invalidate_index():
+    cache.delete(INDEX_KEY)
+
+
+def get_detail_page(question_id):
+    return cache.get(DETAIL_PAGE_KEY.format(question_id))
+
+
+def set_detail_page(question_id, html):
+    cache.set(DETAIL_PAGE_KEY.format(question_id), html, settings.POLLS_DETAIL_PAGE_CACHE_TIMEOUT)
+
+
+def invalidate_detail_page(question_id):
+    cache.delete(DETAIL_PAGE_KEY.format(question_id))
+
+
+def get_last_modified(question_id):
+    """
+    Returns the `last_modified` marker of a published question, or None if
+    it doesn't exist or isn't published yet.
+    """
+    key = LAST_MODIFIED_KEY.format(question_id)
+    pub_date_key = PUB_DATE_KEY.format(question_id)
+    cached = cache.get_many([key, pub_date_key])
+    if key in cached and pub_date_key in cached:
+        last_modified, pub_date = cached[key], cached[pub_date_key]
+    else:
+        row = Question.objects.filter(pk=question_id).values_list('last_modified', 'pub_date').first()
+        if row is None:
+            return None
+        last_modified, pub_date = row
+        # add() rather than set() so that a concurrent update of the
+        # marker is never overwritten with the value read here.
+        cache.add(key, last_modified, timeout=None)
+        cache.add(pub_date_key, pub_date, timeout=None)
+        last_modified = cached.get(key, last_modified)
+    if pub_date > timezone.now():
+        return None
+    return last_modified
+
+
+def set_last_modified(last_modified, *question_ids):
+    cache.set_many({
+        LAST_MODIFIED_KEY.format(question_id): last_modified for question_id in question_ids
+    }, timeout=None)
+
+
+def set_pub_date(pub_date, question_id):
+    cache.set(PUB_DATE_KEY.format(question_id), pub_date, timeout=None)
+
+
+def invalidate_last_modified(question_id):
+    cache.delete_many([LAST_MODIFIED_KEY.format(question_id), PUB_DATE_KEY.format(question_id)])
+
+
+def compute_tallies(question_id):
+    """
+    Returns the choices of a question as a list of dicts with `id`,
+    `choice_text`, `votes` and `percentage` of all votes.
+    """
+    rows = Choice.objects.filter(
+        question_id=question_id
+    ).with_shard_votes().order_by('pk').values_list('pk', 'choice_text', 'votes', 'shard_votes')
+    tallies = [
+        {'id': pk, 'choice_text': text, 'votes': votes + shard_votes}
+        for pk, text, votes, shard_votes in rows
+    ]
+    total = sum(tally['votes'] for tally in tallies)
+    for tally in tallies:
+        tally['percentage'] = round(100.0 * tally['votes'] / total, 1) if total else 0.0
+    return tallies
+
+
+def get_results(question_id):
+    """
+    Returns the tallies of a question, from the cache when it is warm.
+    """
+    key = RESULTS_KEY.format(question_id)
+    tallies = cache.get(key)
+    if tallies is None:
+        _incr(RESULTS_MISSES_KEY)
+        tallies = compute_tallies(question_id)
+        cache.set(key, tallies, settings.POLLS_RESULTS_CACHE_TIMEOUT)
+    else:
+        _incr(RESULTS_HITS_KEY)
+    return tallies
+
+
+def invalidate_results(*question_ids):
+    cache.delete_many([RESULTS_KEY.format(question_id) for question_id in question_ids])
+
+
+def results_cache_stats():
+    """
+    Returns the results cache hit and miss counts.
+    """
+    counts = cache.get_many([RESULTS_HITS_KEY, RESULTS_MISSES_KEY])
+    return {
+        'hits': counts.get(RESULTS_HITS_KEY, 0),
+        'misses': counts.get(RESULTS_MISSES_KEY, 0),
+    }
@@ -0,0 +1,50 @@
+"""
+Database tuning switched on by ``DATABASE_PERFORMANCE_PROFILE``.
+"""
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA = 'replica'
+
+
+def replica():
+    """
+    Returns the alias to use for reads that may lag behind the latest
+    writes: `replica` if it is configured, else `default`.
+
+    Only the page views opt into it, for the question they display. Reads
+    that follow a write or fill a cache stay on `default`, so they never
+    see, or keep, what a lagging replica returned.
+    """
+    return REPLICA if REPLICA in connections.databases else DEFAULT_DB_ALIAS
+
+
+class PrimaryReplicaRouter(object):
+    """
+    Sends all writes to `default`, and reads there unless the queryset asks
+    for the `replica()`.
+    """
+
+    def db_for_read(self, model, **hints):
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """
+    Applies ``SQLITE_PRAGMAS`` to each new SQLite connection.
+    """
+    if not settings.DATABASE_PERFORMANCE_PROFILE or connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for pragma, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute('PRAGMA {} = {}'.format(pragma, value))
@@ -0,0 +1,137 @@
+"""
+Streaming exports of every question with its choice tallies.
+
+All rows come from one joined query read in chunks (through a server-side
+cursor on PostgreSQL) and are turned into CSV or NDJSON lines one question
+at a time, so memory use doesn't depend on the number of questions.
+"""
+import csv
+import datetime
+import itertools
+import json
+import operator
+
+from django.db.models import Sum
+from django.db.models.sql.constants import MULTI
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import Question
+
+CSV_HEADER = ('question_id', 'question_text', 'pub_date', 'choice_id', 'choice_text', 'votes')
+
+
+def parse_bound(value):
+    """
+    Parses an ISO 8601 date or datetime for the `since` and `until`
+    filters. Dates mean midnight in the current time zone. Raises ValueError
+    for anything else.
+    """
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError("Invalid date: {!r}".format(value))
+        moment = datetime.datetime.combine(day, datetime.time())
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def iterate_chunked(queryset):
+    """
+    Iterates over the rows of a ``values_list()`` queryset while reading
+    them from the database in chunks.
+
+    Unlike model querysets, ``values_list().iterator()`` fetches all rows
+    at once on Django 1.11, through a client-side cursor on PostgreSQL and
+    into a list on SQLite.
+    """
+    compiler = queryset.query.get_compiler(queryset.db)
+    for row in compiler.results_iter(compiler.execute_sql(MULTI, chunked_fetch=True)):
+        yield tuple(row)
+
+
+def export_rows(since=None, until=None):
+    """
+    Returns an iterator over (question id, question text, pub_date, choice
+    id, choice text, votes, shard votes) rows ordered by question, with a
+    row of None choice fields for questions without choices. Questions are
+    restricted to ``since <= pub_date < until``.
+    """
+    questions = Question.objects.all()
+    if since is not None:
+        questions = questions.filter(pub_date__gte=since)
+    if until is not None:
+        questions = questions.filter(pub_date__lt=until)
+    return iterate_chunked(questions.values_list(
+        'pk', 'question_text', 'pub_date', 'choice__pk', 'choice__choice_text', 'choice__votes',
+    ).annotate(
+        shard_votes=Sum('choice__choiceshard__votes'),
+    ).order_by('pk', 'choice__pk'))
+
+
+def export_questions(since=None, until=None):
+    """
+    Yields a dict per question with its choices and their votes, including
+    those not yet compacted from counter shards.
+    """
+    for (pk, question_text, pub_date), rows in itertools.groupby(
+        export_rows(since, until), key=operator.itemgetter(0, 1, 2)
+    ):
+        choices = [
+            {'id': choice_id, 'choice_text': choice_text, 'votes': votes + (shard_votes or 0)}
+            for _, _, _, choice_id, choice_text, votes, shard_votes in rows
+            if choice_id is not None
+        ]
+        yield {
+            'id': pk,
+            'question_text': question_text,
+            'pub_date': pub_date,
+            'total_votes': sum(choice['votes'] for choice in choices),
+            'choices': choices,
+        }
+
+
+class Echo(object):
+    """
+    File-like object handing back what is written to it, so that
+    `csv.writer` can format one line at a time.
+    """
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(questions):
+    """
+    Yields a header and a line per choice, or per question without choices.
+    """
+    writer = csv.writer(Echo())
+    yield writer.writerow(CSV_HEADER)
+    for question in questions:
+        pub_date = question['pub_date'].isoformat()
+        if not question['choices']:
+            yield writer.writerow((question['id'], question['question_text'], pub_date, '', '', ''))
+        for choice in question['choices']:
+            yield writer.writerow((
+                question['id'], question['question_text'], pub_date,
+                choice['id'], choice['choice_text'], choice['votes'],
+            ))
+
+
+def ndjson_lines(questions):
+    """
+    Yields a JSON document per question, one per line. Dates keep their
+    microseconds so that exports can be imported back unchanged.
+    """
+    for question in questions:
+        question['pub_date'] = question['pub_date'].isoformat()
+        yield json.dumps(question) + '\n'
+
+
+# Content type and line generator of each export format.
+FORMATS = {
+    'csv': ('text/csv; charset=utf-8', csv_lines),
+    'ndjson': ('application/x-ndjson; charset=utf-8', ndjson_lines),
+}
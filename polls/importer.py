@@ -0,0 +1,266 @@
+"""
+Importing polls from JSON lines or CSV files.
+
+Files are read incrementally and their records inserted with
+``bulk_create`` one batch per transaction, so memory use doesn't depend on
+the size of the file. Choices get the ids of their questions from the
+question insert, without a query per row.
+
+Both formats match what `polls.export` writes. A JSON lines record is a
+question::
+
+    {"question_text": "...", "pub_date": "2017-01-01T12:00:00Z",
+     "choices": [{"choice_text": "...", "votes": 3}, ...]}
+
+A CSV file has a header and a row per choice with the `question_text`,
+`pub_date`, `choice_text` and optional `votes` columns. Consecutive rows
+with the same `question_id` (or, without that column, the same question
+text and date) make up one question, and a row with an empty
+`choice_text` is a question without choices.
+
+Readers yield the offset to resume reading from after each record, which
+the importer saves as a checkpoint in the transaction of each batch.
+"""
+import csv
+import itertools
+import json
+
+from django.db import transaction
+
+from .bulk import bulk_create_polls
+from .cache import invalidate_index
+from .export import parse_bound
+from .models import Choice, ImportCheckpoint, Question
+
+FORMATS = ('ndjson', 'csv')
+
+CSV_COLUMNS = ('question_text', 'pub_date', 'choice_text')
+
+# Invalid records kept with their error message; the rest are only counted.
+MAX_REPORTED_ERRORS = 100
+
+
+class InvalidRecord(ValueError):
+    """
+    Raised for an invalid record in strict mode.
+    """
+
+    def __init__(self, line, message):
+        super().__init__('Line {}: {}'.format(line, message))
+        self.line = line
+
+
+class Record(object):
+    """
+    A question read from a file, with the line it starts on and the byte
+    offset and line to resume reading from after it.
+    """
+
+    def __init__(self, line, data, resume_offset, resume_line):
+        self.line = line
+        self.data = data
+        self.resume_offset = resume_offset
+        self.resume_line = resume_line
+
+
+def read_lines(binary_file, offset=0):
+    """
+    Yields (offset, decoded line) pairs from `binary_file`, starting at
+    byte `offset`.
+    """
+    binary_file.seek(offset)
+    for raw in binary_file:
+        yield offset, raw.decode('utf-8')
+        offset += len(raw)
+
+
+def read_ndjson(binary_file, offset=0, line=1):
+    for line_offset, text in read_lines(binary_file, offset):
+        if text.strip():
+            try:
+                data = json.loads(text)
+            except ValueError:
+                data = None
+            yield Record(line, data, line_offset + len(text.encode('utf-8')), line + 1)
+        line += 1
+
+
+def read_csv_header(binary_file):
+    """
+    Returns the column names of a CSV file and the offset of its first row.
+    """
+    lines = read_lines(binary_file)
+    _, header = next(lines, (0, ''))
+    return next(csv.reader([header]), []), len(header.encode('utf-8'))
+
+
+def read_csv(binary_file, offset=0, line=2):
+    """
+    Yields a record per question of a CSV file. Rows are read from `offset`,
+    which must be the start of a question (or 0 for the start of the file).
+    """
+    columns, first_row = read_csv_header(binary_file)
+    missing = [column for column in CSV_COLUMNS if column not in columns]
+    if missing:
+        raise ValueError("The CSV file has no {} column.".format(', '.join(missing)))
+
+    # csv.reader pulls lines on its own (a quoted value may span lines),
+    # so track where each row starts as it goes.
+    position = {'offset': max(offset, first_row), 'line': line}
+    lines = read_lines(binary_file, position['offset'])
+
+    def text_lines():
+        for line_offset, text in lines:
+            position['offset'] = line_offset + len(text.encode('utf-8'))
+            position['line'] += 1
+            yield text
+
+    def rows():
+        start, start_line = position['offset'], position['line']
+        for row in csv.DictReader(text_lines(), fieldnames=columns):
+            yield start, start_line, row
+            start, start_line = position['offset'], position['line']
+
+    def key(row):
+        if row.get('question_id'):
+            return row['question_id']
+        return row.get('question_text'), row.get('pub_date')
+
+    group = []
+    for start, start_line, row in rows():
+        if group and key(row) != key(group[0][2]):
+            yield csv_record(group, start, start_line)
+            group = []
+        group.append((start, start_line, row))
+    if group:
+        yield csv_record(group, position['offset'], position['line'])
+
+
+def csv_record(group, resume_offset, resume_line):
+    _, line, first = group[0]
+    data = {
+        'question_text': first.get('question_text'),
+        'pub_date': first.get('pub_date'),
+        'choices': [
+            {'choice_text': row.get('choice_text'), 'votes': row.get('votes') or 0}
+            for _, _, row in group if row.get('choice_text')
+        ],
+    }
+    return Record(line, data, resume_offset, resume_line)
+
+
+def read_records(binary_file, file_format, offset=0, line=None):
+    """
+    Yields the records of a file in `file_format`, starting at byte
+    `offset` on `line`.
+    """
+    if file_format == 'csv':
+        return read_csv(binary_file, offset, line or 2)
+    return read_ndjson(binary_file, offset, line or 1)
+
+
+def validate_text(value, model, name):
+    if not isinstance(value, str) or not value.strip():
+        raise ValueError("Missing {}.".format(name))
+    max_length = model._meta.get_field(name).max_length
+    if len(value) > max_length:
+        raise ValueError("{} is longer than {} characters.".format(name, max_length))
+    return value
+
+
+def validate_record(data):
+    """
+    Returns an unsaved question for the data of a record, with its unsaved
+    choices in `new_choices`, or raises ValueError.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Not a valid JSON object.")
+    question = Question(question_text=validate_text(data.get('question_text'), Question, 'question_text'))
+    if not isinstance(data.get('pub_date'), str):
+        raise ValueError("Missing pub_date.")
+    question.pub_date = parse_bound(data['pub_date'])
+
+    choices = data.get('choices', [])
+    if not isinstance(choices, list):
+        raise ValueError("choices is not a list.")
+    question.new_choices = []
+    for choice in choices:
+        if not isinstance(choice, dict):
+            raise ValueError("A choice is not a JSON object.")
+        try:
+            votes = int(choice.get('votes', 0))
+        except (TypeError, ValueError):
+            raise ValueError("Invalid votes: {!r}.".format(choice.get('votes')))
+        if votes < 0:
+            raise ValueError("votes must not be negative.")
+        question.new_choices.append(
+            Choice(choice_text=validate_text(choice.get('choice_text'), Choice, 'choice_text'), votes=votes)
+        )
+    return question
+
+
+class Importer(object):
+    """
+    Inserts records in batches of `batch_size` questions, one transaction
+    per batch, and keeps count of what was imported.
+
+    Invalid records are skipped, counted in `invalid` and the first of them
+    listed in `errors` as (line, message) pairs. With `strict` they raise
+    InvalidRecord instead, rolling back their batch.
+
+    With a `checkpoint` name, the position after each batch is saved in an
+    `ImportCheckpoint` of that name, in the batch's transaction.
+    """
+
+    def __init__(self, batch_size=1000, strict=False, checkpoint=None, using='default'):
+        self.batch_size = batch_size
+        self.strict = strict
+        self.checkpoint = checkpoint
+        self.using = using
+        self.records = 0
+        self.questions = 0
+        self.choices = 0
+        self.invalid = 0
+        self.errors = []
+        self.resume_offset = None
+        self.resume_line = None
+
+    def run(self, records):
+        """
+        Imports `records`, yielding after each committed batch.
+        """
+        records = iter(records)
+        try:
+            while True:
+                batch = list(itertools.islice(records, self.batch_size))
+                if not batch:
+                    break
+                with transaction.atomic(using=self.using):
+                    self.import_batch(batch)
+                    self.save_checkpoint(batch[-1])
+                self.records += len(batch)
+                self.resume_offset = batch[-1].resume_offset
+                self.resume_line = batch[-1].resume_line
+                yield self
+        finally:
+            invalidate_index()
+
+    def import_batch(self, records):
+        questions = []
+        for record in records:
+            try:
+                questions.append(validate_record(record.data))
+            except ValueError as e:
+                if self.strict:
+                    raise InvalidRecord(record.line, e)
+                self.invalid += 1
+                if len(self.errors) < MAX_REPORTED_ERRORS:
+                    self.errors.append((record.line, str(e)))
+        self.choices += bulk_create_polls(questions, using=self.using)
+        self.questions += len(questions)
+
+    def save_checkpoint(self, record):
+        if self.checkpoint is not None:
+            ImportCheckpoint.objects.using(self.using).update_or_create(
+                name=self.checkpoint, defaults={'offset': record.resume_offset, 'line': record.resume_line},
+            )
@@ -0,0 +1,275 @@
+"""
+Live results pushed to browsers as server-sent events.
+
+The WSGI application can't hold thousands of idle connections, so live
+results are served by a separate asyncio process (``manage.py runlive``)
+on ``/polls/<pk>/live/``. Whenever votes are committed, `notify()` sends
+the ids of the affected questions to it in a UDP datagram, addressed to
+``POLLS_LIVE_NOTIFY_ADDRESS``. Notifications are coalesced for a short
+interval, after which the tallies of each changed question with
+subscribers are read once and only the choices whose votes changed are
+pushed to its subscribers, as one event.
+"""
+import asyncio
+import concurrent.futures
+import json
+import logging
+import re
+import socket
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .cache import compute_tallies
+from .models import Question
+
+logger = logging.getLogger(__name__)
+
+PATH_RE = re.compile(r'^/polls/(?P<pk>[0-9]+)/live/$')
+
+# Largest notification sent in one datagram.
+MAX_DATAGRAM = 1024
+
+# Subscribers whose unsent events exceed this many bytes are dropped.
+MAX_BUFFERED_BYTES = 64 * 1024
+
+_socket = None
+
+
+def notify(*question_ids):
+    """
+    Tells the live results server that votes for `question_ids` changed.
+    Best effort: nothing is sent unless ``POLLS_LIVE_NOTIFY_ADDRESS`` is set,
+    and failures are ignored.
+    """
+    global _socket
+    address = settings.POLLS_LIVE_NOTIFY_ADDRESS
+    if address is None or not question_ids:
+        return
+    ids = ','.join(str(question_id) for question_id in question_ids)
+    try:
+        if _socket is None:
+            _socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            _socket.setblocking(False)
+        while ids:
+            if len(ids) <= MAX_DATAGRAM:
+                chunk, ids = ids, ''
+            else:
+                cut = ids.rindex(',', 0, MAX_DATAGRAM)
+                chunk, ids = ids[:cut], ids[cut + 1:]
+            _socket.sendto(chunk.encode('ascii'), tuple(address))
+    except OSError:
+        logger.debug('Could not send live results notification', exc_info=True)
+
+
+def read_tallies(question_id):
+    """
+    Returns the tallies of a published question, or None. Runs in an
+    executor thread.
+    """
+    try:
+        if not Question.objects.filter(pk=question_id, pub_date__lte=timezone.now()).exists():
+            return None
+        return compute_tallies(question_id)
+    finally:
+        close_old_connections()
+
+
+def event(name, data):
+    return 'event: {}\ndata: {}\n\n'.format(name, json.dumps(data)).encode()
+
+
+def snapshot(question_id, tallies):
+    return {
+        'id': question_id,
+        'total_votes': sum(tally['votes'] for tally in tallies),
+        'choices': [{'id': tally['id'], 'votes': tally['votes']} for tally in tallies],
+    }
+
+
+def delta(question_id, old, new):
+    """
+    Returns the changes between two tally lists as event data, or None if
+    no votes changed.
+    """
+    old_votes = {tally['id']: tally['votes'] for tally in old}
+    changed = [
+        {'id': tally['id'], 'votes': tally['votes']}
+        for tally in new if old_votes.get(tally['id']) != tally['votes']
+    ]
+    if not changed and len(old) == len(new):
+        return None
+    return {
+        'id': question_id,
+        'total_votes': sum(tally['votes'] for tally in new),
+        'choices': changed,
+    }
+
+
+class NotificationProtocol(asyncio.DatagramProtocol):
+
+    def __init__(self, server):
+        self.server = server
+
+    def datagram_received(self, data, addr):
+        for value in data.split(b','):
+            try:
+                self.server.changed(int(value))
+            except ValueError:
+                pass
+
+
+class LiveResultsServer(object):
+    """
+    Serves the live results streams of all questions on one event loop.
+
+    `coalesce` is the number of seconds notifications are collected before
+    tallies are read and pushed, and `heartbeat` the interval of the
+    comments that keep idle connections open through proxies.
+    """
+
+    def __init__(self, coalesce=0.25, heartbeat=15, workers=4, loop=None):
+        self.coalesce = coalesce
+        self.heartbeat = heartbeat
+        self.loop = loop or asyncio.get_event_loop()
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+        # Question id -> set of StreamWriters.
+        self.subscribers = {}
+        # Question id -> tallies last pushed to its subscribers.
+        self.tallies = {}
+        self.dirty = set()
+        self.flush_handle = None
+        self.notifications = None
+        self.heartbeats = None
+
+    @property
+    def connections(self):
+        return sum(len(writers) for writers in self.subscribers.values())
+
+    def changed(self, question_id):
+        """
+        Marks a question as changed, pushing its new tallies after the
+        coalescing interval.
+        """
+        if question_id not in self.subscribers:
+            return
+        self.dirty.add(question_id)
+        if self.flush_handle is None:
+            self.flush_handle = self.loop.call_later(
+                self.coalesce, lambda: self.loop.create_task(self.flush())
+            )
+
+    async def flush(self):
+        self.flush_handle = None
+        dirty, self.dirty = self.dirty, set()
+        for question_id in dirty:
+            if question_id not in self.subscribers:
+                continue
+            tallies = await self.loop.run_in_executor(self.executor, read_tallies, question_id)
+            if tallies is None or question_id not in self.subscribers:
+                continue
+            data = delta(question_id, self.tallies[question_id], tallies)
+            self.tallies[question_id] = tallies
+            if data is not None:
+                self.broadcast(question_id, event('delta', data))
+
+    def broadcast(self, question_id, message):
+        for writer in list(self.subscribers.get(question_id, ())):
+            self.send(question_id, writer, message)
+
+    def send(self, question_id, writer, message):
+        if writer.transport.get_write_buffer_size() > MAX_BUFFERED_BYTES:
+            logger.info('Dropping slow live results subscriber of question %s', question_id)
+            writer.close()
+            self.unsubscribe(question_id, writer)
+            return
+        writer.write(message)
+
+    def unsubscribe(self, question_id, writer):
+        writers = self.subscribers.get(question_id)
+        if writers is None:
+            return
+        writers.discard(writer)
+        if not writers:
+            del self.subscribers[question_id]
+            self.tallies.pop(question_id, None)
+
+    async def handle(self, reader, writer):
+        try:
+            request_line = await reader.readline()
+            # Skip the headers.
+            while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                pass
+            parts = request_line.decode('latin-1').split()
+            match = PATH_RE.match(parts[1].split('?')[0]) if len(parts) == 3 else None
+            if match is None or parts[0] != 'GET':
+                return self.respond(writer, '404 Not Found')
+            question_id = int(match.group('pk'))
+            tallies = self.tallies.get(question_id)
+            if tallies is None:
+                tallies = await self.loop.run_in_executor(self.executor, read_tallies, question_id)
+                if tallies is None:
+                    return self.respond(writer, '404 Not Found')
+                self.tallies.setdefault(question_id, tallies)
+            writer.write(
+                b'HTTP/1.1 200 OK\r\n'
+                b'Content-Type: text/event-stream\r\n'
+                b'Cache-Control: no-cache\r\n'
+                b'Connection: keep-alive\r\n'
+                b'\r\n'
+            )
+            writer.write(event('snapshot', snapshot(question_id, self.tallies[question_id])))
+            self.subscribers.setdefault(question_id, set()).add(writer)
+        except (ConnectionError, UnicodeDecodeError):
+            writer.close()
+            return
+
+        # Wait for the client to go away. Anything it sends is ignored.
+        try:
+            while await reader.read(1024):
+                pass
+        except ConnectionError:
+            pass
+        finally:
+            self.unsubscribe(question_id, writer)
+            writer.close()
+
+    def respond(self, writer, status):
+        writer.write('HTTP/1.1 {}\r\nContent-Length: 0\r\nConnection: close\r\n\r\n'.format(status).encode())
+        writer.close()
+
+    async def send_heartbeats(self):
+        while True:
+            await asyncio.sleep(self.heartbeat)
+            for question_id, writers in list(self.subscribers.items()):
+                for writer in list(writers):
+                    self.send(question_id, writer, b': heartbeat\n\n')
+
+    async def start(self, host, port, notify_address):
+        """
+        Starts accepting streams on `host` and `port` and notifications on
+        `notify_address`. Returns the stream server.
+        """
+        self.notifications, _ = await self.loop.create_datagram_endpoint(
+            lambda: NotificationProtocol(self), local_addr=tuple(notify_address),
+        )
+        server = await asyncio.start_server(self.handle, host, port, backlog=1024)
+        self.heartbeats = self.loop.create_task(self.send_heartbeats())
+        return server
+
+    def stop(self):
+        """
+        Stops listening for notifications and closes all streams.
+        """
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+        if self.heartbeats is not None:
+            self.heartbeats.cancel()
+        if self.notifications is not None:
+            self.notifications.close()
+        for writers in self.subscribers.values():
+            for writer in writers:
+                writer.close()
+        self.subscribers.clear()
+        self.executor.shutdown(wait=False)
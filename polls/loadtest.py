@@ -0,0 +1,296 @@
+"""
+Concurrent load generation against the polls views.
+
+Workers replay a weighted mix of index, detail, results and vote requests
+over plain HTTP until a deadline. They run as threads, processes or
+coroutines on one asyncio event loop, and each returns a `Stats` that the
+caller merges.
+"""
+import asyncio
+import bisect
+import http.client
+import random
+import re
+import socketserver
+import threading
+import time
+import urllib.parse
+from http.cookies import SimpleCookie
+
+from django.core.servers.basehttp import WSGIRequestHandler, WSGIServer, get_internal_wsgi_application
+
+KINDS = ('index', 'detail', 'results', 'vote')
+
+# Upper bounds in milliseconds of the latency histogram buckets.
+BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+TOKEN_RE = re.compile(r"name='csrfmiddlewaretoken' value='([^']+)'")
+
+
+def parse_mix(value):
+    """
+    Parses a traffic mix such as ``index=4,detail=3,results=2,vote=1`` into
+    a dict of weights.
+    """
+    mix = {}
+    for part in value.split(','):
+        kind, _, weight = part.partition('=')
+        kind = kind.strip()
+        if kind not in KINDS:
+            raise ValueError("Unknown request kind {!r}, expected one of {}.".format(kind, ', '.join(KINDS)))
+        mix[kind] = float(weight or 1)
+    if not any(mix.values()):
+        raise ValueError("The traffic mix needs at least one positive weight.")
+    return mix
+
+
+class Stats(object):
+
+    def __init__(self):
+        self.requests = dict.fromkeys(KINDS, 0)
+        self.errors = dict.fromkeys(KINDS, 0)
+        self.latencies = {kind: [] for kind in KINDS}
+        # Successful votes per choice id.
+        self.votes = {}
+
+    def record(self, kind, latency, ok):
+        self.requests[kind] += 1
+        self.latencies[kind].append(latency * 1000)
+        if not ok:
+            self.errors[kind] += 1
+
+    def merge(self, other):
+        for kind in KINDS:
+            self.requests[kind] += other.requests[kind]
+            self.errors[kind] += other.errors[kind]
+            self.latencies[kind].extend(other.latencies[kind])
+        for choice_id, count in other.votes.items():
+            self.votes[choice_id] = self.votes.get(choice_id, 0) + count
+
+    @property
+    def total_requests(self):
+        return sum(self.requests.values())
+
+    @property
+    def total_errors(self):
+        return sum(self.errors.values())
+
+    def percentile(self, kind, fraction):
+        ordered = sorted(self.latencies[kind])
+        if not ordered:
+            return 0.0
+        return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+    def histogram(self, kind):
+        """
+        Returns (upper bound in ms or None for the overflow bucket, count)
+        pairs for the latencies of `kind`.
+        """
+        counts = [0] * (len(BUCKETS) + 1)
+        for latency in self.latencies[kind]:
+            counts[bisect.bisect(BUCKETS, latency)] += 1
+        return list(zip(BUCKETS + (None,), counts))
+
+
+class Scenario(object):
+    """
+    Picks requests for a worker: which kind, against which question, and
+    with which choice for votes.
+    """
+
+    def __init__(self, base_url, targets, mix, seed=None):
+        self.base_path = urllib.parse.urlsplit(base_url).path.rstrip('/')
+        self.targets = targets
+        self.kinds = [kind for kind in KINDS if mix.get(kind)]
+        self.cumulative = []
+        total = 0
+        for kind in self.kinds:
+            total += mix[kind]
+            self.cumulative.append(total)
+        self.random = random.Random(seed)
+
+    def next_request(self):
+        kind = self.kinds[bisect.bisect(self.cumulative, self.random.random() * self.cumulative[-1])]
+        question_id, choice_ids = self.random.choice(self.targets)
+        choice_id = self.random.choice(choice_ids)
+        return kind, question_id, choice_id, self.path(kind, question_id)
+
+    def path(self, kind, question_id):
+        if kind == 'index':
+            return self.base_path + '/polls/'
+        if kind == 'detail':
+            return '{}/polls/{}/'.format(self.base_path, question_id)
+        if kind == 'results':
+            return '{}/polls/{}/results/'.format(self.base_path, question_id)
+        return '{}/polls/{}/vote/'.format(self.base_path, question_id)
+
+
+class CsrfSession(object):
+    """
+    Holds the CSRF cookie and form token a worker needs to vote.
+    """
+
+    def __init__(self):
+        self.cookie = None
+        self.token = None
+
+    def update(self, headers, body):
+        for name, value in headers:
+            if name.lower() == 'set-cookie':
+                cookie = SimpleCookie(value)
+                if 'csrftoken' in cookie:
+                    self.cookie = cookie['csrftoken'].value
+        match = TOKEN_RE.search(body.decode('utf-8', 'replace'))
+        if match:
+            self.token = match.group(1)
+
+    def vote_request(self, choice_id):
+        body = urllib.parse.urlencode({'choice': choice_id, 'csrfmiddlewaretoken': self.token or ''})
+        headers = {'Content-Type': 'application/x-www-form-urlencoded'}
+        if self.cookie:
+            headers['Cookie'] = 'csrftoken={}'.format(self.cookie)
+        return body.encode(), headers
+
+
+class Worker(object):
+    """
+    Request loop state of one worker, shared by the threaded and asyncio
+    runners.
+    """
+
+    def __init__(self, base_url, targets, mix, stats, seed=None):
+        url = urllib.parse.urlsplit(base_url)
+        self.host, self.port = url.hostname, url.port
+        self.scenario = Scenario(base_url, targets, mix, seed)
+        self.csrf = CsrfSession()
+        self.stats = stats
+
+    def next_request(self):
+        """
+        Returns the kind, choice id, method, path, body and headers of the
+        next request. Workers fetch a detail page before their first vote to
+        get a CSRF token.
+        """
+        kind, question_id, choice_id, path = self.scenario.next_request()
+        if kind == 'vote' and self.csrf.token is None:
+            kind, path = 'detail', self.scenario.path('detail', question_id)
+        if kind == 'vote':
+            body, headers = self.csrf.vote_request(choice_id)
+            return kind, choice_id, 'POST', path, body, headers
+        return kind, choice_id, 'GET', path, None, {}
+
+    def record(self, kind, choice_id, elapsed, status=None, headers=(), content=b''):
+        ok = status == (302 if kind == 'vote' else 200)
+        self.stats.record(kind, elapsed, ok)
+        if kind == 'detail' and ok:
+            self.csrf.update(headers, content)
+        if kind == 'vote' and ok:
+            self.stats.votes[choice_id] = self.stats.votes.get(choice_id, 0) + 1
+
+
+def http_request(host, port, method, path, body=None, headers=None, timeout=30):
+    connection = http.client.HTTPConnection(host, port, timeout=timeout)
+    try:
+        connection.request(method, path, body=body, headers=headers or {})
+        response = connection.getresponse()
+        return response.status, response.getheaders(), response.read()
+    finally:
+        connection.close()
+
+
+def run_worker(base_url, targets, mix, deadline, seed=None):
+    """
+    Sends requests from one thread or process until `deadline` (a
+    ``time.time()`` value) and returns the collected `Stats`.
+    """
+    worker = Worker(base_url, targets, mix, Stats(), seed)
+    while time.time() < deadline:
+        kind, choice_id, method, path, body, headers = worker.next_request()
+        start = time.perf_counter()
+        try:
+            response = http_request(worker.host, worker.port, method, path, body, headers)
+        except (OSError, http.client.HTTPException):
+            worker.record(kind, choice_id, time.perf_counter() - start)
+        else:
+            worker.record(kind, choice_id, time.perf_counter() - start, *response)
+    return worker.stats
+
+
+async def async_http_request(host, port, method, path, body=None, headers=None):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        lines = ['{} {} HTTP/1.0'.format(method, path), 'Host: {}:{}'.format(host, port)]
+        for name, value in (headers or {}).items():
+            lines.append('{}: {}'.format(name, value))
+        if body is not None:
+            lines.append('Content-Length: {}'.format(len(body)))
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + (body or b''))
+        data = await reader.read()
+    finally:
+        writer.close()
+    head, _, content = data.partition(b'\r\n\r\n')
+    head_lines = head.decode('latin-1').split('\r\n')
+    status = int(head_lines[0].split()[1])
+    headers = [tuple(line.split(': ', 1)) for line in head_lines[1:] if ': ' in line]
+    return status, headers, content
+
+
+async def run_async_worker(worker, deadline):
+    while time.time() < deadline:
+        kind, choice_id, method, path, body, headers = worker.next_request()
+        start = time.perf_counter()
+        try:
+            response = await async_http_request(worker.host, worker.port, method, path, body, headers)
+        except (OSError, ValueError, IndexError):
+            worker.record(kind, choice_id, time.perf_counter() - start)
+        else:
+            worker.record(kind, choice_id, time.perf_counter() - start, *response)
+
+
+def run_async_workers(base_url, targets, mix, deadline, workers, seed=None):
+    """
+    Runs `workers` coroutines on a new event loop and returns their merged
+    `Stats`.
+    """
+    stats = Stats()
+
+    async def run_all():
+        await asyncio.gather(*[
+            run_async_worker(
+                Worker(base_url, targets, mix, stats, None if seed is None else seed + i), deadline
+            )
+            for i in range(workers)
+        ])
+
+    loop = asyncio.new_event_loop()
+    try:
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(run_all())
+    finally:
+        asyncio.set_event_loop(None)
+        loop.close()
+    return stats
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ThreadedWSGIServer(socketserver.ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+def start_server(host='127.0.0.1', port=0):
+    """
+    Serves ``settings.WSGI_APPLICATION`` from a background thread and
+    returns the server. Its address is in ``server.server_address``.
+    """
+    server = ThreadedWSGIServer((host, port), QuietRequestHandler)
+    server.set_app(get_internal_wsgi_application())
+    thread = threading.Thread(target=server.serve_forever, name='polls-loadtest-server')
+    thread.daemon = True
+    thread.start()
+    return server
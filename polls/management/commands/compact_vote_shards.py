@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from polls.votes import compact_shards
+
+
+class Command(BaseCommand):
+    help = "Folds sharded vote counters back into Choice.votes. Run periodically."
+
+    def handle(self, *args, **options):
+        moved = compact_shards()
+        self.stdout.write("Compacted {} votes.".format(moved))
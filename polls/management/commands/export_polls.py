@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from polls.export import FORMATS, export_questions, parse_bound
+
+
+class Command(BaseCommand):
+    help = "Streams every question with its choice tallies as CSV or NDJSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(FORMATS), default='csv', help="Output format (default csv).")
+        parser.add_argument('--since', help="Only questions published at or after this ISO date or datetime.")
+        parser.add_argument('--until', help="Only questions published before this ISO date or datetime.")
+        parser.add_argument('--output', help="File to write to instead of standard output.")
+
+    def handle(self, *args, **options):
+        try:
+            since, until = (
+                parse_bound(options[name]) if options[name] else None for name in ('since', 'until')
+            )
+        except ValueError as e:
+            raise CommandError(e)
+
+        _, lines = FORMATS[options['format']]
+        if not options['output']:
+            for line in lines(export_questions(since, until)):
+                self.stdout.write(line, ending='')
+            return
+        with open(options['output'], 'w', encoding='utf-8', newline='') as output:
+            output.writelines(lines(export_questions(since, until)))
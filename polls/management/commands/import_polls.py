@@ -0,0 +1,97 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, reset_queries
+
+from polls.importer import FORMATS, Importer, InvalidRecord, read_records
+from polls.models import ImportCheckpoint
+
+
+class Command(BaseCommand):
+    help = (
+        "Imports questions and choices from a JSON lines or CSV file in batched "
+        "transactions, checkpointing progress so an interrupted import can resume."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import.")
+        parser.add_argument(
+            '--format', choices=FORMATS,
+            help="File format. By default it is guessed from the file extension.",
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help="Questions per transaction (default 1000).",
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help="Name of the checkpoint recording how far the import got, saved in the database "
+                 "(default: the absolute path of the file).",
+        )
+        parser.add_argument(
+            '--resume', action='store_true',
+            help="Continue from the checkpoint instead of the start of the file.",
+        )
+        parser.add_argument(
+            '--strict', action='store_true',
+            help="Stop at the first invalid record instead of skipping it.",
+        )
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help="Database to import into.")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or ('csv' if path.lower().endswith('.csv') else 'ndjson')
+        checkpoint = options['checkpoint'] or os.path.abspath(path)
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be positive.")
+        if len(checkpoint) > ImportCheckpoint._meta.get_field('name').max_length:
+            raise CommandError("The checkpoint name is too long, choose one with --checkpoint.")
+
+        checkpoints = ImportCheckpoint.objects.using(options['database']).filter(name=checkpoint)
+        offset, line = 0, None
+        if options['resume']:
+            position = checkpoints.values_list('offset', 'line').first()
+            if position is not None:
+                offset, line = position
+                self.stdout.write("Resuming at line {}.".format(line))
+
+        importer = Importer(
+            batch_size=options['batch_size'], strict=options['strict'], checkpoint=checkpoint,
+            using=options['database'],
+        )
+        start = time.time()
+        try:
+            with open(path, 'rb') as f:
+                for _ in importer.run(read_records(f, file_format, offset, line)):
+                    # Keep memory flat when DEBUG logs every insert.
+                    reset_queries()
+                    if options['verbosity'] >= 2:
+                        self.stdout.write("{} records, {} questions, {} choices ({:.0f} records/s)".format(
+                            importer.records, importer.questions, importer.choices,
+                            importer.records / (time.time() - start),
+                        ))
+        except InvalidRecord as e:
+            # Resuming alone would stop at the same record.
+            raise CommandError(
+                "{}. Fix or remove the record on line {}, then re-run with --resume to continue "
+                "from the last committed batch.".format(str(e).rstrip('.'), e.line)
+            )
+        except OSError as e:
+            raise CommandError("{} Re-run with --resume to continue from the last committed batch.".format(e))
+        except ValueError as e:
+            raise CommandError(e)
+
+        elapsed = time.time() - start
+        for line_number, message in importer.errors:
+            self.stderr.write("Line {}: {}".format(line_number, message))
+        if importer.invalid > len(importer.errors):
+            self.stderr.write("... and {} more invalid records.".format(importer.invalid - len(importer.errors)))
+        self.stdout.write(
+            "Imported {} questions and {} choices from {} records in {:.1f}s "
+            "({:.0f} records/s), skipped {} invalid records.".format(
+                importer.questions, importer.choices, importer.records, elapsed,
+                importer.records / elapsed if elapsed else 0, importer.invalid,
+            )
+        )
+        checkpoints.delete()
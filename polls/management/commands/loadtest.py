@@ -0,0 +1,151 @@
+import concurrent.futures
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+
+from polls import loadtest
+from polls.cache import compute_tallies
+from polls.models import Choice, Question
+from polls.votes import get_vote_buffer
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs a concurrent mix of index, detail, results and vote requests against the "
+        "site, served in-process or at --url, and reports throughput, latency, errors "
+        "and lost votes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url',
+            help="Base URL of a running server. By default the WSGI application is served "
+                 "in-process on a free local port.",
+        )
+        parser.add_argument('--duration', type=float, default=10, help="Seconds to run (default 10).")
+        parser.add_argument('--workers', type=int, default=8, help="Concurrent workers (default 8).")
+        parser.add_argument(
+            '--mode', choices=('threads', 'processes', 'asyncio'), default='threads',
+            help="How workers run (default threads).",
+        )
+        parser.add_argument(
+            '--mix', default='index=4,detail=3,results=2,vote=1',
+            help="Relative weights of request kinds (default index=4,detail=3,results=2,vote=1).",
+        )
+        parser.add_argument(
+            '--questions', type=int, default=10,
+            help="Number of latest published questions to target (default 10).",
+        )
+        parser.add_argument('--seed', type=int, help="Seed for a repeatable request sequence.")
+
+    def handle(self, *args, **options):
+        try:
+            mix = loadtest.parse_mix(options['mix'])
+        except ValueError as e:
+            raise CommandError(e)
+
+        targets = self.get_targets(options['questions'])
+        if not targets:
+            raise CommandError("No published questions with choices to target.")
+        question_ids = [question_id for question_id, _ in targets]
+        votes_before = self.count_votes(question_ids)
+
+        server = None
+        base_url = options['url']
+        if base_url is None:
+            server = loadtest.start_server()
+            base_url = 'http://{}:{}/'.format(*server.server_address[:2])
+        # Server threads and worker processes use their own connections.
+        connections.close_all()
+
+        self.stdout.write("Running {} {} workers against {} for {}s...".format(
+            options['workers'], options['mode'], base_url, options['duration'],
+        ))
+        start = time.time()
+        try:
+            stats = self.run(base_url, targets, mix, start + options['duration'], options)
+            elapsed = time.time() - start
+        finally:
+            if server is not None:
+                server.shutdown()
+                server.server_close()
+
+        if server is not None and settings.POLLS_VOTE_BUFFER:
+            get_vote_buffer().flush()
+        counted = self.count_votes(question_ids) - votes_before
+        self.report(stats, elapsed, counted, in_process=server is not None)
+
+    def get_targets(self, count):
+        questions = Question.objects.filter(
+            pub_date__lte=timezone.now(), choice__isnull=False,
+        ).distinct().order_by('-pub_date').values_list('pk', flat=True)[:count]
+        choices = {}
+        for question_id, choice_id in Choice.objects.filter(
+            question_id__in=list(questions)
+        ).values_list('question_id', 'pk'):
+            choices.setdefault(question_id, []).append(choice_id)
+        return sorted(choices.items())
+
+    def count_votes(self, question_ids):
+        return sum(
+            tally['votes'] for question_id in question_ids for tally in compute_tallies(question_id)
+        )
+
+    def run(self, base_url, targets, mix, deadline, options):
+        workers, seed = options['workers'], options['seed']
+        if options['mode'] == 'asyncio':
+            return loadtest.run_async_workers(base_url, targets, mix, deadline, workers, seed)
+
+        executor_class = (
+            concurrent.futures.ProcessPoolExecutor if options['mode'] == 'processes'
+            else concurrent.futures.ThreadPoolExecutor
+        )
+        stats = loadtest.Stats()
+        with executor_class(max_workers=workers) as executor:
+            futures = [
+                executor.submit(
+                    loadtest.run_worker, base_url, targets, mix, deadline,
+                    None if seed is None else seed + i,
+                )
+                for i in range(workers)
+            ]
+            for future in concurrent.futures.as_completed(futures):
+                stats.merge(future.result())
+        return stats
+
+    def report(self, stats, elapsed, counted, in_process):
+        write = self.stdout.write
+        total, errors = stats.total_requests, stats.total_errors
+        write("")
+        write("{} requests in {:.1f}s: {:.1f} req/s, {} errors ({:.2%})".format(
+            total, elapsed, total / elapsed, errors, errors / total if total else 0,
+        ))
+        write("")
+        write("{:<8} {:>8} {:>7} {:>9} {:>9} {:>9}".format('kind', 'requests', 'errors', 'p50 ms', 'p90 ms', 'p99 ms'))
+        for kind in loadtest.KINDS:
+            if not stats.requests[kind]:
+                continue
+            write("{:<8} {:>8} {:>7} {:>9.1f} {:>9.1f} {:>9.1f}".format(
+                kind, stats.requests[kind], stats.errors[kind],
+                stats.percentile(kind, 0.5), stats.percentile(kind, 0.9), stats.percentile(kind, 0.99),
+            ))
+
+        for kind in loadtest.KINDS:
+            if not stats.requests[kind]:
+                continue
+            write("")
+            write("{} latency histogram:".format(kind))
+            for bound, count in stats.histogram(kind):
+                label = '< {} ms'.format(bound) if bound is not None else '>= {} ms'.format(loadtest.BUCKETS[-1])
+                write("  {:>11} {:>7}  {}".format(
+                    label, count, '#' * int(60 * count / stats.requests[kind])
+                ).rstrip())
+
+        successful = sum(stats.votes.values())
+        write("")
+        write("Votes: {} successful, {} counted, {} lost updates".format(successful, counted, successful - counted))
+        if not in_process:
+            write("(Vote counts are only meaningful if the server uses this database.)")
@@ -0,0 +1,45 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import reset_queries
+
+from polls.prerender import Prerenderer
+
+
+class Command(BaseCommand):
+    help = (
+        "Renders the index and the detail and results pages of published questions to static "
+        "files, skipping questions that haven't changed since the last run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output', default=settings.POLLS_PRERENDER_ROOT,
+            help="Directory to write to (default POLLS_PRERENDER_ROOT).",
+        )
+        parser.add_argument(
+            '--jobs', type=int, default=1,
+            help="Number of processes rendering in parallel (default 1, 0 for one per CPU).",
+        )
+        parser.add_argument('--force', action='store_true', help="Render every question, changed or not.")
+
+    def handle(self, *args, **options):
+        jobs = options['jobs'] or os.cpu_count()
+        if jobs < 0:
+            raise CommandError("--jobs must not be negative.")
+
+        start = time.time()
+        prerenderer = Prerenderer(options['output'], jobs=jobs, force=options['force'])
+        for _ in prerenderer.run():
+            reset_queries()
+            if options['verbosity'] >= 2:
+                self.stdout.write("{} of {} questions rendered ({:.0f}/s)".format(
+                    prerenderer.rendered, prerenderer.total, prerenderer.rendered / (time.time() - start),
+                ))
+        self.stdout.write(
+            "Rendered {} questions in {:.1f}s, {} unchanged, removed {}.".format(
+                prerenderer.rendered, time.time() - start, prerenderer.unchanged, prerenderer.removed,
+            )
+        )
@@ -0,0 +1,45 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from polls.profiling import hot_functions, load_profiles
+
+
+class Command(BaseCommand):
+    help = "Reports the hottest functions per URL name of the profiles written by ProfilerMiddleware."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'view_names', nargs='*', metavar='view_name',
+            help="URL names to report on, such as polls:index (default all).",
+        )
+        parser.add_argument(
+            '--directory', default=settings.POLLS_PROFILE_DIR,
+            help="Directory of the profiles (default POLLS_PROFILE_DIR).",
+        )
+        parser.add_argument(
+            '--sort', choices=['tottime', 'cumulative'], default='tottime',
+            help="Rank functions by their own time (the default) or their cumulative time.",
+        )
+        parser.add_argument('--limit', type=int, default=20, help="Functions per URL name (default 20).")
+
+    def handle(self, *args, **options):
+        try:
+            profiles = load_profiles(options['directory'])
+        except FileNotFoundError:
+            raise CommandError("No profiles in {}.".format(options['directory']))
+        view_names = options['view_names'] or sorted(profiles)
+        missing = [view_name for view_name in view_names if view_name not in profiles]
+        if missing:
+            raise CommandError("No profiles of {}.".format(', '.join(missing)))
+
+        for view_name in view_names:
+            stats, requests = profiles[view_name]
+            self.stdout.write("{} ({} requests, {:.1f}ms per request)".format(
+                view_name, requests, 1000 * stats.total_tt / requests,
+            ))
+            self.stdout.write("  {:>9} {:>9} {:>9}  {}".format('own ms', 'cum ms', 'calls', 'function'))
+            for description, calls, own, cumulative in hot_functions(stats, options['sort'], options['limit']):
+                self.stdout.write("  {:9.3f} {:9.3f} {:9.1f}  {}".format(
+                    1000 * own / requests, 1000 * cumulative / requests, calls / requests, description,
+                ))
+            self.stdout.write('')
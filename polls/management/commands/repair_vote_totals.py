@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+
+from polls.models import Question
+from polls.votes import repair_vote_totals
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes Question.total_votes from the choices and their counter shards, "
+        "a range of questions per transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=10000,
+            help="Questions per transaction (default 10000).",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError("--batch-size must be positive.")
+
+        highest = Question.objects.aggregate(highest=Max('pk'))['highest'] or 0
+        repaired = 0
+        for start in range(0, highest + 1, batch_size):
+            with transaction.atomic():
+                repaired += repair_vote_totals(
+                    Question.objects.filter(pk__gte=start, pk__lt=start + batch_size)
+                )
+        self.stdout.write("Recomputed the vote totals of {} questions.".format(repaired))
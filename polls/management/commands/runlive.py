@@ -0,0 +1,55 @@
+import asyncio
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from polls.live import LiveResultsServer
+
+
+def parse_address(value, default_host='127.0.0.1'):
+    host, _, port = value.rpartition(':')
+    return host or default_host, int(port)
+
+
+class Command(BaseCommand):
+    help = (
+        "Serves live poll results as server-sent events on /polls/<pk>/live/, pushing "
+        "changes as vote notifications arrive."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'addrport', nargs='?', default='127.0.0.1:8001',
+            help="Address and port to serve streams on (default 127.0.0.1:8001).",
+        )
+        parser.add_argument(
+            '--coalesce', type=float, default=0.25,
+            help="Seconds to collect vote notifications into one event (default 0.25).",
+        )
+        parser.add_argument(
+            '--heartbeat', type=float, default=15,
+            help="Seconds between keep-alive comments on idle streams (default 15).",
+        )
+
+    def handle(self, *args, **options):
+        if settings.POLLS_LIVE_NOTIFY_ADDRESS is None:
+            raise CommandError("Set POLLS_LIVE_NOTIFY_ADDRESS so that votes notify this server.")
+        try:
+            host, port = parse_address(options['addrport'])
+        except ValueError:
+            raise CommandError("{!r} is not a valid port or address:port.".format(options['addrport']))
+
+        loop = asyncio.get_event_loop()
+        live = LiveResultsServer(coalesce=options['coalesce'], heartbeat=options['heartbeat'], loop=loop)
+        server = loop.run_until_complete(live.start(host, port, settings.POLLS_LIVE_NOTIFY_ADDRESS))
+        self.stdout.write("Serving live results on http://{}:{}/ with notifications on {}:{}.".format(
+            host, port, *settings.POLLS_LIVE_NOTIFY_ADDRESS
+        ))
+        try:
+            loop.run_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            live.stop()
+            server.close()
+            loop.run_until_complete(server.wait_closed())
@@ -0,0 +1,82 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, reset_queries
+
+from polls.export import parse_bound
+from polls.models import Question
+from polls.seed import PollGenerator, seed_polls
+
+
+class Command(BaseCommand):
+    help = (
+        "Fills the database with synthetic questions and choices, with skewed "
+        "publication dates and vote counts. The same --seed and --now give the "
+        "same polls."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('questions', type=int, help="Number of questions to create.")
+        parser.add_argument(
+            '--choices', default='2-5',
+            help="Number of choices per question, or a range such as 2-5 (default 2-5).",
+        )
+        parser.add_argument(
+            '--votes', type=float, default=10,
+            help="Mean number of votes per question (default 10).",
+        )
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help="How far back publication dates go, in days (default 365).",
+        )
+        parser.add_argument('--seed', type=int, help="Seed for a repeatable dataset.")
+        parser.add_argument(
+            '--now',
+            help="ISO date or datetime that publication and vote dates are generated back from "
+                 "(default: the current time). Fix it along with --seed to repeat a dataset exactly.",
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help="Questions per bulk insert (default 1000).",
+        )
+        parser.add_argument(
+            '--transaction-size', type=int, default=10000,
+            help="Questions per transaction (default 10000).",
+        )
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help="Database to fill.")
+
+    def handle(self, *args, **options):
+        try:
+            min_choices, _, max_choices = options['choices'].partition('-')
+            min_choices = int(min_choices)
+            max_choices = int(max_choices or min_choices)
+        except ValueError:
+            raise CommandError("--choices must be a number or a range such as 2-5.")
+        if not 1 <= min_choices <= max_choices:
+            raise CommandError("--choices must be a positive number or range.")
+        if options['questions'] < 0 or options['batch_size'] < 1 or options['transaction_size'] < 1:
+            raise CommandError("The number of questions and the batch sizes must be positive.")
+        try:
+            now = parse_bound(options['now']) if options['now'] else None
+        except ValueError as e:
+            raise CommandError(e)
+
+        using = options['database']
+        generator = PollGenerator(
+            seed=options['seed'], days=options['days'], min_choices=min_choices,
+            max_choices=max_choices, mean_votes=options['votes'], now=now,
+        )
+        start = time.time()
+        progress = seed_polls(
+            options['questions'], generator,
+            batch_size=options['batch_size'],
+            transaction_size=options['transaction_size'],
+            start=Question.objects.using(using).count() + 1,
+            using=using,
+        )
+        for written in progress:
+            # Keep memory flat when DEBUG logs every insert.
+            reset_queries()
+            if options['verbosity'] >= 2:
+                self.stdout.write("{} questions ({:.0f}/s)".format(written, written / (time.time() - start)))
+        self.stdout.write("Created {} questions in {:.1f}s.".format(options['questions'], time.time() - start))
@@ -0,0 +1,246 @@
+"""
+Per-request timing of database queries and template rendering, served in
+the Prometheus text format.
+
+`MetricsMiddleware` records four histograms for every request, labelled
+with the URL name of its view: the total time, the time spent in database
+queries, the number of queries and the time spent rendering templates.
+
+Django 1.11 has neither ``connection.execute_wrapper()`` nor template
+rendering signals outside of tests. Queries are therefore timed by a
+wrapper around the cursors of every connection, installed when the
+connection is created, and templates by the `TimedDjangoTemplates`
+backend. Both only measure while a request is being recorded by the
+current thread.
+
+Histograms live in the process and are updated under a lock, so they are
+safe across the threads of a worker. Every worker process serves its own
+at ``/metrics``.
+"""
+import bisect
+import threading
+import time
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.template.backends.django import DjangoTemplates, Template
+
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+METRICS = (
+    ('polls_request_seconds', "Time spent handling requests.", DURATION_BUCKETS),
+    ('polls_request_db_seconds', "Time spent in database queries per request.", DURATION_BUCKETS),
+    ('polls_request_queries', "Database queries per request.", QUERY_BUCKETS),
+    ('polls_request_template_seconds', "Time spent rendering templates per request.", DURATION_BUCKETS),
+)
+
+# Label of requests that didn't resolve to a view.
+UNRESOLVED = 'unresolved'
+
+_local = threading.local()
+
+
+class Histogram(object):
+    """
+    Counts of observed values in cumulative buckets with upper bounds
+    `buckets`, plus their sum. Not thread-safe by itself.
+    """
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        # The last count is for values above every bound.
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def cumulative_counts(self):
+        total = 0
+        for count in self.counts:
+            total += count
+            yield total
+
+
+class Registry(object):
+    """
+    The histograms of every metric and view.
+    """
+
+    def __init__(self):
+        # (metric name, view name) -> Histogram
+        self.histograms = {}
+        self.lock = threading.Lock()
+
+    def observe(self, view_name, **values):
+        with self.lock:
+            for name, _, buckets in METRICS:
+                key = (name, view_name)
+                histogram = self.histograms.get(key)
+                if histogram is None:
+                    histogram = self.histograms[key] = Histogram(buckets)
+                histogram.observe(values[name])
+
+    def clear(self):
+        with self.lock:
+            self.histograms.clear()
+
+    def exposition(self):
+        """
+        Returns the histograms in the Prometheus text exposition format.
+        """
+        lines = []
+        with self.lock:
+            for name, description, buckets in METRICS:
+                lines.append('# HELP {} {}'.format(name, description))
+                lines.append('# TYPE {} histogram'.format(name))
+                for (metric, view_name), histogram in sorted(self.histograms.items()):
+                    if metric != name:
+                        continue
+                    label = 'view="{}"'.format(view_name.replace('\\', '\\\\').replace('"', '\\"'))
+                    bounds = [repr(float(bound)) for bound in buckets] + ['+Inf']
+                    for bound, count in zip(bounds, histogram.cumulative_counts()):
+                        lines.append('{}_bucket{{{},le="{}"}} {}'.format(name, label, bound, count))
+                    lines.append('{}_sum{{{}}} {!r}'.format(name, label, float(histogram.sum)))
+                    lines.append('{}_count{{{}}} {}'.format(name, label, sum(histogram.counts)))
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+class Recorder(object):
+    """
+    Database and template time of the request being handled by a thread.
+    """
+
+    def __init__(self):
+        self.db_seconds = 0
+        self.queries = 0
+        self.template_seconds = 0
+        self.rendering = False
+
+
+def current_recorder():
+    return getattr(_local, 'recorder', None)
+
+
+class TimedCursor(object):
+    """
+    Wraps a Django cursor wrapper to add the time of its queries to the
+    current recorder.
+    """
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+    def __getattr__(self, attr):
+        return getattr(self.cursor, attr)
+
+    def __iter__(self):
+        return iter(self.cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        return self.cursor.__exit__(type, value, traceback)
+
+    def _timed(self, method, *args):
+        recorder = current_recorder()
+        if recorder is None:
+            return method(*args)
+        start = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            recorder.db_seconds += time.perf_counter() - start
+            recorder.queries += 1
+
+    def execute(self, sql, params=None):
+        return self._timed(self.cursor.execute, sql, params)
+
+    def executemany(self, sql, param_list):
+        return self._timed(self.cursor.executemany, sql, param_list)
+
+    def callproc(self, procname, params=None):
+        return self._timed(self.cursor.callproc, procname, params)
+
+
+def time_queries(sender, connection, **kwargs):
+    """
+    Makes the cursors of a new connection time their queries.
+    """
+    if getattr(connection, 'queries_timed', False):
+        return
+    for attr in ('make_cursor', 'make_debug_cursor'):
+        make = getattr(connection, attr)
+        setattr(connection, attr, lambda cursor, make=make: TimedCursor(make(cursor)))
+    connection.queries_timed = True
+
+
+class TimedTemplate(Template):
+
+    def render(self, context=None, request=None):
+        recorder = current_recorder()
+        # Templates rendered while rendering another are already timed.
+        if recorder is None or recorder.rendering:
+            return super().render(context, request)
+        recorder.rendering = True
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            recorder.template_seconds += time.perf_counter() - start
+            recorder.rendering = False
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """
+    The Django template backend, timing how long templates take to render.
+    """
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code).template, self)
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name).template, self)
+
+
+class MetricsMiddleware(object):
+    """
+    Records the timing histograms of every request. Must come before any
+    middleware that queries the database for its time to be counted.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = _local.recorder = Recorder()
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            duration = time.perf_counter() - start
+            _local.recorder = None
+            match = getattr(request, 'resolver_match', None)
+            registry.observe(
+                match.view_name if match is not None else UNRESOLVED,
+                polls_request_seconds=duration,
+                polls_request_db_seconds=recorder.db_seconds,
+                polls_request_queries=recorder.queries,
+                polls_request_template_seconds=recorder.template_seconds,
+            )
+        return response
+
+
+def metrics(request):
+    """
+    Serves the histograms of this process to clients in ``INTERNAL_IPS``.
+    """
+    if request.META.get('REMOTE_ADDR') not in settings.INTERNAL_IPS:
+        return HttpResponseForbidden()
+    return HttpResponse(registry.exposition(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11 on 2026-10-16 23:27
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChoiceShard',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.PositiveSmallIntegerField()),
+                ('votes', models.IntegerField(default=0)),
+                ('choice', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='polls.Choice')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='vote_shards',
+            field=models.PositiveSmallIntegerField(default=0, help_text='Spread votes over this many counter rows per choice to avoid lock contention on hot polls (0 disables sharding).'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='choiceshard',
+            unique_together=set([('choice', 'shard')]),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+# Full-text index over question and choice texts, one row per question. See
+# polls.search for how it is queried and kept up to date.
+CREATE_SQL = {
+    'sqlite': [
+        "CREATE VIRTUAL TABLE polls_question_fts USING fts5(question_text, choice_text)",
+        "INSERT INTO polls_question_fts(rowid, question_text, choice_text) "
+        "SELECT q.id, q.question_text, COALESCE(GROUP_CONCAT(c.choice_text, ' '), '') "
+        "FROM polls_question q LEFT JOIN polls_choice c ON c.question_id = q.id "
+        "GROUP BY q.id",
+    ],
+    'postgresql': [
+        "CREATE TABLE polls_question_search ("
+        "question_id integer PRIMARY KEY REFERENCES polls_question(id) ON DELETE CASCADE, "
+        "document tsvector NOT NULL)",
+        "CREATE INDEX polls_question_search_document ON polls_question_search USING GIN (document)",
+        "INSERT INTO polls_question_search(question_id, document) "
+        "SELECT q.id, setweight(to_tsvector('english', q.question_text), 'A') || "
+        "setweight(to_tsvector('english', COALESCE(string_agg(c.choice_text, ' '), '')), 'B') "
+        "FROM polls_question q LEFT JOIN polls_choice c ON c.question_id = q.id "
+        "GROUP BY q.id",
+    ],
+}
+
+DROP_SQL = {
+    'sqlite': ["DROP TABLE polls_question_fts"],
+    'postgresql': ["DROP TABLE polls_question_search"],
+}
+
+
+def run_for_vendor(statements):
+    def run(apps, schema_editor):
+        for sql in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0004_question_last_modified'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_for_vendor(CREATE_SQL), run_for_vendor(DROP_SQL)),
+    ]
@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11 on 2026-10-16 23:34
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+from polls.operations import AddIndex
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0005_question_search_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='question',
+            name='pub_date',
+            field=models.DateTimeField(verbose_name='date published'),
+        ),
+        AddIndex(
+            model_name='question',
+            index=models.Index(fields=['pub_date', 'id'], name='polls_quest_pub_dat_306bbb_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11 on 2026-10-16 23:57
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+from django.db.models import IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def count_votes(apps, schema_editor):
+    Question = apps.get_model('polls', 'Question')
+    Choice = apps.get_model('polls', 'Choice')
+    ChoiceShard = apps.get_model('polls', 'ChoiceShard')
+    choice_votes = Choice.objects.filter(question=OuterRef('pk')).order_by().values('question')
+    shard_votes = ChoiceShard.objects.filter(choice__question=OuterRef('pk')).order_by().values('choice__question')
+    Question.objects.using(schema_editor.connection.alias).update(total_votes=(
+        Coalesce(Subquery(choice_votes.annotate(total=Sum('votes')).values('total'), output_field=IntegerField()), 0) +
+        Coalesce(Subquery(shard_votes.annotate(total=Sum('votes')).values('total'), output_field=IntegerField()), 0)
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0006_question_pub_date_id_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='last_voted_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='total_votes',
+            field=models.PositiveIntegerField(default=0, help_text='Votes over all choices, kept up to date as votes are recorded.'),
+        ),
+        migrations.RunPython(count_votes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11 on 2026-10-17 00:26
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+from polls.operations import AddIndex
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0009_importcheckpoint'),
+    ]
+
+    operations = [
+        AddIndex(
+            model_name='question',
+            index=models.Index(fields=['last_voted_at'], name='polls_quest_last_vo_58918e_idx'),
+        ),
+    ]
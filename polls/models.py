@@ -1,12 +1,37 @@
 import datetime
 
 from django.db import models
+from django.db.models import Sum
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 
 
 class Question(models.Model):
     question_text = models.CharField(max_length=200)
     pub_date = models.DateTimeField('date published')
+    last_modified = models.DateTimeField(
+        auto_now=True,
+        help_text="Bumped whenever the question, its choices or its votes change.",
+    )
+    total_votes = models.PositiveIntegerField(
+        default=0,
+        help_text="Votes over all choices, kept up to date as votes are recorded.",
+    )
+    last_voted_at = models.DateTimeField(null=True, blank=True, editable=False)
+    vote_shards = models.PositiveSmallIntegerField(
+        default=0,
+        help_text="Spread votes over this many counter rows per choice to "
+                  "avoid lock contention on hot polls (0 disables sharding).",
+    )
+
+    class Meta:
+        indexes = [
+            # Serves both the pub_date filters and keyset pagination.
+            models.Index(fields=['pub_date', 'id']),
+            # Finds the questions voted on recently for the trending view,
+            # which are few enough to rank by total_votes without an index.
+            models.Index(fields=['last_voted_at']),
+        ]
 
     def was_published_recently(self):
         now = timezone.now()
@@ -19,10 +44,71 @@ class Question(models.Model):
         return self.question_text
 
 
+class ChoiceQuerySet(models.QuerySet):
+
+    def with_shard_votes(self):
+        """
+        Annotates each choice with the votes still held in its counter shards.
+        """
+        return self.annotate(shard_votes=Coalesce(Sum('choiceshard__votes'), 0))
+
+
 class Choice(models.Model):
     question = models.ForeignKey(Question, on_delete=models.CASCADE)
     choice_text = models.CharField(max_length=200)
     votes = models.IntegerField(default=0)
 
+    objects = ChoiceQuerySet.as_manager()
+
     def __str__(self):
         return self.choice_text
+
+    @property
+    def total_votes(self):
+        """
+        Votes including those not yet compacted from the counter shards.
+        """
+        shard_votes = getattr(self, 'shard_votes', None)
+        if shard_votes is None:
+            shard_votes = self.choiceshard_set.aggregate(total=Coalesce(Sum('votes'), 0))['total']
+        return self.votes + shard_votes
+
+
+class ChoiceShard(models.Model):
+    """
+    One of `Question.vote_shards` counters for a choice. Votes are added to
+    a random shard and periodically folded back into `Choice.votes`.
+    """
+    choice = models.ForeignKey(Choice, on_delete=models.CASCADE)
+    shard = models.PositiveSmallIntegerField()
+    votes = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('choice', 'shard')
+
+
+class Ballot(models.Model):
+    """
+    Ledger entry recording that a voter has voted on a question, kept when
+    ``POLLS_ONE_VOTE_PER_VOTER`` is enabled. `voter_key` is a keyed hash of
+    the voter's session, user or IP address, never the identity itself.
+    """
+    question = models.ForeignKey(Question, on_delete=models.CASCADE)
+    choice = models.ForeignKey(Choice, on_delete=models.CASCADE)
+    voter_key = models.CharField(max_length=40)
+    cast_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        unique_together = ('question', 'voter_key')
+
+
+class ImportCheckpoint(models.Model):
+    """
+    How far an `import_polls` run got: the byte offset and line to resume
+    reading its file from. Saved in the transaction of each batch, so it
+    never disagrees with what was committed.
+    """
+    name = models.CharField(max_length=255, unique=True)
+    offset = models.BigIntegerField()
+    line = models.PositiveIntegerField()
+    updated_at = models.DateTimeField(auto_now=True)
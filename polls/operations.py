@@ -0,0 +1,20 @@
+"""
+Migration operations.
+"""
+from django.db import migrations
+
+
+class AddIndex(migrations.AddIndex):
+    """
+    `migrations.AddIndex` that leaves the indexes of earlier migration
+    states alone.
+
+    Django 1.11.0 appends the index to a list shared with those states, so
+    unapplying any earlier operation that remakes the SQLite table creates
+    the index a second time and fails.
+    """
+
+    def state_forwards(self, app_label, state):
+        model_state = state.models[app_label, self.model_name_lower]
+        model_state.options[self.option_name] = model_state.options[self.option_name] + [self.index.clone()]
+        state.reload_model(app_label, self.model_name_lower, delay=True)
@@ -0,0 +1,113 @@
+"""
+Pagination that stays cheap on large tables.
+"""
+import base64
+import binascii
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+
+def estimate_count(model, using='default'):
+    """
+    Returns the database's cheap estimate of the number of rows in the
+    table of `model`, or None if the database can't provide one.
+    """
+    connection = connections[using]
+    table = connection.ops.quote_name(model._meta.db_table)
+    if connection.vendor == 'postgresql':
+        sql = "SELECT reltuples::bigint FROM pg_class WHERE oid = '{}'::regclass".format(table)
+    elif connection.vendor == 'sqlite':
+        # Rowids are only ever reused after deletes, so this overestimates
+        # tables that had rows deleted.
+        sql = "SELECT MAX(rowid) FROM {}".format(table)
+    else:
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(sql)
+        row = cursor.fetchone()
+    return row[0] if row and row[0] is not None else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that counts unfiltered querysets with the database's estimate
+    once that is above ``POLLS_ADMIN_ESTIMATED_COUNT_THRESHOLD`` rows, and
+    otherwise counts exactly, ignoring any annotations.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimate_count(queryset.model, queryset.db)
+            if estimate is not None and estimate > settings.POLLS_ADMIN_ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+        return queryset.values('pk').order_by().count()
+
+
+def encode_cursor(question):
+    """
+    Returns an opaque token for the position of `question` in the
+    (pub_date, id) ordering.
+    """
+    value = '{}|{}'.format(question.pub_date.isoformat(), question.pk)
+    return base64.urlsafe_b64encode(value.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """
+    Returns the (pub_date, id) position encoded in `token`, raising
+    ValueError if it isn't a valid cursor.
+    """
+    try:
+        value = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode()
+        pub_date, pk = value.split('|')
+        pub_date = parse_datetime(pub_date)
+        pk = int(pk)
+    except (TypeError, ValueError, binascii.Error, UnicodeDecodeError):
+        raise ValueError("Invalid cursor: {!r}".format(token))
+    if pub_date is None:
+        raise ValueError("Invalid cursor: {!r}".format(token))
+    return pub_date, pk
+
+
+class KeysetPage(object):
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+
+def keyset_page(queryset, size, after=None, before=None):
+    """
+    Returns a page of `size` questions from `queryset`, newest first by
+    (pub_date, id), that follows the `after` position or precedes the
+    `before` position. Each page is a single range scan over the
+    (pub_date, id) index, however deep it is.
+    """
+    if before is not None:
+        pub_date, pk = before
+        rows = list(queryset.filter(
+            Q(pub_date__gt=pub_date) | Q(pub_date=pub_date, pk__gt=pk)
+        ).order_by('pub_date', 'pk')[:size + 1])
+        has_previous, has_next = len(rows) > size, True
+        rows = rows[:size][::-1]
+    else:
+        queryset = queryset.order_by('-pub_date', '-pk')
+        if after is not None:
+            pub_date, pk = after
+            queryset = queryset.filter(Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, pk__lt=pk))
+        rows = list(queryset[:size + 1])
+        has_previous, has_next = after is not None, len(rows) > size
+        rows = rows[:size]
+    return KeysetPage(
+        rows,
+        next_cursor=encode_cursor(rows[-1]) if rows and has_next else None,
+        previous_cursor=encode_cursor(rows[0]) if rows and has_previous else None,
+    )
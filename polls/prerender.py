@@ -0,0 +1,191 @@
+"""
+Static snapshots of the published polls, for the front-end server to serve
+without going through Django.
+
+The index and the detail and results pages of every published question
+are rendered by their views and written to an output directory, each at
+its URL path plus ``index.html``. A manifest records the `last_modified`
+marker each question was rendered at. Later runs only render the
+questions that changed since, and remove the pages of questions that
+were deleted or unpublished.
+
+Detail pages can't carry a CSRF token for every visitor, so their form
+takes it from the ``polls:csrf_token`` view through an SSI include.
+"""
+import json
+import multiprocessing
+import os
+
+from django.db import connections, reset_queries
+from django.http import Http404
+from django.test import RequestFactory
+from django.urls import reverse
+from django.utils import timezone
+
+from .export import iterate_chunked
+from .models import Question
+from .views import CSRF_PLACEHOLDER, DetailView, IndexView, ResultsView
+
+MANIFEST_NAME = 'manifest.json'
+
+# Questions rendered per task handed to a worker process.
+CHUNK_SIZE = 100
+
+
+def page_path(directory, url):
+    return os.path.join(directory, url.lstrip('/'), 'index.html')
+
+
+def write_file(path, content):
+    """
+    Writes `content` to `path`, replacing any previous file atomically so
+    that the front-end server never serves a partly written file.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary_path = path + '.tmp'
+    with open(temporary_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(temporary_path, path)
+
+
+def remove_page(directory, url):
+    """
+    Removes the page at `url` and the directories it leaves empty.
+    """
+    path = page_path(directory, url)
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    try:
+        os.removedirs(os.path.dirname(path))
+    except OSError:
+        # Not empty, or up to the output directory itself.
+        pass
+
+
+def question_urls(question_id):
+    return [reverse('polls:detail', args=(question_id,)), reverse('polls:results', args=(question_id,))]
+
+
+def render_view(view, url, **kwargs):
+    response = view(RequestFactory().get(url), **kwargs)
+    return response.render().content.decode(response.charset)
+
+
+def render_index():
+    url = reverse('polls:index')
+    return {url: render_view(IndexView.as_view(), url)}
+
+
+def render_question(question_id):
+    """
+    Returns the detail and results pages of a question by URL, or None if
+    it isn't published (any more).
+    """
+    detail_url = reverse('polls:detail', args=(question_id,))
+    results_url = reverse('polls:results', args=(question_id,))
+    include = '<!--# include virtual="{}" -->'.format(reverse('polls:csrf_token'))
+    try:
+        view = DetailView(request=RequestFactory().get(detail_url), args=(), kwargs={'pk': question_id})
+        return {
+            detail_url: view.render_shared_page().replace(CSRF_PLACEHOLDER, include),
+            results_url: render_view(ResultsView.as_view(), results_url, pk=question_id),
+        }
+    except Http404:
+        return None
+
+
+def render_questions(directory, question_ids):
+    """
+    Renders the pages of `question_ids` into `directory`, removing those
+    of questions that were unpublished in the meantime. Returns the ids of
+    the questions rendered.
+    """
+    rendered = []
+    for question_id in question_ids:
+        pages = render_question(question_id)
+        if pages is None:
+            for url in question_urls(question_id):
+                remove_page(directory, url)
+        else:
+            for url, content in pages.items():
+                write_file(page_path(directory, url), content)
+            rendered.append(question_id)
+        reset_queries()
+    return rendered
+
+
+class Prerenderer(object):
+    """
+    Brings the pages in `directory` up to date with the published
+    questions, rendering with `jobs` processes. `force` renders all
+    questions, changed or not.
+
+    `run()` yields after every chunk of questions rendered.
+    """
+
+    def __init__(self, directory, jobs=1, force=False):
+        self.directory = directory
+        self.jobs = jobs
+        self.force = force
+        self.manifest_path = os.path.join(directory, MANIFEST_NAME)
+        self.total = self.rendered = self.unchanged = self.removed = 0
+
+    def read_manifest(self):
+        try:
+            with open(self.manifest_path) as f:
+                return json.load(f)['questions']
+        except FileNotFoundError:
+            return {}
+
+    def write_manifest(self, questions):
+        write_file(self.manifest_path, json.dumps({'questions': questions}))
+
+    def run(self):
+        previous = self.read_manifest()
+        current = {
+            str(pk): last_modified.isoformat()
+            for pk, last_modified in iterate_chunked(
+                Question.objects.filter(pub_date__lte=timezone.now()).values_list('pk', 'last_modified')
+            )
+        }
+        changed = sorted(int(pk) for pk, last_modified in current.items()
+                         if self.force or previous.get(pk) != last_modified)
+        self.total = len(changed)
+        self.unchanged = len(current) - len(changed)
+
+        for pk in set(previous) - set(current):
+            for url in question_urls(pk):
+                remove_page(self.directory, url)
+            self.removed += 1
+
+        for url, content in render_index().items():
+            write_file(page_path(self.directory, url), content)
+
+        manifest = {pk: last_modified for pk, last_modified in previous.items() if pk in current}
+        for rendered in self.render(changed):
+            for pk in rendered:
+                manifest[str(pk)] = current[str(pk)]
+            self.rendered += len(rendered)
+            yield
+        self.write_manifest(manifest)
+
+    def render(self, question_ids):
+        """
+        Yields the ids rendered of every chunk of `question_ids`.
+        """
+        chunks = [question_ids[i:i + CHUNK_SIZE] for i in range(0, len(question_ids), CHUNK_SIZE)]
+        if self.jobs == 1 or len(chunks) < 2:
+            for chunk in chunks:
+                yield render_questions(self.directory, chunk)
+            return
+        # Forked workers must not share the parent's database connections.
+        connections.close_all()
+        with multiprocessing.Pool(self.jobs) as pool:
+            for rendered in pool.imap_unordered(_render_questions, [(self.directory, chunk) for chunk in chunks]):
+                yield rendered
+
+
+def _render_questions(args):
+    return render_questions(*args)
@@ -0,0 +1,138 @@
+"""
+Profiling of sampled production requests.
+
+`ProfilerMiddleware` runs a fraction ``POLLS_PROFILE_RATE`` of requests,
+and any request with a valid ``X-Polls-Profile`` header, under cProfile.
+It writes each profile to a directory per URL name under
+``POLLS_PROFILE_DIR``, keeping the ``POLLS_PROFILE_MAX_FILES`` most
+recent. ``manage.py profile_report`` merges them into a ranked report of
+hot functions per URL name.
+
+Requests that aren't profiled only cost a random number and a dict
+lookup.
+"""
+import cProfile
+import os
+import pstats
+import random
+import sys
+import time
+
+from django.conf import settings
+from django.core import signing
+
+HEADER = 'HTTP_X_POLLS_PROFILE'
+SALT = 'polls.profiling'
+
+# Profiles of requests that didn't resolve to a view.
+UNRESOLVED = 'unresolved'
+
+
+def make_token():
+    """
+    Returns a value for the ``X-Polls-Profile`` header, valid for
+    ``POLLS_PROFILE_TOKEN_MAX_AGE`` seconds.
+    """
+    return signing.TimestampSigner(salt=SALT).sign('profile')
+
+
+def valid_token(token):
+    try:
+        signing.TimestampSigner(salt=SALT).unsign(token, max_age=settings.POLLS_PROFILE_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return False
+    return True
+
+
+def rotate(directory, max_files):
+    """
+    Removes the oldest profiles in `directory` beyond `max_files`.
+    """
+    paths = [
+        os.path.join(root, name)
+        for root, _, names in os.walk(directory) for name in names if name.endswith('.prof')
+    ]
+    if len(paths) <= max_files:
+        return
+    paths.sort(key=os.path.getmtime)
+    for path in paths[:len(paths) - max_files]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            # Rotated away by another process.
+            pass
+
+
+class ProfilerMiddleware(object):
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        rate = settings.POLLS_PROFILE_RATE
+        if not (rate and random.random() < rate) and not (
+            HEADER in request.META and valid_token(request.META[HEADER])
+        ):
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        response = profiler.runcall(self.get_response, request)
+        match = getattr(request, 'resolver_match', None)
+        self.save(profiler, match.view_name if match is not None else UNRESOLVED)
+        return response
+
+    def save(self, profiler, view_name):
+        directory = os.path.join(settings.POLLS_PROFILE_DIR, view_name)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, '{:.6f}-{}.prof'.format(time.time(), os.getpid()))
+        # Written under a temporary name so that reports never read a
+        # partial profile.
+        profiler.dump_stats(path + '.tmp')
+        os.replace(path + '.tmp', path)
+        rotate(settings.POLLS_PROFILE_DIR, settings.POLLS_PROFILE_MAX_FILES)
+
+
+def load_profiles(directory):
+    """
+    Returns a dict of URL name to the merged `pstats.Stats` of its profiles
+    in `directory` and their number.
+    """
+    profiles = {}
+    for view_name in sorted(os.listdir(directory)):
+        view_directory = os.path.join(directory, view_name)
+        if not os.path.isdir(view_directory):
+            continue
+        paths = [
+            os.path.join(view_directory, name)
+            for name in os.listdir(view_directory) if name.endswith('.prof')
+        ]
+        if paths:
+            profiles[view_name] = (pstats.Stats(*paths), len(paths))
+    return profiles
+
+
+def describe(function):
+    """
+    Returns ``path:line(name)`` for a profiled function, with the path
+    relative to the entry of ``sys.path`` it was found under.
+    """
+    filename, line, name = function
+    for entry in sorted(sys.path, key=len, reverse=True):
+        if entry and filename.startswith(entry + os.sep):
+            filename = filename[len(entry) + 1:]
+            break
+    if filename == '~':
+        # Built-in functions.
+        return name
+    return '{}:{}({})'.format(filename, line, name)
+
+
+def hot_functions(stats, sort='tottime', limit=20):
+    """
+    Returns the `limit` functions with the highest `sort` time (own time,
+    or cumulative) as (description, calls, own seconds, cumulative seconds)
+    tuples.
+    """
+    index = {'tottime': 2, 'cumulative': 3}[sort]
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][index], reverse=True)[:limit]
+    return [(describe(function), calls, own, cumulative) for function, (_, calls, own, cumulative, _) in rows]
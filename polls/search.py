@@ -0,0 +1,118 @@
+"""
+Full-text search over question and choice texts.
+
+Backed by an FTS5 table on SQLite and a tsvector table with a GIN index on
+PostgreSQL (see migration 0005), kept up to date by `index_question()`.
+Other databases fall back to ``icontains`` lookups.
+"""
+import re
+
+from django.db import connections
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Question
+
+# Statements rebuilding the index entries of the questions with ids in a
+# range (bounds inclusive).
+INDEX_SQL = {
+    'sqlite': [
+        "DELETE FROM polls_question_fts WHERE rowid BETWEEN %s AND %s",
+        "INSERT INTO polls_question_fts(rowid, question_text, choice_text) "
+        "SELECT q.id, q.question_text, COALESCE(GROUP_CONCAT(c.choice_text, ' '), '') "
+        "FROM polls_question q LEFT JOIN polls_choice c ON c.question_id = q.id "
+        "WHERE q.id BETWEEN %s AND %s GROUP BY q.id",
+    ],
+    'postgresql': [
+        "DELETE FROM polls_question_search WHERE question_id BETWEEN %s AND %s",
+        "INSERT INTO polls_question_search(question_id, document) "
+        "SELECT q.id, setweight(to_tsvector('english', q.question_text), 'A') || "
+        "setweight(to_tsvector('english', COALESCE(string_agg(c.choice_text, ' '), '')), 'B') "
+        "FROM polls_question q LEFT JOIN polls_choice c ON c.question_id = q.id "
+        "WHERE q.id BETWEEN %s AND %s GROUP BY q.id",
+    ],
+}
+
+
+def index_questions(first_id, last_id, using='default'):
+    """
+    Rebuilds the search index entries of the questions with ids from
+    `first_id` to `last_id`, dropping those of deleted questions.
+    """
+    connection = connections[using]
+    statements = INDEX_SQL.get(connection.vendor)
+    if statements is None:
+        return
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql, [first_id, last_id])
+
+
+def index_question(question_id, using='default'):
+    """
+    Rebuilds the search index entry of a question, dropping it if the
+    question no longer exists.
+    """
+    index_questions(question_id, question_id, using=using)
+
+
+def fts5_query(term):
+    """
+    Turns free text into an FTS5 query matching every word as a prefix.
+    """
+    words = re.findall(r'\w+', term)
+    return ' '.join('"{}"*'.format(word) for word in words)
+
+
+def filter_questions(queryset, term):
+    """
+    Restricts `queryset` to questions matching `term`, without ordering by
+    relevance.
+    """
+    vendor = connections[queryset.db].vendor
+    if vendor == 'sqlite':
+        query = fts5_query(term)
+        if not query:
+            return queryset.none()
+        return queryset.extra(
+            where=["polls_question.id IN "
+                   "(SELECT rowid FROM polls_question_fts WHERE polls_question_fts MATCH %s)"],
+            params=[query],
+        )
+    if vendor == 'postgresql':
+        return queryset.extra(
+            where=["polls_question.id IN (SELECT question_id FROM polls_question_search "
+                   "WHERE document @@ plainto_tsquery('english', %s))"],
+            params=[term],
+        )
+    return queryset.filter(Q(question_text__icontains=term) | Q(choice__choice_text__icontains=term)).distinct()
+
+
+def search(term):
+    """
+    Returns the published questions matching `term`, best matches first.
+    """
+    queryset = Question.objects.filter(pub_date__lte=timezone.now())
+    vendor = connections[queryset.db].vendor
+    if vendor == 'sqlite':
+        query = fts5_query(term)
+        if not query:
+            return queryset.none()
+        return queryset.extra(
+            select={'rank': "bm25(polls_question_fts, 10.0, 1.0)"},
+            tables=['polls_question_fts'],
+            where=["polls_question_fts.rowid = polls_question.id", "polls_question_fts MATCH %s"],
+            params=[query],
+            order_by=['rank'],
+        )
+    if vendor == 'postgresql':
+        return queryset.extra(
+            select={'rank': "ts_rank(polls_question_search.document, plainto_tsquery('english', %s))"},
+            select_params=[term],
+            tables=['polls_question_search'],
+            where=["polls_question_search.question_id = polls_question.id",
+                   "polls_question_search.document @@ plainto_tsquery('english', %s)"],
+            params=[term],
+            order_by=['-rank'],
+        )
+    return filter_questions(queryset, term).order_by('-pub_date')
@@ -0,0 +1,113 @@
+"""
+Generating synthetic polls.
+
+Questions and choices are generated lazily and written with ``bulk_create``
+one batch at a time, so memory use does not grow with the number of rows.
+The same seed and `now` always produce the same polls.
+
+Publication dates are skewed towards the present, with a small share of
+questions scheduled in the future, and votes follow a long tail: most
+questions get a handful of votes, a few get most of them, and earlier
+choices tend to be more popular than later ones.
+"""
+import datetime
+import itertools
+import random
+
+from django.db import transaction
+from django.utils import timezone
+
+from .bulk import bulk_create_polls
+from .cache import invalidate_index
+from .models import Choice, Question
+
+WORDS = (
+    'apple', 'bicycle', 'coffee', 'django', 'election', 'festival', 'garden', 'holiday',
+    'island', 'jazz', 'kitchen', 'library', 'mountain', 'novel', 'ocean', 'python',
+    'queue', 'river', 'summer', 'theatre', 'umbrella', 'village', 'winter', 'yoga',
+)
+
+# Share of questions with a publication date in the future.
+FUTURE_FRACTION = 0.01
+
+# Shape of the Pareto distribution of votes per question; about 1.16 puts
+# 80% of the votes on 20% of the questions.
+VOTE_SKEW = 1.16
+
+
+class PollGenerator(object):
+    """
+    Generates unsaved questions and their choices from a seeded random
+    number generator.
+    """
+
+    def __init__(self, seed=None, days=365, min_choices=2, max_choices=5, mean_votes=10, now=None):
+        self.random = random.Random(seed)
+        self.days = days
+        self.min_choices = min_choices
+        self.max_choices = max_choices
+        self.mean_votes = mean_votes
+        self.now = now or timezone.now()
+
+    def pub_date(self):
+        if self.random.random() < FUTURE_FRACTION:
+            age = -self.random.uniform(0, 30)
+        else:
+            # Exponentially fewer questions the further back in time.
+            age = min(self.random.expovariate(5.0 / self.days), self.days)
+        return self.now - datetime.timedelta(days=age)
+
+    def text(self, number):
+        return "Poll {}: {} or {}?".format(number, *self.random.sample(WORDS, 2))
+
+    def question(self, number):
+        """
+        Returns an unsaved question with its unsaved choices in
+        `new_choices`.
+        """
+        question = Question(question_text=self.text(number), pub_date=self.pub_date())
+        question.new_choices = self.choices(question)
+        if any(choice.votes for choice in question.new_choices):
+            # Some time between publication and now.
+            question.last_voted_at = question.pub_date + self.random.random() * (self.now - question.pub_date)
+        return question
+
+    def choices(self, question):
+        count = self.random.randint(self.min_choices, self.max_choices)
+        # Scale the Pareto distribution (mean VOTE_SKEW / (VOTE_SKEW - 1))
+        # to the requested mean.
+        votes = self.mean_votes * (VOTE_SKEW - 1) / VOTE_SKEW * self.random.paretovariate(VOTE_SKEW)
+        if question.pub_date > self.now:
+            votes = 0
+        weights = [self.random.random() / (rank + 1) for rank in range(count)]
+        total = sum(weights)
+        return [
+            Choice(
+                choice_text=self.random.choice(WORDS).capitalize(),
+                votes=int(votes * weight / total),
+            )
+            for weight in weights
+        ]
+
+
+def seed_polls(count, generator, batch_size=1000, transaction_size=10000, start=1, using='default'):
+    """
+    Inserts `count` questions from `generator` with their choices, in
+    batches of `batch_size` questions committed every `transaction_size`
+    questions, and indexes them for search.
+
+    Yields the number of questions written after each transaction.
+    """
+    numbers = iter(range(start, start + count))
+    written = 0
+    while written < count:
+        with transaction.atomic(using=using):
+            chunk = itertools.islice(numbers, transaction_size)
+            while True:
+                batch = [generator.question(number) for number in itertools.islice(chunk, batch_size)]
+                if not batch:
+                    break
+                bulk_create_polls(batch, using=using)
+                written += len(batch)
+        yield written
+    invalidate_index()
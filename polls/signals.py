@@ -0,0 +1,44 @@
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import (
+    invalidate_detail_page, invalidate_index, invalidate_last_modified, invalidate_results,
+    set_last_modified, set_pub_date,
+)
+from .db import apply_sqlite_pragmas
+from .metrics import time_queries
+from .models import Choice, Question
+from .search import index_question
+from .votes import repair_vote_totals, touch_questions
+
+connection_created.connect(apply_sqlite_pragmas)
+connection_created.connect(time_queries)
+
+
+@receiver(post_save, sender=Question)
+def question_saved(sender, instance, using, **kwargs):
+    invalidate_index()
+    invalidate_detail_page(instance.pk)
+    set_last_modified(instance.last_modified, instance.pk)
+    set_pub_date(instance.pub_date, instance.pk)
+    index_question(instance.pk, using=using)
+
+
+@receiver(post_delete, sender=Question)
+def question_deleted(sender, instance, using, **kwargs):
+    invalidate_index()
+    invalidate_detail_page(instance.pk)
+    invalidate_last_modified(instance.pk)
+    index_question(instance.pk, using=using)
+
+
+@receiver([post_save, post_delete], sender=Choice)
+def choice_changed(sender, instance, using, **kwargs):
+    # Choices saved or deleted outside the vote paths (the admin, fixtures)
+    # may change the question's total.
+    repair_vote_totals(Question.objects.filter(pk=instance.question_id))
+    touch_questions(instance.question_id)
+    invalidate_results(instance.question_id)
+    invalidate_detail_page(instance.question_id)
+    index_question(instance.question_id, using=using)
@@ -1,5 +1,7 @@
 import datetime
 
+from django.core.cache import cache
+from django.db import connection
 from django.utils import timezone
 from django.test import TestCase, RequestFactory
 
@@ -12,6 +14,7 @@ class BaseTestCase(TestCase):
         super().setUp()
 
         self.request_factory = RequestFactory()
+        cache.clear()
 
     def create_question(self, question_text, days):
         """
@@ -21,3 +24,12 @@ class BaseTestCase(TestCase):
         """
         time = timezone.now() + datetime.timedelta(days=days)
         return Question.objects.create(question_text=question_text, pub_date=time)
+
+    def run_commit_hooks(self):
+        """
+        Runs the transaction.on_commit() callbacks registered so far, which
+        are otherwise dropped as TestCase never commits.
+        """
+        callbacks, connection.run_on_commit = connection.run_on_commit, []
+        for savepoint_ids, callback in callbacks:
+            callback()
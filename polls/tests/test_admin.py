@@ -0,0 +1,84 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from polls.models import Choice, Question
+from polls.pagination import EstimatedCountPaginator
+from polls.tests import base
+
+
+class QuestionAdminTests(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.login(username='admin', password='password')
+
+    def create_questions(self, count):
+        for i in range(count):
+            question = self.create_question(question_text='Question {}'.format(i), days=-i)
+            Choice.objects.create(question=question, choice_text='Choice 1', votes=i)
+            Choice.objects.create(question=question, choice_text='Choice 2', votes=1)
+
+    def changelist_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('admin:polls_question_changelist'))
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_changelist_query_count_is_constant(self):
+        self.create_questions(2)
+        self.changelist_queries()
+        _, few = self.changelist_queries()
+        self.create_questions(20)
+        _, many = self.changelist_queries()
+
+        self.assertEqual(few, many)
+
+    def test_changelist_annotations(self):
+        self.create_questions(3)
+        response, _ = self.changelist_queries()
+        rows = {q.question_text: q for q in response.context['cl'].result_list}
+
+        self.assertTrue(rows['Question 0'].published_recently)
+        self.assertFalse(rows['Question 2'].published_recently)
+        self.assertEqual(rows['Question 2'].choice_count, 2)
+        self.assertEqual(rows['Question 2'].total_votes, 3)
+
+    def test_change_form_query_count_is_constant(self):
+        question = self.create_question(question_text='Question.', days=-1)
+        url = reverse('admin:polls_question_change', args=(question.id,))
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(url)
+        for i in range(10):
+            Choice.objects.create(question=question, choice_text='Choice {}'.format(i))
+        with CaptureQueriesContext(connection) as many:
+            self.client.get(url)
+
+        self.assertEqual(len(few), len(many))
+
+
+class EstimatedCountPaginatorTests(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        for i in range(3):
+            self.create_question(question_text='Question {}'.format(i), days=-1)
+
+    def test_exact_count_below_threshold(self):
+        paginator = EstimatedCountPaginator(Question.objects.all(), 10)
+        self.assertEqual(paginator.count, 3)
+
+    def test_estimate_above_threshold(self):
+        Question.objects.first().delete()
+        with self.settings(POLLS_ADMIN_ESTIMATED_COUNT_THRESHOLD=1):
+            paginator = EstimatedCountPaginator(Question.objects.all(), 10)
+            filtered = EstimatedCountPaginator(Question.objects.filter(question_text='Question 1'), 10)
+
+            # SQLite's estimate doesn't notice deleted rows.
+            self.assertEqual(paginator.count, 3)
+            self.assertEqual(filtered.count, 1)
@@ -0,0 +1,81 @@
+from unittest import mock
+
+from django.urls import reverse
+
+from polls.models import Question
+from polls.pagination import decode_cursor, encode_cursor, keyset_page
+from polls.tests import base
+from polls.views import ArchiveView
+
+
+class ArchiveTests(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        # Newest first; questions 3 and 4 share a pub_date.
+        self.questions = [
+            self.create_question(question_text='Question {}'.format(i), days=-i - 1)
+            for i in range(7)
+        ]
+        self.questions[4].pub_date = self.questions[3].pub_date
+        self.questions[4].save()
+        self.questions[3], self.questions[4] = self.questions[4], self.questions[3]
+        self.future = self.create_question(question_text='Future question.', days=5)
+
+    def get_page(self, **params):
+        response = self.client.get(reverse('polls:archive'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.context['page']
+
+    def test_cursor_round_trip(self):
+        question = self.questions[0]
+        self.assertEqual(decode_cursor(encode_cursor(question)), (question.pub_date, question.pk))
+
+    def test_invalid_cursor(self):
+        for token in ('', 'nope', encode_cursor(self.questions[0])[:-3]):
+            with self.assertRaises(ValueError):
+                decode_cursor(token)
+        response = self.client.get(reverse('polls:archive'), {'after': 'nope'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_walk_forwards_and_back(self):
+        pages = []
+        page = keyset_page(Question.objects.exclude(pk=self.future.pk), 3)
+        pages.append(page.object_list)
+        while page.next_cursor:
+            page = keyset_page(
+                Question.objects.exclude(pk=self.future.pk), 3, after=decode_cursor(page.next_cursor)
+            )
+            pages.append(page.object_list)
+        self.assertEqual(pages, [self.questions[0:3], self.questions[3:6], self.questions[6:7]])
+
+        back = keyset_page(
+            Question.objects.exclude(pk=self.future.pk), 3, before=decode_cursor(page.previous_cursor)
+        )
+        self.assertEqual(back.object_list, self.questions[3:6])
+        self.assertIsNotNone(back.previous_cursor)
+        self.assertIsNotNone(back.next_cursor)
+
+    def test_archive_view(self):
+        page = self.get_page()
+        self.assertEqual(page.object_list, self.questions)
+        self.assertIsNone(page.next_cursor)
+        self.assertIsNone(page.previous_cursor)
+
+    def test_archive_view_pages(self):
+        with mock.patch.object(ArchiveView, 'page_size', 4):
+            first = self.get_page()
+            second = self.get_page(after=first.next_cursor)
+            back = self.get_page(before=second.previous_cursor)
+
+        self.assertEqual(first.object_list, self.questions[:4])
+        self.assertEqual(second.object_list, self.questions[4:])
+        self.assertIsNone(second.next_cursor)
+        self.assertEqual(back.object_list, first.object_list)
+        self.assertIsNone(back.previous_cursor)
+
+    def test_page_is_one_query(self):
+        cursor = encode_cursor(self.questions[2])
+        with self.assertNumQueries(1):
+            self.client.get(reverse('polls:archive'), {'after': cursor})
@@ -0,0 +1,153 @@
+import json
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.test import Client, SimpleTestCase, override_settings
+from django.urls import reverse
+
+from polls import ballots
+from polls.ballots import RateLimiter, VoterFilter, voter_stats
+from polls.models import Ballot, Choice
+from polls.tests import base
+
+
+class VoterFilterTests(SimpleTestCase):
+
+    def test_added_pairs_are_found(self):
+        voters = VoterFilter(capacity=1000, error_rate=0.01)
+        for number in range(1000):
+            voters.add(1, 'voter{}'.format(number))
+
+        self.assertTrue(all((1, 'voter{}'.format(number)) in voters for number in range(1000)))
+        false_positives = sum((2, 'voter{}'.format(number)) in voters for number in range(10000))
+        self.assertLess(false_positives, 300)
+
+    def test_memory_is_fixed(self):
+        voters = VoterFilter(capacity=100, error_rate=0.01)
+        nbytes = voters.nbytes
+        for number in range(1000):
+            voters.add(1, 'voter{}'.format(number))
+
+        self.assertEqual(voters.nbytes, nbytes)
+        # The last two generations are remembered, older pairs are forgotten.
+        self.assertIn((1, 'voter999'), voters)
+        self.assertIn((1, 'voter850'), voters)
+        self.assertLess(sum((1, 'voter{}'.format(number)) in voters for number in range(700)), 70)
+
+
+class RateLimiterTests(SimpleTestCase):
+
+    def setUp(self):
+        self.now = 0
+        self.limiter = RateLimiter(burst=2, period=10, max_keys=2, clock=lambda: self.now)
+
+    def test_bursts_and_refills(self):
+        self.assertEqual(self.limiter.take('a'), 0)
+        self.assertEqual(self.limiter.take('a'), 0)
+        self.assertEqual(self.limiter.take('a'), 5)
+        self.assertEqual(self.limiter.take('b'), 0)
+
+        self.now = 5
+        self.assertEqual(self.limiter.take('a'), 0)
+        self.assertEqual(self.limiter.take('a'), 5)
+
+    def test_least_recently_used_buckets_are_evicted(self):
+        for key in 'aab':
+            self.limiter.take(key)
+        self.limiter.take('c')
+
+        self.assertEqual(list(self.limiter._buckets), ['b', 'c'])
+        self.assertEqual(self.limiter.take('a'), 0)
+
+
+@override_settings(POLLS_ONE_VOTE_PER_VOTER=True, POLLS_VOTER_FILTER_CAPACITY=1000)
+class OneVotePerVoterTests(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        self.question = self.create_question(question_text='Some question.', days=-1)
+        self.choice = Choice.objects.create(question=self.question, choice_text='Choice 1')
+        self.url = reverse('polls:vote', args=(self.question.id,))
+        # Forget the ballots of earlier tests, which were rolled back.
+        ballots._voter_filter = None
+
+    def assertVotes(self, votes):
+        self.choice.refresh_from_db()
+        self.assertEqual(self.choice.votes, votes)
+
+    def test_session_votes_once(self):
+        # Starts a session.
+        self.client.session
+        for _ in range(3):
+            response = self.client.post(self.url, {'choice': self.choice.id})
+            self.assertRedirects(response, reverse('polls:results', args=(self.question.id,)))
+
+        self.assertVotes(1)
+        self.assertEqual(Ballot.objects.get().choice, self.choice)
+        self.assertEqual(voter_stats()['filtered'], 2)
+
+        other = Client()
+        other.session
+        other.post(self.url, {'choice': self.choice.id})
+        self.assertVotes(2)
+
+    def test_voters_without_a_session_are_told_apart_by_ip(self):
+        for _ in range(3):
+            self.client.cookies.clear()
+            self.client.post(self.url, {'choice': self.choice.id})
+        self.client.post(self.url, {'choice': self.choice.id}, REMOTE_ADDR='10.0.0.1')
+
+        self.assertVotes(2)
+        self.assertNotIn(settings.SESSION_COOKIE_NAME, self.client.cookies)
+        self.assertFalse(Session.objects.exists())
+
+    def test_batches_need_a_trusted_client(self):
+        payload = json.dumps([{'question': self.question.id, 'choice': self.choice.id}])
+        for _ in range(3):
+            response = self.client.post(reverse('polls:vote_batch'), payload, content_type='application/json')
+            self.assertEqual(response.status_code, 403)
+
+        self.assertVotes(0)
+
+    @override_settings(POLLS_VOTER_IDENTITY='ip')
+    def test_repeated_vote_is_one_read(self):
+        self.client.post(self.url, {'choice': self.choice.id})
+
+        with self.assertNumQueries(1):
+            self.client.post(self.url, {'choice': self.choice.id})
+        self.assertEqual(voter_stats()['writes_avoided'], 1)
+
+    @override_settings(POLLS_VOTER_IDENTITY='ip')
+    def test_ledger_catches_votes_the_filter_missed(self):
+        self.client.post(self.url, {'choice': self.choice.id})
+        # As if the vote had come in through another process.
+        ballots._voter_filter = None
+
+        self.client.post(self.url, {'choice': self.choice.id})
+
+        self.assertVotes(1)
+        self.assertEqual(voter_stats()['ledger_duplicates'], 1)
+
+
+@override_settings(POLLS_VOTE_RATE_LIMIT=(2, 60))
+class RateLimitTests(base.BaseTestCase):
+
+    def test_floods_are_refused_without_queries(self):
+        question = self.create_question(question_text='Some question.', days=-1)
+        choice = Choice.objects.create(question=question, choice_text='Choice 1')
+        url = reverse('polls:vote', args=(question.id,))
+        for _ in range(2):
+            self.client.post(url, {'choice': choice.id})
+
+        with self.assertNumQueries(0):
+            response = self.client.post(url, {'choice': choice.id}, REMOTE_ADDR='127.0.0.1')
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '30')
+        choice.refresh_from_db()
+        self.assertEqual(choice.votes, 2)
+        self.assertEqual(voter_stats()['rate_limited'], 1)
+
+        response = self.client.post(url, {'choice': choice.id}, REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(response.status_code, 302)
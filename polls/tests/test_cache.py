@@ -0,0 +1,144 @@
+import datetime
+import re
+from unittest import mock
+
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from polls.cache import get_latest_questions, get_results, results_cache_stats
+from polls.models import Choice
+from polls.tests import base
+from polls.views import CSRF_PLACEHOLDER
+
+
+class ResultsCacheTests(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        self.question = self.create_question(question_text='Some question.', days=-1)
+        self.choice1 = Choice.objects.create(question=self.question, choice_text='Choice 1', votes=1)
+        self.choice2 = Choice.objects.create(question=self.question, choice_text='Choice 2', votes=3)
+
+    def test_tallies(self):
+        self.assertEqual(get_results(self.question.id), [
+            {'id': self.choice1.id, 'choice_text': 'Choice 1', 'votes': 1, 'percentage': 25.0},
+            {'id': self.choice2.id, 'choice_text': 'Choice 2', 'votes': 3, 'percentage': 75.0},
+        ])
+
+    def test_tallies_without_votes(self):
+        question = self.create_question(question_text='Empty question.', days=-1)
+        Choice.objects.create(question=question, choice_text='Choice')
+        self.assertEqual(get_results(question.id)[0]['percentage'], 0.0)
+
+    def test_hits_and_misses_are_counted(self):
+        get_results(self.question.id)
+        with self.assertNumQueries(0):
+            get_results(self.question.id)
+            get_results(self.question.id)
+
+        self.assertEqual(results_cache_stats(), {'hits': 2, 'misses': 1})
+
+    def test_vote_invalidates_results(self):
+        get_results(self.question.id)
+        self.client.post(reverse('polls:vote', args=(self.question.id,)), {'choice': self.choice1.id})
+        self.run_commit_hooks()
+
+        self.assertEqual(get_results(self.question.id)[0]['votes'], 2)
+
+    def test_choice_change_invalidates_results(self):
+        get_results(self.question.id)
+        self.choice2.choice_text = 'Renamed'
+        self.choice2.save()
+
+        self.assertEqual(get_results(self.question.id)[1]['choice_text'], 'Renamed')
+
+    def test_results_view_uses_cache(self):
+        url = reverse('polls:results', args=(self.question.id,))
+        self.client.get(url)
+        response = self.client.get(url)
+
+        self.assertContains(response, "<li>Choice 2 -- 3 votes</li>")
+        self.assertEqual(results_cache_stats(), {'hits': 1, 'misses': 1})
+
+
+class IndexCacheTests(base.BaseTestCase):
+
+    def test_index_is_cached(self):
+        self.create_question(question_text='Past question.', days=-1)
+        get_latest_questions()
+
+        with self.assertNumQueries(0):
+            questions = get_latest_questions()
+        self.assertEqual([q.question_text for q in questions], ['Past question.'])
+
+    def test_question_change_invalidates_index(self):
+        get_latest_questions()
+        self.create_question(question_text='Past question.', days=-1)
+
+        self.assertEqual(len(get_latest_questions()), 1)
+
+    def test_future_question_appears_on_time(self):
+        """
+        A cached index should not hide a question once its pub_date passes.
+        """
+        future = self.create_question(question_text='Future question.', days=1)
+        self.assertEqual(get_latest_questions(), [])
+
+        later = future.pub_date + datetime.timedelta(seconds=1)
+        with mock.patch('polls.cache.timezone.now', return_value=later):
+            questions = get_latest_questions()
+        self.assertEqual(questions, [future])
+
+
+@override_settings(POLLS_DETAIL_PAGE_CACHE=True)
+class DetailPageCacheTests(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        self.question = self.create_question(question_text='Some question.', days=-1)
+        self.choice = Choice.objects.create(question=self.question, choice_text='Choice 1')
+        self.url = reverse('polls:detail', args=(self.question.id,))
+
+    def test_cached_page_skips_the_database(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+
+        self.assertContains(response, 'Choice 1')
+        self.assertNotContains(response, CSRF_PLACEHOLDER)
+
+    def test_cached_page_token_is_accepted(self):
+        self.client.get(self.url)
+        client = Client(enforce_csrf_checks=True)
+        response = client.get(self.url)
+        token = re.search(r"name='csrfmiddlewaretoken' value='([^']+)'", response.content.decode()).group(1)
+
+        response = client.post(
+            reverse('polls:vote', args=(self.question.id,)),
+            {'choice': self.choice.id, 'csrfmiddlewaretoken': token},
+        )
+        self.assertEqual(response.status_code, 302)
+
+    def test_choice_change_invalidates_page(self):
+        self.client.get(self.url)
+        self.choice.choice_text = 'Renamed'
+        self.choice.save()
+
+        self.assertContains(self.client.get(self.url), 'Renamed')
+
+    def test_leading_zeros_share_the_page(self):
+        url = '/polls/0{}/'.format(self.question.id)
+        self.client.get(url)
+        self.choice.choice_text = 'Renamed'
+        self.choice.save()
+
+        self.assertContains(self.client.get(url), 'Renamed')
+
+    def test_future_question_is_not_cached(self):
+        question = self.create_question(question_text='Future question.', days=5)
+        url = reverse('polls:detail', args=(question.id,))
+
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(self.client.get(url).status_code, 404)
@@ -0,0 +1,116 @@
+from unittest import mock
+
+from django.conf import settings
+from django.urls import reverse
+
+import polls.votes
+from polls.models import Choice
+from polls.tests import base
+
+
+class ConditionalGetTests(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        self.question = self.create_question(question_text='Some question.', days=-1)
+        self.choice = Choice.objects.create(question=self.question, choice_text='Choice 1')
+
+    def assertNotModified(self, url, **headers):
+        response = self.client.get(url, **headers)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_results_not_modified(self):
+        for name in ('polls:results', 'polls:results_json'):
+            url = reverse(name, args=(self.question.id,))
+            response = self.client.get(url)
+
+            self.assertNotModified(url, HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertNotModified(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+
+    def test_detail_always_rendered(self):
+        url = reverse('polls:detail', args=(self.question.id,))
+        self.client.get(url)
+        del self.client.cookies[settings.CSRF_COOKIE_NAME]
+
+        response = self.client.get(
+            url, HTTP_IF_NONE_MATCH='*', HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response)
+        self.assertIn(settings.CSRF_COOKIE_NAME, response.cookies)
+
+    def test_not_modified_without_queries(self):
+        url = reverse('polls:results', args=(self.question.id,))
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            self.assertNotModified(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_vote_changes_results_etag(self):
+        url = reverse('polls:results', args=(self.question.id,))
+        etag = self.client.get(url)['ETag']
+        self.client.post(reverse('polls:vote', args=(self.question.id,)), {'choice': self.choice.id})
+        self.run_commit_hooks()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "<li>Choice 1 -- 1 vote</li>")
+
+    def test_results_between_invalidation_and_new_etag(self):
+        url = reverse('polls:results', args=(self.question.id,))
+        etag = self.client.get(url)['ETag']
+        self.client.post(reverse('polls:vote', args=(self.question.id,)), {'choice': self.choice.id})
+
+        responses = []
+
+        def set_last_modified(*args):
+            responses.append(self.client.get(url))
+            real_set_last_modified(*args)
+
+        real_set_last_modified = polls.votes.set_last_modified
+        with mock.patch('polls.votes.set_last_modified', set_last_modified):
+            self.run_commit_hooks()
+
+        # Served with the old validator, but with the new tallies.
+        self.assertContains(responses[0], "<li>Choice 1 -- 1 vote</li>")
+        self.assertEqual(responses[0]['ETag'], etag)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=responses[0]['ETag'])
+        self.assertContains(response, "<li>Choice 1 -- 1 vote</li>")
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_choice_change_changes_results_etag(self):
+        url = reverse('polls:results', args=(self.question.id,))
+        etag = self.client.get(url)['ETag']
+        Choice.objects.create(question=self.question, choice_text='Choice 2')
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'Choice 2')
+
+    def test_index_etag_follows_question_list(self):
+        url = reverse('polls:index')
+        etag = self.client.get(url)['ETag']
+        self.assertNotModified(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.create_question(question_text='New question.', days=-1)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'New question.')
+
+    def test_missing_question(self):
+        response = self.client.get(reverse('polls:results', args=(999,)), HTTP_IF_NONE_MATCH='"999-0"')
+        self.assertEqual(response.status_code, 404)
+
+    def test_future_question(self):
+        question = self.create_question(question_text='Future question.', days=5)
+        for name in ('polls:results', 'polls:results_json'):
+            url = reverse(name, args=(question.id,))
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH='*').status_code, 404)
+            self.assertEqual(self.client.get(
+                url, HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT',
+            ).status_code, 404)
+
+    def test_leading_zeros(self):
+        url = reverse('polls:results', args=(self.question.id,))
+        etag = self.client.get(url)['ETag']
+
+        self.assertNotModified('/polls/0{}/results/'.format(self.question.id), HTTP_IF_NONE_MATCH=etag)
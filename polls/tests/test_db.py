@@ -0,0 +1,81 @@
+from unittest import mock
+
+from django.contrib.sessions.models import Session
+from django.db import connection, connections
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from polls.db import PrimaryReplicaRouter, apply_sqlite_pragmas, replica
+from polls.models import Choice, Question
+from polls.tests import base
+
+
+class PrimaryReplicaRouterTests(TestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        self.router = PrimaryReplicaRouter()
+
+    def test_reads_stay_on_default(self):
+        self.assertIsNone(self.router.db_for_read(Question))
+        self.assertIsNone(self.router.db_for_read(Session))
+
+    def test_writes_go_to_primary(self):
+        self.assertEqual(self.router.db_for_write(Choice), 'default')
+
+    def test_migrations_only_on_primary(self):
+        self.assertTrue(self.router.allow_migrate('default', 'polls'))
+        self.assertFalse(self.router.allow_migrate('replica', 'polls'))
+
+    def test_replica(self):
+        default = connections.databases['default']
+        with mock.patch.dict(connections.databases, {'default': default}, clear=True):
+            self.assertEqual(replica(), 'default')
+        with mock.patch.dict(connections.databases, {'replica': default}):
+            self.assertEqual(replica(), 'replica')
+
+
+class ReplicaReadTests(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        self.question = self.create_question(question_text='Some question.', days=-1)
+        self.choice = Choice.objects.create(question=self.question, choice_text='Choice 1')
+
+    def test_pages_read_from_replica(self):
+        with mock.patch('polls.views.replica', return_value='default') as views_replica:
+            self.client.get(reverse('polls:detail', args=(self.question.id,)))
+            self.client.get(reverse('polls:results', args=(self.question.id,)))
+
+        self.assertEqual(views_replica.call_count, 2)
+
+    @override_settings(POLLS_DETAIL_PAGE_CACHE=True)
+    def test_writes_and_cache_fills_read_from_default(self):
+        with mock.patch('polls.views.replica', return_value='default') as views_replica:
+            self.client.get(reverse('polls:detail', args=(self.question.id,)))
+            self.client.post(reverse('polls:vote', args=(self.question.id,)), {'choice': self.choice.id})
+
+        self.assertEqual(views_replica.call_count, 0)
+
+
+class SqlitePragmaTests(TestCase):
+
+    # Most pragmas can't be changed inside the test case's transaction, so
+    # these tests use one that can.
+
+    def busy_timeout(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            return cursor.fetchone()[0]
+
+    @override_settings(DATABASE_PERFORMANCE_PROFILE=True, SQLITE_PRAGMAS={'busy_timeout': 1234})
+    def test_pragmas_applied(self):
+        apply_sqlite_pragmas(sender=None, connection=connection)
+        self.assertEqual(self.busy_timeout(), 1234)
+
+    @override_settings(DATABASE_PERFORMANCE_PROFILE=False, SQLITE_PRAGMAS={'busy_timeout': 4321})
+    def test_pragmas_not_applied_when_disabled(self):
+        apply_sqlite_pragmas(sender=None, connection=connection)
+        self.assertNotEqual(self.busy_timeout(), 4321)
@@ -0,0 +1,125 @@
+import csv
+import datetime
+import io
+import json
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+
+from polls.export import export_questions, parse_bound
+from polls.models import Choice, ChoiceShard
+from polls.tests import base
+
+
+class ExportTests(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        self.old = self.create_question(question_text='Old question.', days=-30)
+        self.choice1 = Choice.objects.create(question=self.old, choice_text='Choice 1', votes=1)
+        self.choice2 = Choice.objects.create(question=self.old, choice_text='Choice 2', votes=3)
+        ChoiceShard.objects.create(choice=self.choice2, shard=0, votes=2)
+        self.new = self.create_question(question_text='New question.', days=-1)
+
+    def test_questions_and_tallies_in_one_query(self):
+        with self.assertNumQueries(1):
+            questions = list(export_questions())
+
+        self.assertEqual(questions, [
+            {
+                'id': self.old.id,
+                'question_text': 'Old question.',
+                'pub_date': self.old.pub_date,
+                'total_votes': 6,
+                'choices': [
+                    {'id': self.choice1.id, 'choice_text': 'Choice 1', 'votes': 1},
+                    {'id': self.choice2.id, 'choice_text': 'Choice 2', 'votes': 5},
+                ],
+            },
+            {
+                'id': self.new.id,
+                'question_text': 'New question.',
+                'pub_date': self.new.pub_date,
+                'total_votes': 0,
+                'choices': [],
+            },
+        ])
+
+    def test_pub_date_range(self):
+        since = timezone.now() - datetime.timedelta(days=2)
+
+        self.assertEqual([q['id'] for q in export_questions(since=since)], [self.new.id])
+        self.assertEqual([q['id'] for q in export_questions(until=since)], [self.old.id])
+
+    def test_parse_bound(self):
+        self.assertEqual(
+            parse_bound('2017-03-01T12:00:00+00:00'),
+            datetime.datetime(2017, 3, 1, 12, tzinfo=datetime.timezone.utc),
+        )
+        self.assertEqual(parse_bound('2017-03-01'), timezone.make_aware(datetime.datetime(2017, 3, 1)))
+        with self.assertRaises(ValueError):
+            parse_bound('yesterday')
+
+    def test_command_csv(self):
+        out = io.StringIO()
+        call_command('export_polls', stdout=out)
+        rows = list(csv.reader(io.StringIO(out.getvalue())))
+
+        self.assertEqual(rows[0], ['question_id', 'question_text', 'pub_date', 'choice_id', 'choice_text', 'votes'])
+        self.assertEqual(rows[2][3:], [str(self.choice2.id), 'Choice 2', '5'])
+        self.assertEqual(rows[3][:2], [str(self.new.id), 'New question.'])
+        self.assertEqual(rows[3][3:], ['', '', ''])
+
+    def test_command_ndjson(self):
+        out = io.StringIO()
+        call_command('export_polls', format='ndjson', until=self.new.pub_date.date().isoformat(), stdout=out)
+        lines = out.getvalue().splitlines()
+
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(json.loads(lines[0])['total_votes'], 6)
+
+
+class ExportViewTests(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        question = self.create_question(question_text='Some question.', days=-1)
+        Choice.objects.create(question=question, choice_text='Choice 1', votes=2)
+        self.url = reverse('polls:export')
+
+    def log_in(self):
+        User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.login(username='admin', password='password')
+
+    def test_staff_only(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 302)
+
+    def test_csv(self):
+        self.log_in()
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="polls.csv"')
+        content = b''.join(response.streaming_content).decode()
+        self.assertEqual(len(content.splitlines()), 2)
+
+    def test_ndjson(self):
+        self.log_in()
+        response = self.client.get(self.url, {'format': 'ndjson', 'since': '2000-01-01'})
+
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        question = json.loads(b''.join(response.streaming_content).decode())
+        self.assertEqual(question['question_text'], 'Some question.')
+
+    def test_invalid_parameters(self):
+        self.log_in()
+
+        self.assertEqual(self.client.get(self.url, {'format': 'xml'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'until': 'tomorrow'}).status_code, 400)
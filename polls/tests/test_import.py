@@ -0,0 +1,155 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+
+from polls.importer import Importer, read_records
+from polls.models import Choice, ImportCheckpoint, Question
+from polls.search import search
+from polls.tests import base
+
+CSV = (
+    'question_id,question_text,pub_date,choice_id,choice_text,votes\r\n'
+    '1,First?,2017-01-01T12:00:00+00:00,1,Yes,3\r\n'
+    '1,First?,2017-01-01T12:00:00+00:00,2,No,1\r\n'
+    '2,"Second,\r\nover two lines?",2017-01-02,3,Maybe,\r\n'
+    '3,No choices?,2017-01-03,,,\r\n'
+)
+
+
+def ndjson(*records):
+    return ''.join(json.dumps(record) + '\n' for record in records)
+
+
+def question(number, **kwargs):
+    record = {
+        'question_text': 'Question {}?'.format(number),
+        'pub_date': '2017-01-01T00:00:00Z',
+        'choices': [{'choice_text': 'Choice {}'.format(number), 'votes': number}],
+    }
+    record.update(kwargs)
+    return record
+
+
+class ImportPollsTests(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            f.write(content)
+        return path
+
+    def import_polls(self, path, **options):
+        out, err = io.StringIO(), io.StringIO()
+        call_command('import_polls', path, stdout=out, stderr=err, **options)
+        return out.getvalue(), err.getvalue()
+
+    def test_csv(self):
+        out, _ = self.import_polls(self.write('polls.csv', CSV))
+
+        self.assertIn("Imported 3 questions and 3 choices from 3 records", out)
+        questions = Question.objects.order_by('pub_date')
+        self.assertEqual(
+            [q.question_text for q in questions], ['First?', 'Second,\r\nover two lines?', 'No choices?'],
+        )
+        self.assertEqual(
+            list(questions[0].choice_set.order_by('pk').values_list('choice_text', 'votes')),
+            [('Yes', 3), ('No', 1)],
+        )
+        self.assertEqual(questions[1].choice_set.get().votes, 0)
+        self.assertIn(questions[0], search('first'))
+
+    def test_ndjson(self):
+        self.import_polls(self.write('polls.ndjson', ndjson(question(1), question(2))))
+
+        self.assertEqual(Question.objects.count(), 2)
+        self.assertEqual(Choice.objects.get(choice_text='Choice 2').question.question_text, 'Question 2?')
+
+    def test_invalid_records_are_skipped(self):
+        path = self.write('polls.ndjson', ndjson(
+            question(1),
+            question(2, question_text=''),
+            question(3, pub_date='soon'),
+            question(4, choices=[{'choice_text': 'Choice', 'votes': -1}]),
+        ) + '{not json\n')
+
+        out, err = self.import_polls(path)
+
+        self.assertIn("skipped 4 invalid records", out)
+        self.assertEqual(err.splitlines(), [
+            "Line 2: Missing question_text.",
+            "Line 3: Invalid date: 'soon'",
+            "Line 4: votes must not be negative.",
+            "Line 5: Not a valid JSON object.",
+        ])
+        self.assertEqual(Question.objects.count(), 1)
+
+    def test_strict_stops_and_resumes(self):
+        records = [question(number) for number in range(1, 8)]
+        records[4]['pub_date'] = 'soon'
+        path = self.write('polls.ndjson', ndjson(*records))
+
+        with self.assertRaisesMessage(CommandError, "Line 5: Invalid date: 'soon'. Fix or remove the record on line 5"):
+            self.import_polls(path, batch_size=2, strict=True)
+        # The first two batches were committed.
+        self.assertEqual(Question.objects.count(), 4)
+        self.assertEqual(ImportCheckpoint.objects.get(name=path).line, 5)
+
+        records[4]['pub_date'] = '2017-01-01'
+        self.write('polls.ndjson', ndjson(*records))
+        out, _ = self.import_polls(path, batch_size=2, resume=True)
+
+        self.assertIn("Resuming at line 5.", out)
+        self.assertEqual(
+            sorted(Question.objects.values_list('question_text', flat=True)),
+            ['Question {}?'.format(number) for number in range(1, 8)],
+        )
+        self.assertFalse(ImportCheckpoint.objects.exists())
+
+    def test_checkpoint_commits_with_its_batch(self):
+        path = self.write('polls.ndjson', ndjson(*[question(number) for number in range(1, 6)]))
+        save_checkpoint = Importer.save_checkpoint
+
+        def fail_on_third_batch(importer, record):
+            save_checkpoint(importer, record)
+            if record.line == 5:
+                raise OSError("Disk full.")
+
+        with mock.patch.object(Importer, 'save_checkpoint', fail_on_third_batch):
+            with self.assertRaisesMessage(CommandError, "Disk full. Re-run with --resume"):
+                self.import_polls(path, batch_size=2, checkpoint='polls')
+        self.assertEqual(Question.objects.count(), 4)
+        self.assertEqual(ImportCheckpoint.objects.get(name='polls').line, 5)
+
+        self.import_polls(path, batch_size=2, checkpoint='polls', resume=True)
+        self.assertEqual(Question.objects.count(), 5)
+
+    def test_csv_resume_offsets(self):
+        path = self.write('polls.csv', CSV)
+        with open(path, 'rb') as f:
+            records = list(read_records(f, 'csv'))
+        self.assertEqual([record.line for record in records], [2, 4, 6])
+
+        # Reading from any record's resume position yields the records after it.
+        for index, record in enumerate(records):
+            with open(path, 'rb') as f:
+                rest = list(read_records(f, 'csv', record.resume_offset, record.resume_line))
+            self.assertEqual(
+                [(r.line, r.data) for r in rest], [(r.line, r.data) for r in records[index + 1:]],
+            )
+
+    def test_csv_missing_columns(self):
+        path = self.write('polls.csv', 'question_text,votes\r\nFirst?,1\r\n')
+
+        with self.assertRaisesMessage(CommandError, "no pub_date, choice_text column"):
+            self.import_polls(path)
@@ -0,0 +1,128 @@
+import asyncio
+import datetime
+import json
+import socket
+
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from polls.live import LiveResultsServer, delta, notify
+from polls.models import Choice, Question
+from polls.votes import record_vote
+
+
+class DeltaTests(SimpleTestCase):
+
+    def test_only_changed_choices(self):
+        old = [{'id': 1, 'votes': 2}, {'id': 2, 'votes': 0}]
+        new = [{'id': 1, 'votes': 2}, {'id': 2, 'votes': 3}]
+
+        self.assertEqual(delta(7, old, new), {'id': 7, 'total_votes': 5, 'choices': [{'id': 2, 'votes': 3}]})
+        self.assertIsNone(delta(7, new, new))
+
+
+class NotifyTests(SimpleTestCase):
+
+    def setUp(self):
+        self.receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.receiver.bind(('127.0.0.1', 0))
+        self.receiver.settimeout(5)
+        self.addCleanup(self.receiver.close)
+
+    def test_notify(self):
+        with override_settings(POLLS_LIVE_NOTIFY_ADDRESS=self.receiver.getsockname()):
+            notify(3, 5)
+
+        self.assertEqual(self.receiver.recv(1024), b'3,5')
+
+    def test_large_notifications_are_split(self):
+        with override_settings(POLLS_LIVE_NOTIFY_ADDRESS=self.receiver.getsockname()):
+            notify(*range(1000))
+
+        ids = []
+        while len(ids) < 1000:
+            datagram = self.receiver.recv(2048)
+            self.assertLessEqual(len(datagram), 1024)
+            ids.extend(int(value) for value in datagram.split(b','))
+        self.assertEqual(ids, list(range(1000)))
+
+    @override_settings(POLLS_LIVE_NOTIFY_ADDRESS=None)
+    def test_disabled(self):
+        notify(3)
+        self.receiver.settimeout(0.05)
+        with self.assertRaises(socket.timeout):
+            self.receiver.recv(1024)
+
+
+class LiveResultsServerTests(TransactionTestCase):
+
+    def setUp(self):
+        self.question = Question.objects.create(
+            question_text="Question.", pub_date=timezone.now() - datetime.timedelta(days=1),
+        )
+        self.choice1 = self.question.choice_set.create(choice_text="Choice 1.")
+        self.choice2 = self.question.choice_set.create(choice_text="Choice 2.")
+
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.addCleanup(self.loop.close)
+        self.live = LiveResultsServer(coalesce=0.1, heartbeat=60, loop=self.loop)
+        self.server = self.run_async(self.live.start('127.0.0.1', 0, ('127.0.0.1', 0)))
+        self.address = self.server.sockets[0].getsockname()
+        self.addCleanup(self.stop)
+
+    def stop(self):
+        self.live.stop()
+        self.server.close()
+        self.run_async(self.server.wait_closed())
+        asyncio.set_event_loop(None)
+
+    def run_async(self, coroutine):
+        return self.loop.run_until_complete(asyncio.wait_for(coroutine, 5))
+
+    async def open_stream(self, path):
+        reader, writer = await asyncio.open_connection(*self.address)
+        writer.write('GET {} HTTP/1.1\r\nHost: testserver\r\n\r\n'.format(path).encode())
+        status = await reader.readline()
+        while (await reader.readline()) != b'\r\n':
+            pass
+        return status, reader, writer
+
+    async def read_event(self, reader):
+        lines = []
+        while True:
+            line = (await reader.readline()).decode().rstrip('\n')
+            if not line:
+                break
+            lines.append(line)
+        name = lines[0][len('event: '):]
+        return name, json.loads(lines[1][len('data: '):])
+
+    def test_unknown_question(self):
+        status, _, writer = self.run_async(self.open_stream('/polls/{}/live/'.format(self.question.id + 1)))
+        writer.close()
+        self.assertEqual(status, b'HTTP/1.1 404 Not Found\r\n')
+
+    def test_burst_of_votes_is_one_delta(self):
+        notify_address = self.live.notifications.get_extra_info('sockname')
+        status, reader, writer = self.run_async(self.open_stream('/polls/{}/live/'.format(self.question.id)))
+        self.addCleanup(writer.close)
+
+        self.assertEqual(status, b'HTTP/1.1 200 OK\r\n')
+        self.assertEqual(self.run_async(self.read_event(reader)), ('snapshot', {
+            'id': self.question.id,
+            'total_votes': 0,
+            'choices': [{'id': self.choice1.id, 'votes': 0}, {'id': self.choice2.id, 'votes': 0}],
+        }))
+
+        choice = Choice.objects.select_related('question').get(pk=self.choice2.pk)
+        with override_settings(POLLS_LIVE_NOTIFY_ADDRESS=notify_address):
+            for _ in range(3):
+                record_vote(choice)
+
+        self.assertEqual(self.run_async(self.read_event(reader)), ('delta', {
+            'id': self.question.id,
+            'total_votes': 3,
+            'choices': [{'id': self.choice2.id, 'votes': 3}],
+        }))
+        self.assertEqual(self.live.connections, 1)
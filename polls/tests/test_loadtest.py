@@ -0,0 +1,69 @@
+import datetime
+import io
+
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from polls import loadtest
+from polls.models import Choice, Question
+
+
+class ParseMixTests(SimpleTestCase):
+
+    def test_weights(self):
+        self.assertEqual(loadtest.parse_mix('index=3, vote=1'), {'index': 3.0, 'vote': 1.0})
+
+    def test_unknown_kind(self):
+        with self.assertRaises(ValueError):
+            loadtest.parse_mix('index=1,admin=1')
+
+    def test_no_positive_weight(self):
+        with self.assertRaises(ValueError):
+            loadtest.parse_mix('vote=0')
+
+
+class StatsTests(SimpleTestCase):
+
+    def test_merge_and_percentiles(self):
+        stats, other = loadtest.Stats(), loadtest.Stats()
+        for latency in (0.001, 0.002, 0.003):
+            stats.record('index', latency, True)
+        other.record('index', 0.1, False)
+        other.votes[1] = 2
+        stats.merge(other)
+
+        self.assertEqual(stats.total_requests, 4)
+        self.assertEqual(stats.total_errors, 1)
+        self.assertEqual(stats.votes, {1: 2})
+        self.assertAlmostEqual(stats.percentile('index', 0.5), 3.0)
+        self.assertAlmostEqual(stats.percentile('index', 0.99), 100.0)
+        self.assertEqual(dict(stats.histogram('index'))[200], 1)
+
+
+class LoadtestCommandTests(TransactionTestCase):
+
+    def test_no_targets(self):
+        with self.assertRaisesMessage(CommandError, "No published questions"):
+            call_command('loadtest', duration=0.1, stdout=io.StringIO())
+
+    @override_settings(ALLOWED_HOSTS=['127.0.0.1'])
+    def test_no_lost_votes(self):
+        question = Question.objects.create(
+            question_text="Question.", pub_date=timezone.now() - datetime.timedelta(days=1)
+        )
+        question.choice_set.create(choice_text="Choice 1.")
+        question.choice_set.create(choice_text="Choice 2.")
+        out = io.StringIO()
+
+        call_command(
+            'loadtest', duration=0.5, workers=2, mix='detail=1,vote=3', seed=1, stdout=out,
+        )
+
+        output = out.getvalue()
+        # Concurrent writers can fail on the shared in-memory test database,
+        # but every vote that succeeded must be counted.
+        self.assertIn(" 0 lost updates", output)
+        votes = sum(Choice.objects.values_list('votes', flat=True))
+        self.assertGreater(votes, 0)
+        self.assertIn("Votes: {} successful, {} counted".format(votes, votes), output)
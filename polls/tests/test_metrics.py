@@ -0,0 +1,105 @@
+import re
+import threading
+
+from django.db import connection, reset_queries
+from django.test import SimpleTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from polls.metrics import Histogram, Registry, registry
+from polls.models import Choice
+from polls.tests import base
+
+
+def samples(exposition):
+    """
+    Returns the samples of a Prometheus text exposition by name and labels.
+    """
+    return {
+        name: float(value)
+        for name, value in re.findall(r'^([^#\s][^ ]*) (\S+)$', exposition, re.MULTILINE)
+    }
+
+
+class RegistryTests(SimpleTestCase):
+
+    def observe(self, registry, view_name, seconds):
+        registry.observe(
+            view_name, polls_request_seconds=seconds, polls_request_db_seconds=0,
+            polls_request_queries=2, polls_request_template_seconds=0,
+        )
+
+    def test_histogram(self):
+        histogram = Histogram((1, 5))
+        for value in (0.5, 1, 3, 10):
+            histogram.observe(value)
+
+        self.assertEqual(list(histogram.cumulative_counts()), [2, 3, 4])
+        self.assertEqual(histogram.sum, 14.5)
+
+    def test_exposition(self):
+        metrics = Registry()
+        self.observe(metrics, 'polls:index', 0.003)
+        self.observe(metrics, 'polls:index', 0.02)
+        exposition = metrics.exposition()
+
+        self.assertIn('# TYPE polls_request_seconds histogram\n', exposition)
+        values = samples(exposition)
+        self.assertEqual(values['polls_request_seconds_bucket{view="polls:index",le="0.0025"}'], 0)
+        self.assertEqual(values['polls_request_seconds_bucket{view="polls:index",le="0.005"}'], 1)
+        self.assertEqual(values['polls_request_seconds_bucket{view="polls:index",le="+Inf"}'], 2)
+        self.assertEqual(values['polls_request_seconds_sum{view="polls:index"}'], 0.023)
+        self.assertEqual(values['polls_request_queries_sum{view="polls:index"}'], 4)
+
+    def test_threads(self):
+        metrics = Registry()
+
+        def observe():
+            for _ in range(1000):
+                self.observe(metrics, 'polls:index', 0.001)
+        threads = [threading.Thread(target=observe) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(samples(metrics.exposition())['polls_request_seconds_count{view="polls:index"}'], 8000)
+
+
+class MetricsMiddlewareTests(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        registry.clear()
+        self.addCleanup(registry.clear)
+
+    def test_request_breakdown(self):
+        question = self.create_question(question_text='Some question.', days=-1)
+        Choice.objects.create(question=question, choice_text='Choice 1')
+
+        # The request resets the query log when it starts.
+        reset_queries()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('polls:results', args=(question.id,)))
+        # Read now, since captured queries are looked up in the live query log.
+        query_count = len(queries)
+        values = samples(self.client.get(reverse('metrics')).content.decode())
+
+        self.assertEqual(values['polls_request_seconds_count{view="polls:results"}'], 1)
+        self.assertEqual(values['polls_request_queries_sum{view="polls:results"}'], query_count)
+        total = values['polls_request_seconds_sum{view="polls:results"}']
+        db = values['polls_request_db_seconds_sum{view="polls:results"}']
+        template = values['polls_request_template_seconds_sum{view="polls:results"}']
+        self.assertGreater(db, 0)
+        self.assertGreater(template, 0)
+        self.assertLess(db + template, total)
+
+    def test_unresolved(self):
+        self.client.get('/nowhere/')
+        values = samples(registry.exposition())
+
+        self.assertEqual(values['polls_request_queries_count{view="unresolved"}'], 1)
+
+    def test_internal_ips_only(self):
+        self.assertEqual(self.client.get(reverse('metrics'), REMOTE_ADDR='10.0.0.1').status_code, 403)
@@ -0,0 +1,78 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+
+from django.core.management import call_command
+from django.urls import reverse
+
+from polls.models import Choice, Question
+from polls.tests import base
+from polls.votes import record_vote
+
+
+class PrerenderPollsTests(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.question = self.create_question(question_text='Past question.', days=-1)
+        self.choice = Choice.objects.create(question=self.question, choice_text='Choice 1')
+        self.future_question = self.create_question(question_text='Future question.', days=1)
+
+    def prerender(self, **options):
+        out = io.StringIO()
+        call_command('prerender_polls', output=self.directory, stdout=out, **options)
+        return out.getvalue()
+
+    def read(self, url):
+        with open(os.path.join(self.directory, url.lstrip('/'), 'index.html'), encoding='utf-8') as f:
+            return f.read()
+
+    def test_renders_published_questions(self):
+        out = self.prerender()
+
+        self.assertIn("Rendered 1 questions", out)
+        self.assertIn('Past question.', self.read(reverse('polls:index')))
+        self.assertNotIn('Future question.', self.read(reverse('polls:index')))
+        self.assertIn('0 votes in total.', self.read(reverse('polls:results', args=(self.question.id,))))
+        detail = self.read(reverse('polls:detail', args=(self.question.id,)))
+        self.assertIn('Choice 1', detail)
+        self.assertIn(
+            "name='csrfmiddlewaretoken' value='<!--# include virtual=\"/polls/csrf-token/\" -->'", detail,
+        )
+        self.assertFalse(os.path.exists(os.path.join(self.directory, 'polls', str(self.future_question.id))))
+        with open(os.path.join(self.directory, 'manifest.json')) as f:
+            self.assertEqual(list(json.load(f)['questions']), [str(self.question.id)])
+
+    def test_only_changed_questions_are_rendered(self):
+        other = self.create_question(question_text='Other question.', days=-2)
+        self.prerender()
+
+        record_vote(Choice.objects.select_related('question').get(pk=self.choice.pk))
+        out = self.prerender()
+
+        self.assertIn("Rendered 1 questions", out)
+        self.assertIn("1 unchanged", out)
+        self.assertIn('1 vote in total.', self.read(reverse('polls:results', args=(self.question.id,))))
+
+        self.assertIn("Rendered 0 questions", self.prerender())
+        self.assertIn("Rendered 2 questions", self.prerender(force=True))
+        self.assertTrue(os.path.exists(os.path.join(self.directory, 'polls', str(other.id))))
+
+    def test_unpublished_questions_are_removed(self):
+        self.prerender()
+        Question.objects.filter(pk=self.question.pk).delete()
+
+        self.assertIn("removed 1", self.prerender())
+        self.assertEqual(sorted(os.listdir(self.directory)), ['manifest.json', 'polls'])
+        self.assertEqual(os.listdir(os.path.join(self.directory, 'polls')), ['index.html'])
+
+    def test_csrf_token_view(self):
+        response = self.client.get(reverse('polls:csrf_token'))
+
+        self.assertEqual(len(response.content), 64)
+        self.assertIn('no-cache', response['Cache-Control'])
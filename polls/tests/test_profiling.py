@@ -0,0 +1,73 @@
+import io
+import os
+import shutil
+import tempfile
+
+from django.core.management import CommandError, call_command
+from django.test import override_settings
+from django.urls import reverse
+
+from polls.profiling import make_token
+from polls.tests import base
+
+
+class ProfilerMiddlewareTests(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        patcher = override_settings(POLLS_PROFILE_DIR=self.directory)
+        patcher.enable()
+        self.addCleanup(patcher.disable)
+
+    def profiles(self):
+        return sorted(
+            (os.path.basename(root), name)
+            for root, _, names in os.walk(self.directory) for name in names
+        )
+
+    def test_not_sampled(self):
+        self.client.get(reverse('polls:index'))
+        self.client.get(reverse('polls:index'), HTTP_X_POLLS_PROFILE='forged')
+
+        self.assertEqual(self.profiles(), [])
+
+    @override_settings(POLLS_PROFILE_RATE=1)
+    def test_sampled(self):
+        self.client.get(reverse('polls:index'))
+        self.client.get('/polls/nowhere/')
+
+        self.assertEqual([view_name for view_name, _ in self.profiles()], ['polls:index', 'unresolved'])
+        self.assertTrue(all(name.endswith('.prof') for _, name in self.profiles()))
+
+    def test_signed_header(self):
+        self.client.get(reverse('polls:trending'), HTTP_X_POLLS_PROFILE=make_token())
+
+        self.assertEqual([view_name for view_name, _ in self.profiles()], ['polls:trending'])
+
+    @override_settings(POLLS_PROFILE_RATE=1, POLLS_PROFILE_MAX_FILES=2)
+    def test_rotation(self):
+        for _ in range(3):
+            self.client.get(reverse('polls:index'))
+
+        self.assertEqual(len(self.profiles()), 2)
+
+    @override_settings(POLLS_PROFILE_RATE=1)
+    def test_report(self):
+        self.client.get(reverse('polls:index'))
+        self.client.get(reverse('polls:index'))
+        self.client.get(reverse('polls:archive'))
+        out = io.StringIO()
+
+        call_command('profile_report', 'polls:index', limit=5, sort='cumulative', stdout=out)
+
+        lines = out.getvalue().splitlines()
+        self.assertRegex(lines[0], r'^polls:index \(2 requests, [0-9.]+ms per request\)$')
+        self.assertEqual(len(lines), 8)
+        self.assertIn('django/core/handlers/', lines[2])
+        self.assertNotIn('polls:archive', out.getvalue())
+
+        with self.assertRaisesMessage(CommandError, "No profiles of polls:vote."):
+            call_command('profile_report', 'polls:vote', stdout=out)
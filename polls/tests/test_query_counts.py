@@ -0,0 +1,62 @@
+from django.urls import reverse
+
+from polls.models import Choice
+from polls.tests import base
+
+
+class QueryCountTests(base.BaseTestCase):
+    """
+    Fixed query budgets for every view in polls.urls. Raising a number here
+    should be a deliberate decision.
+    """
+
+    def setUp(self):
+        super().setUp()
+
+        self.question = self.create_question(question_text='Some question.', days=-1)
+        for i in range(5):
+            self.choice = Choice.objects.create(question=self.question, choice_text='Choice {}'.format(i))
+
+    def test_index(self):
+        self.create_question(question_text='Another question.', days=-2)
+        url = reverse('polls:index')
+        with self.assertNumQueries(2):
+            self.client.get(url)
+        with self.assertNumQueries(0):
+            self.client.get(url)
+
+    def test_detail(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('polls:detail', args=(self.question.id,)))
+        self.assertContains(response, 'Choice 4')
+
+    def test_results(self):
+        url = reverse('polls:results', args=(self.question.id,))
+        with self.assertNumQueries(2):
+            self.client.get(url)
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertContains(response, 'Choice 4')
+
+    def test_results_with_a_future_question(self):
+        question = self.create_question(question_text='Future question.', days=5)
+        response = self.client.get(reverse('polls:results', args=(question.id,)))
+        self.assertEqual(response.status_code, 404)
+
+    def test_vote(self):
+        url = reverse('polls:vote', args=(self.question.id,))
+        with self.assertNumQueries(3):
+            response = self.client.post(url, {'choice': self.choice.id})
+        self.assertEqual(response.status_code, 302)
+
+    def test_vote_without_choice(self):
+        url = reverse('polls:vote', args=(self.question.id,))
+        with self.assertNumQueries(2):
+            response = self.client.post(url)
+        self.assertContains(response, "You didn&#39;t select a choice.")
+
+    def test_vote_for_another_questions_choice(self):
+        other = self.create_question(question_text='Other question.', days=-1)
+        url = reverse('polls:vote', args=(other.id,))
+        response = self.client.post(url, {'choice': self.choice.id})
+        self.assertContains(response, "You didn&#39;t select a choice.")
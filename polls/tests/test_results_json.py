@@ -0,0 +1,52 @@
+from django.urls import reverse
+
+from polls.models import Choice
+from polls.tests import base
+
+
+class ResultsJsonTests(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        self.question = self.create_question(question_text='Some question.', days=-1)
+        self.choice1 = Choice.objects.create(question=self.question, choice_text='Choice 1', votes=1)
+        self.choice2 = Choice.objects.create(question=self.question, choice_text='Choice 2', votes=3)
+        self.url = reverse('polls:results_json', args=(self.question.id,))
+
+    def test_results(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {
+            'id': self.question.id,
+            'question_text': 'Some question.',
+            'total_votes': 4,
+            'choices': [
+                {'id': self.choice1.id, 'choice_text': 'Choice 1', 'votes': 1, 'percentage': 25.0},
+                {'id': self.choice2.id, 'choice_text': 'Choice 2', 'votes': 3, 'percentage': 75.0},
+            ],
+        })
+
+    def test_single_query_when_warm(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(1):
+            self.client.get(self.url)
+
+    def test_leading_zeros_share_the_tallies(self):
+        url = '/polls/0{}/results.json'.format(self.question.id)
+        self.client.get(url)
+        self.client.post(reverse('polls:vote', args=(self.question.id,)), {'choice': self.choice1.id})
+        self.run_commit_hooks()
+
+        self.assertEqual(self.client.get(url).json()['total_votes'], 5)
+
+    def test_future_question(self):
+        question = self.create_question(question_text='Future question.', days=5)
+        response = self.client.get(reverse('polls:results_json', args=(question.id,)))
+        self.assertEqual(response.status_code, 404)
+
+    def test_not_modified(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
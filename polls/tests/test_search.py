@@ -0,0 +1,67 @@
+from django.contrib.auth.models import User
+from django.urls import reverse
+
+from polls.models import Choice, Question
+from polls.search import filter_questions, fts5_query
+from polls.tests import base
+
+
+class SearchTests(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        self.pizza = self.create_question(question_text='Favourite pizza topping?', days=-1)
+        Choice.objects.create(question=self.pizza, choice_text='Pineapple')
+        self.fruit = self.create_question(question_text='Favourite fruit?', days=-1)
+        Choice.objects.create(question=self.fruit, choice_text='Pineapple')
+        self.future = self.create_question(question_text='Future pizza question?', days=5)
+
+    def search(self, term):
+        response = self.client.get(reverse('polls:search'), {'q': term})
+        self.assertEqual(response.status_code, 200)
+        return list(response.context['question_list'])
+
+    def test_fts5_query(self):
+        self.assertEqual(fts5_query('pizza "top'), '"pizza"* "top"*')
+        self.assertEqual(fts5_query('"*'), '')
+
+    def test_search_question_text(self):
+        self.assertEqual(self.search('pizza'), [self.pizza])
+
+    def test_search_prefix(self):
+        self.assertEqual(self.search('topp'), [self.pizza])
+
+    def test_search_choice_text_ranks_question_text_first(self):
+        self.fruit.question_text = 'Favourite fruit? Not pineapple.'
+        self.fruit.save()
+
+        self.assertEqual(self.search('pineapple'), [self.fruit, self.pizza])
+
+    def test_index_follows_changes(self):
+        Choice.objects.create(question=self.fruit, choice_text='Mango')
+        self.assertEqual(self.search('mango'), [self.fruit])
+
+        self.fruit.choice_set.filter(choice_text='Mango').delete()
+        Choice.objects.get(question=self.fruit, choice_text='Pineapple').delete()
+        self.assertEqual(self.search('mango'), [])
+
+        self.pizza.delete()
+        self.assertEqual(self.search('pineapple'), [])
+
+    def test_empty_search(self):
+        self.assertEqual(self.search(''), [])
+        self.assertContains(self.client.get(reverse('polls:search'), {'q': 'nothing'}), "No polls match")
+
+    def test_filter_questions(self):
+        self.assertEqual(
+            set(filter_questions(Question.objects.all(), 'pizza')),
+            {self.pizza, self.future},
+        )
+
+    def test_admin_search(self):
+        User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.login(username='admin', password='password')
+        response = self.client.get(reverse('admin:polls_question_changelist'), {'q': 'fruit'})
+
+        self.assertEqual(list(response.context['cl'].result_list), [self.fruit])
@@ -0,0 +1,105 @@
+import datetime
+import io
+
+from django.core.management import CommandError, call_command
+from django.db.models import Sum
+from django.utils import timezone
+
+from polls.bulk import bulk_create_with_ids
+from polls.models import Choice, Question
+from polls.search import search
+from polls.seed import PollGenerator, seed_polls
+
+from .base import BaseTestCase
+
+
+class BulkCreateWithIdsTests(BaseTestCase):
+
+    def test_sets_primary_keys(self):
+        self.create_question("Existing.", days=-1)
+        pub_date = timezone.now()
+
+        questions = bulk_create_with_ids(
+            Question, (Question(question_text=str(i), pub_date=pub_date) for i in range(5))
+        )
+
+        self.assertEqual(
+            [(question.pk, question.question_text) for question in questions],
+            list(Question.objects.filter(pk__in=[q.pk for q in questions])
+                 .order_by('pk').values_list('pk', 'question_text')),
+        )
+
+    def test_empty(self):
+        self.assertEqual(bulk_create_with_ids(Question, []), [])
+
+
+class SeedPollsTests(BaseTestCase):
+
+    def seed(self, count, seed=1, **kwargs):
+        generator = PollGenerator(seed=seed, now=timezone.now() - datetime.timedelta(days=1))
+        return list(seed_polls(count, generator, **kwargs))
+
+    def test_batches_and_transactions(self):
+        progress = self.seed(25, batch_size=4, transaction_size=10)
+
+        self.assertEqual(progress, [10, 20, 25])
+        self.assertEqual(Question.objects.count(), 25)
+        self.assertEqual(Question.objects.filter(choice__isnull=True).count(), 0)
+        for question in Question.objects.all():
+            self.assertTrue(2 <= question.choice_set.count() <= 5)
+
+    def test_same_seed_same_polls(self):
+        def dataset():
+            return (
+                list(Question.objects.order_by('pk').values_list('question_text', flat=True)),
+                list(Choice.objects.order_by('pk').values_list('choice_text', 'votes')),
+            )
+
+        self.seed(20)
+        first = dataset()
+        Question.objects.all().delete()
+        self.seed(20)
+
+        self.assertEqual(dataset(), first)
+
+    def test_votes_are_skewed(self):
+        self.seed(500)
+
+        totals = sorted(
+            Question.objects.annotate(total=Sum('choice__votes')).values_list('total', flat=True),
+            reverse=True,
+        )
+        # The top fifth of the questions gets most of the votes.
+        self.assertGreater(sum(totals[:100]), sum(totals) / 2)
+
+    def test_questions_are_searchable(self):
+        self.seed(20)
+        question = Question.objects.filter(pub_date__lte=timezone.now()).order_by('pk').first()
+        word = question.question_text.split()[2]
+
+        self.assertIn(question, search(word))
+
+
+class SeedPollsCommandTests(BaseTestCase):
+
+    def test_command(self):
+        out = io.StringIO()
+        call_command('seed_polls', 12, choices='3', seed=1, batch_size=5, stdout=out)
+
+        self.assertIn("Created 12 questions", out.getvalue())
+        self.assertEqual(Question.objects.count(), 12)
+        self.assertEqual(Choice.objects.count(), 36)
+
+    def test_same_seed_and_now_same_dates(self):
+        dates = []
+        for _ in range(2):
+            call_command('seed_polls', 20, seed=1, now='2024-01-01T12:00:00', stdout=io.StringIO())
+            questions = Question.objects.order_by('pk')
+            dates.append(list(questions.values_list('pub_date', 'last_voted_at')))
+            questions.delete()
+
+        self.assertEqual(dates[0], dates[1])
+        self.assertTrue(all(pub_date.year in (2023, 2024) for pub_date, _ in dates[0]))
+
+        with self.assertRaisesMessage(CommandError, "Invalid date: 'soon'"):
+            call_command('seed_polls', 1, now='soon', stdout=io.StringIO())
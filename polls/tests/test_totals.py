@@ -0,0 +1,116 @@
+import datetime
+import io
+from unittest import skipUnless
+
+from django.core.management import call_command
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+
+from polls.models import Choice, Question
+from polls.tests import base
+from polls.views import TrendingView
+from polls.votes import VoteBuffer, record_vote, record_vote_batch
+
+
+class TotalVotesTests(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        self.question = self.create_question(question_text='Some question.', days=-1)
+        self.choice1 = Choice.objects.create(question=self.question, choice_text='Choice 1', votes=2)
+        self.choice2 = Choice.objects.create(question=self.question, choice_text='Choice 2')
+
+    def assertTotal(self, total):
+        self.question.refresh_from_db()
+        self.assertEqual(self.question.total_votes, total)
+
+    def test_saved_choices_count(self):
+        self.assertTotal(2)
+        self.assertIsNone(self.question.last_voted_at)
+        self.choice1.delete()
+        self.assertTotal(0)
+
+    def test_vote(self):
+        self.client.post(reverse('polls:vote', args=(self.question.id,)), {'choice': self.choice2.id})
+
+        self.assertTotal(3)
+        self.assertIsNotNone(self.question.last_voted_at)
+        self.assertEqual(self.question.last_modified, self.question.last_voted_at)
+
+    def test_sharded_vote(self):
+        Question.objects.filter(pk=self.question.pk).update(vote_shards=4)
+        record_vote(Choice.objects.select_related('question').get(pk=self.choice1.pk))
+
+        self.assertTotal(3)
+
+    def test_batch(self):
+        record_vote_batch([
+            {'question': self.question.id, 'choice': self.choice1.id, 'count': 3},
+            {'question': self.question.id, 'choice': self.choice2.id},
+        ])
+
+        self.assertTotal(6)
+
+    def test_buffer(self):
+        buffer = VoteBuffer(interval=60, max_size=10)
+        buffer.add(self.choice1.pk)
+        buffer.add(self.choice2.pk, 2)
+        self.assertTotal(2)
+
+        buffer.flush()
+        self.assertTotal(5)
+        self.assertIsNotNone(self.question.last_voted_at)
+
+    def test_repair_command(self):
+        Question.objects.filter(pk=self.question.pk).update(total_votes=100)
+        self.choice2.choiceshard_set.create(shard=0, votes=4)
+        out = io.StringIO()
+
+        call_command('repair_vote_totals', batch_size=1, stdout=out)
+
+        self.assertIn("vote totals of 1 questions", out.getvalue())
+        self.assertTotal(6)
+
+    def test_results_show_total(self):
+        response = self.client.get(reverse('polls:results', args=(self.question.id,)))
+        self.assertContains(response, '2 votes in total.')
+
+
+class TrendingViewTests(base.BaseTestCase):
+
+    def create_voted_question(self, question_text, total_votes, hours_ago, days=-2):
+        question = self.create_question(question_text=question_text, days=days)
+        Question.objects.filter(pk=question.pk).update(
+            total_votes=total_votes, last_voted_at=timezone.now() - datetime.timedelta(hours=hours_ago),
+        )
+        return question
+
+    def test_ranks_recently_voted_questions(self):
+        self.create_voted_question('Popular.', 50, hours_ago=1)
+        self.create_voted_question('Less popular.', 5, hours_ago=2)
+        self.create_voted_question('Popular long ago.', 500, hours_ago=48)
+        self.create_voted_question('Future.', 1000, hours_ago=1, days=1)
+        self.create_question('Never voted on.', days=-1)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('polls:trending'))
+
+        self.assertQuerysetEqual(
+            response.context['question_list'], ['<Question: Popular.>', '<Question: Less popular.>'],
+        )
+        self.assertContains(response, '50 votes')
+
+    @skipUnless(connection.vendor == 'sqlite', "Checks an SQLite query plan.")
+    def test_recent_votes_are_found_through_their_index(self):
+        sql, params = TrendingView().get_queryset().query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            plan = ' '.join(row[-1] for row in cursor.fetchall())
+
+        self.assertIn('USING INDEX {}'.format(Question._meta.indexes[1].name), plan)
+
+    def test_no_trending_questions(self):
+        response = self.client.get(reverse('polls:trending'))
+        self.assertContains(response, "No polls were voted on recently.")
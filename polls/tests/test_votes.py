@@ -0,0 +1,214 @@
+import json
+import time
+from unittest import mock
+
+from django.test import override_settings
+from django.urls import reverse
+
+from polls.models import Choice
+from polls.tests import base
+from polls.views import vote_batch_signature
+from polls.votes import VoteBuffer, apply_votes, compact_shards, record_vote, record_vote_batch
+
+
+class VoteTestCase(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        self.question = self.create_question(question_text='Some question.', days=-1)
+        self.choice1 = Choice.objects.create(question=self.question, choice_text='Choice 1')
+        self.choice2 = Choice.objects.create(question=self.question, choice_text='Choice 2')
+
+    def assertVotes(self, choice, votes):
+        choice.refresh_from_db()
+        self.assertEqual(choice.votes, votes)
+
+
+class ApplyVotesTests(VoteTestCase):
+
+    def test_apply_votes_increments_in_place(self):
+        """
+        apply_votes() should add to the stored count rather than overwrite it
+        with a stale in-memory value.
+        """
+        stale = Choice.objects.get(pk=self.choice1.pk)
+        apply_votes({self.choice1.pk: 2, self.choice2.pk: 1})
+        record_vote(stale)
+
+        self.assertVotes(self.choice1, 3)
+        self.assertVotes(self.choice2, 1)
+
+
+class VoteBufferTests(VoteTestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        self.buffer = VoteBuffer(interval=60, max_size=3)
+
+    def test_votes_are_written_on_flush(self):
+        """
+        Buffered votes should not touch the database until flushed, and
+        should be coalesced per choice.
+        """
+        self.buffer.add(self.choice1.pk)
+        self.buffer.add(self.choice1.pk)
+        self.buffer.add(self.choice2.pk)
+        self.assertEqual(self.buffer.depth, 3)
+        self.assertVotes(self.choice1, 0)
+
+        self.assertEqual(self.buffer.flush(), 3)
+        self.assertEqual(self.buffer.depth, 0)
+        self.assertVotes(self.choice1, 2)
+        self.assertVotes(self.choice2, 1)
+
+    def test_flush_empty_buffer(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(self.buffer.flush(), 0)
+
+    def test_size_threshold_wakes_flusher(self):
+        self.buffer.add(self.choice1.pk, count=2)
+        self.assertFalse(self.buffer._wake.is_set())
+        self.buffer.add(self.choice2.pk)
+        self.assertTrue(self.buffer._wake.is_set())
+
+    def test_stop_flushes_remaining_votes(self):
+        self.buffer.add(self.choice2.pk)
+        self.buffer.stop()
+        self.assertVotes(self.choice2, 1)
+
+    @override_settings(POLLS_VOTE_BUFFER=True)
+    def test_vote_view_uses_buffer(self):
+        buffer = VoteBuffer(interval=60, max_size=100)
+        url = reverse('polls:vote', args=(self.question.id,))
+        with mock.patch('polls.votes.get_vote_buffer', return_value=buffer):
+            response = self.client.post(url, {'choice': self.choice1.id})
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(buffer.depth, 1)
+        self.assertVotes(self.choice1, 0)
+        buffer.flush()
+        self.assertVotes(self.choice1, 1)
+
+
+class ShardedVoteTests(VoteTestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        self.question.vote_shards = 4
+        self.question.save()
+
+    def vote(self, choice, times=1):
+        url = reverse('polls:vote', args=(self.question.id,))
+        for _ in range(times):
+            self.client.post(url, {'choice': choice.id})
+
+    def test_votes_go_to_shards(self):
+        self.vote(self.choice1, times=10)
+
+        self.assertVotes(self.choice1, 0)
+        self.assertEqual(sum(self.choice1.choiceshard_set.values_list('votes', flat=True)), 10)
+        self.assertLessEqual(self.choice1.choiceshard_set.count(), 4)
+        self.assertEqual(self.choice1.total_votes, 10)
+
+    def test_results_sum_shards(self):
+        self.choice2.votes = 5
+        self.choice2.save()
+        self.vote(self.choice2, times=2)
+
+        response = self.client.get(reverse('polls:results', args=(self.question.id,)))
+        self.assertContains(response, "<li>Choice 1 -- 0 votes</li>")
+        self.assertContains(response, "<li>Choice 2 -- 7 votes</li>")
+
+    def test_compact_shards(self):
+        self.vote(self.choice1, times=3)
+        self.vote(self.choice2, times=2)
+
+        self.assertEqual(compact_shards(), 5)
+        self.assertVotes(self.choice1, 3)
+        self.assertVotes(self.choice2, 2)
+        self.assertEqual(self.choice1.total_votes, 3)
+        self.assertEqual(compact_shards(), 0)
+
+
+@override_settings(POLLS_VOTE_BATCH_KEYS={'partner': 'secret'})
+class BatchVoteTests(VoteTestCase):
+
+    def post(self, payload, key='partner', secret='secret', timestamp=None):
+        body = payload if isinstance(payload, str) else json.dumps(payload)
+        timestamp = str(int(time.time()) if timestamp is None else timestamp)
+        return self.client.post(
+            reverse('polls:vote_batch'), body, content_type='application/json',
+            HTTP_X_POLLS_KEY=key, HTTP_X_POLLS_TIMESTAMP=timestamp,
+            HTTP_X_POLLS_SIGNATURE=vote_batch_signature(secret, timestamp, body.encode()),
+        )
+
+    def test_batch(self):
+        other = self.create_question(question_text='Other question.', days=-1)
+        response = self.post([
+            {'question': self.question.id, 'choice': self.choice1.id, 'count': 3},
+            {'question': self.question.id, 'choice': self.choice2.id},
+            {'question': other.id, 'choice': self.choice1.id},
+            {'question': self.question.id, 'choice': 'x'},
+            {'question': self.question.id, 'choice': self.choice2.id, 'count': 0},
+            {'question': self.question.id, 'choice': self.choice1.id, 'count': 2},
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'results': [
+            {'status': 'ok'},
+            {'status': 'ok'},
+            {'status': 'error', 'error': "Unknown choice."},
+            {'status': 'error', 'error': "Malformed record."},
+            {'status': 'error', 'error': "Count must be an integer from 1 to 1000."},
+            {'status': 'ok'},
+        ]})
+        self.assertVotes(self.choice1, 5)
+        self.assertVotes(self.choice2, 1)
+
+    def test_counts_must_be_bounded_integers(self):
+        counts = [2.9, True, '2', 10 ** 9, -1, 1000]
+        results = record_vote_batch([
+            {'question': self.question.id, 'choice': self.choice1.id, 'count': count} for count in counts
+        ])
+
+        self.assertEqual([result['status'] for result in results], ['error'] * 5 + ['ok'])
+        self.assertVotes(self.choice1, 1000)
+
+    def test_unsigned_batches_are_refused(self):
+        payload = [{'question': self.question.id, 'choice': self.choice1.id}]
+        self.assertEqual(self.client.post(
+            reverse('polls:vote_batch'), json.dumps(payload), content_type='application/json',
+        ).status_code, 403)
+        self.assertEqual(self.post(payload, key='other').status_code, 403)
+        self.assertEqual(self.post(payload, secret='guess').status_code, 403)
+        # A batch replayed after its signature expired.
+        self.assertEqual(self.post(payload, timestamp=int(time.time()) - 301).status_code, 403)
+
+        self.assertVotes(self.choice1, 0)
+
+    def test_batch_groups_updates(self):
+        """
+        Choices receiving the same number of votes should share an UPDATE.
+        """
+        choice3 = Choice.objects.create(question=self.question, choice_text='Choice 3')
+        records = [
+            {'question': self.question.id, 'choice': self.choice1.id},
+            {'question': self.question.id, 'choice': self.choice2.id},
+            {'question': self.question.id, 'choice': choice3.id, 'count': 2},
+        ]
+        # Validation, two vote UPDATEs and the question bump, plus the
+        # savepoint around them.
+        with self.assertNumQueries(6):
+            record_vote_batch(records)
+
+    def test_invalid_payloads(self):
+        self.assertEqual(self.post('nope').status_code, 400)
+        self.assertEqual(self.post({'question': 1}).status_code, 400)
+        with self.settings(POLLS_VOTE_BATCH_MAX_RECORDS=1):
+            self.assertEqual(self.post([{}, {}]).status_code, 400)
+
+    def test_get_not_allowed(self):
+        self.assertEqual(self.client.get(reverse('polls:vote_batch')).status_code, 405)
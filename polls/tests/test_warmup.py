@@ -0,0 +1,86 @@
+from unittest import mock
+
+from django.core.wsgi import get_wsgi_application
+from django.db import OperationalError
+from django.template import engines
+from django.test import override_settings
+from django.urls import reverse
+
+from mysite import warmup
+from polls.tests import base
+
+CACHED_TEMPLATES = [{
+    'BACKEND': 'django.template.backends.django.DjangoTemplates',
+    'OPTIONS': {
+        'loaders': [
+            ('django.template.loaders.cached.Loader', ['django.template.loaders.app_directories.Loader']),
+        ],
+    },
+}]
+
+
+@override_settings(WSGI_WARMUP=True, ALLOWED_HOSTS=['.example.com', 'testserver'], TEMPLATES=CACHED_TEMPLATES)
+class WarmUpTests(base.BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        self.question = self.create_question(question_text='Some question.', days=-1)
+        patcher = mock.patch.object(warmup, 'warmed_up_in', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_warm_up(self):
+        application = get_wsgi_application()
+        with mock.patch.object(warmup, 'request', wraps=warmup.request) as request:
+            with self.assertLogs('mysite.warmup', 'INFO') as logs:
+                timings = warmup.warm_up(application)
+
+        self.assertEqual(sorted(timings), ['database', 'requests', 'templates', 'urls'])
+        self.assertRegex(logs.output[0], r'Warmed up in [0-9.]+s')
+        paths = [call[0][1] for call in request.call_args_list]
+        self.assertIn('/polls/search/?q=poll', paths)
+        self.assertIn(reverse('polls:results', args=(self.question.id,)), paths)
+        self.assertEqual([warmup.request(application, path) for path in paths], ['200 OK'] * len(paths))
+        cache = engines['django'].engine.template_loaders[0].get_template_cache
+        self.assertTrue(any(key.startswith('polls/detail.html') for key in cache))
+        self.assertTrue(any(key.startswith('admin/change_list.html') for key in cache))
+
+    def test_failed_step(self):
+        application = get_wsgi_application()
+        with mock.patch.object(warmup, 'connect', side_effect=OperationalError("unable to open database file")):
+            with self.assertLogs('mysite.warmup', 'ERROR') as logs:
+                timings = warmup.warm_up(application)
+
+        self.assertEqual(sorted(timings), ['requests', 'templates', 'urls'])
+        self.assertIn('Warm-up step database failed', logs.output[0])
+        self.assertIsNone(warmup.warmed_up_in)
+        self.assertEqual(self.client.get(reverse('ready')).status_code, 503)
+
+    def test_retries_in_the_background(self):
+        attempts = []
+
+        def warm_up(application):
+            attempts.append(application)
+            if len(attempts) == 2:
+                warmup.warmed_up_in = 0.5
+
+        with mock.patch.object(warmup, 'warm_up', warm_up), mock.patch.object(warmup, 'RETRY_DELAYS', (0,)):
+            warmup.start_warm_up('application').join()
+
+        self.assertEqual(attempts, ['application'] * 2)
+        self.assertEqual(self.client.get(reverse('ready')).status_code, 200)
+
+    def test_ready(self):
+        url = reverse('ready')
+        self.assertEqual(self.client.get(url).status_code, 503)
+
+        warmup.warmed_up_in = 0.5
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'ready': True, 'warmup_seconds': 0.5})
+
+    @override_settings(WSGI_WARMUP=False)
+    def test_ready_without_warm_up(self):
+        self.assertEqual(self.client.get(reverse('ready')).status_code, 200)
@@ -5,7 +5,14 @@ from . import views
 app_name = 'polls'
 urlpatterns = [
     url(r'^$', views.IndexView.as_view(), name='index'),
+    url(r'^archive/$', views.ArchiveView.as_view(), name='archive'),
+    url(r'^trending/$', views.TrendingView.as_view(), name='trending'),
+    url(r'^search/$', views.SearchView.as_view(), name='search'),
     url(r'^(?P<pk>[0-9]+)/$', views.DetailView.as_view(), name='detail'),
     url(r'^(?P<pk>[0-9]+)/results/$', views.ResultsView.as_view(), name='results'),
+    url(r'^(?P<pk>[0-9]+)/results\.json$', views.results_json, name='results_json'),
     url(r'^(?P<question_id>[0-9]+)/vote/$', views.vote, name='vote'),
+    url(r'^votes/batch/$', views.vote_batch, name='vote_batch'),
+    url(r'^csrf-token/$', views.csrf_token, name='csrf_token'),
+    url(r'^export/$', views.export, name='export'),
 ]
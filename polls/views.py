@@ -1,12 +1,65 @@
+import datetime
+import hashlib
+import hmac
+import json
+import math
+import time
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
 from django.shortcuts import get_object_or_404, render
-from django.http import HttpResponseRedirect
+from django.http import (
+    Http404, HttpResponse, HttpResponseBadRequest, HttpResponseRedirect, JsonResponse,
+    StreamingHttpResponse,
+)
+from django.middleware.csrf import get_token
+from django.template.loader import render_to_string
 from django.urls import reverse
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Prefetch
+from django.utils.crypto import constant_time_compare
+from django.utils.decorators import method_decorator
+from django.utils.encoding import force_bytes
 from django.views import generic
+from django.views.decorators.cache import never_cache
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import condition, require_POST
 from django.utils import timezone
 
+from .ballots import check_rate_limit, get_voter_key, has_voted
+from .cache import (
+    get_detail_page, get_last_modified, get_latest_questions, get_results, set_detail_page,
+)
+from .db import replica
+from .export import FORMATS, export_questions, parse_bound
 from .models import Choice, Question
+from .pagination import decode_cursor, keyset_page
+from .search import search
+from .votes import record_vote, record_vote_batch
+
+
+def index_etag(request):
+    """
+    Fingerprints the cached list of latest questions.
+    """
+    questions = [(question.pk, question.question_text) for question in get_latest_questions()]
+    return hashlib.md5(repr(questions).encode()).hexdigest()
+
+
+def question_last_modified(request, pk):
+    return get_last_modified(int(pk))
+
+
+def question_etag(request, pk):
+    last_modified = get_last_modified(int(pk))
+    if last_modified is not None:
+        return '{}-{}'.format(int(pk), last_modified.timestamp())
+
 
+question_condition = condition(etag_func=question_etag, last_modified_func=question_last_modified)
 
+
+@method_decorator(condition(etag_func=index_etag), name='dispatch')
 class IndexView(generic.ListView):
     template_name = 'polls/index.html'
     context_object_name = 'latest_question_list'
@@ -16,41 +69,285 @@ class IndexView(generic.ListView):
         Return the last five published questions (not including those set to be
         published in the future).
         """
-        return Question.objects.filter(
-            pub_date__lte=timezone.now()
-        ).order_by('-pub_date')[:5]
+        return get_latest_questions()
+
 
+# Stands in for the CSRF token in cached detail pages.
+CSRF_PLACEHOLDER = 'POLLS_CSRF_TOKEN_PLACEHOLDER'
 
+
+# No conditional GETs: the page carries a per-client CSRF token, which a 304
+# would leave stale, and rendering it is what sets the CSRF cookie.
 class DetailView(generic.DetailView):
     model = Question
     template_name = 'polls/detail.html'
+    # Shared pages are read from the primary, so that none is cached from
+    # a replica that hasn't caught up yet.
+    using = DEFAULT_DB_ALIAS
+
+    def get(self, request, *args, **kwargs):
+        """
+        With POLLS_DETAIL_PAGE_CACHE enabled, serves the page from the cache,
+        splicing in the CSRF token for this request.
+        """
+        if not settings.POLLS_DETAIL_PAGE_CACHE:
+            self.using = replica()
+            return super().get(request, *args, **kwargs)
+
+        # Keyed by the number, not the URL, so that /polls/01/ can't keep a
+        # copy that invalidation misses.
+        question_id = int(self.kwargs['pk'])
+        page = get_detail_page(question_id)
+        if page is None:
+            page = self.render_shared_page()
+            set_detail_page(question_id, page)
+        return HttpResponse(page.replace(CSRF_PLACEHOLDER, get_token(request)))
+
+    def render_shared_page(self):
+        """
+        Renders the page for any visitor, with CSRF_PLACEHOLDER in place of
+        the CSRF token.
+        """
+        self.object = self.get_object()
+        context = self.get_context_data(object=self.object)
+        # Rendered without the request so that no context processor
+        # replaces the placeholder with a real token.
+        context['csrf_token'] = CSRF_PLACEHOLDER
+        return render_to_string(self.template_name, context)
 
     def get_queryset(self):
         """
-        Excludes any questions that aren't published yet.
+        Excludes any questions that aren't published yet, and fetches the
+        choices along with the question.
         """
-        return Question.objects.filter(pub_date__lte=timezone.now())
+        return Question.objects.using(self.using).filter(
+            pub_date__lte=timezone.now()
+        ).prefetch_related(Prefetch('choice_set', queryset=Choice.objects.order_by('pk')))
 
 
+@method_decorator(question_condition, name='dispatch')
 class ResultsView(generic.DetailView):
     model = Question
     template_name = 'polls/results.html'
 
+    def get_queryset(self):
+        """
+        Excludes any questions that aren't published yet. Choices come from
+        the results cache, which is filled from the primary.
+        """
+        return Question.objects.using(replica()).filter(pub_date__lte=timezone.now())
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['tallies'] = get_results(self.object.pk)
+        return context
+
+
+class ArchiveView(generic.ListView):
+    template_name = 'polls/archive.html'
+    context_object_name = 'question_list'
+    page_size = 20
+
+    def get_queryset(self):
+        """
+        Return a page of published questions, newest first, after or before
+        the cursor given in the `after` or `before` parameter.
+        """
+        try:
+            after, before = (
+                decode_cursor(self.request.GET[name]) if name in self.request.GET else None
+                for name in ('after', 'before')
+            )
+        except ValueError:
+            raise Http404("Invalid cursor")
+        self.page = keyset_page(
+            Question.objects.filter(pub_date__lte=timezone.now()),
+            self.page_size, after=after, before=before,
+        )
+        return self.page.object_list
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['page'] = self.page
+        return context
+
+
+class TrendingView(generic.ListView):
+    template_name = 'polls/trending.html'
+    context_object_name = 'question_list'
+    window = datetime.timedelta(days=1)
+    size = 10
+
+    def get_queryset(self):
+        """
+        Return the published questions with the most votes among those
+        voted on within `window`, ranked by their denormalized totals.
+
+        The questions are found through the `last_voted_at` index and then
+        sorted. `total_votes` has no index, which every vote would have to
+        update.
+        """
+        now = timezone.now()
+        return Question.objects.filter(
+            pub_date__lte=now, last_voted_at__gte=now - self.window,
+        ).order_by('-total_votes', '-pk')[:self.size]
+
+
+class SearchView(generic.ListView):
+    template_name = 'polls/search.html'
+    context_object_name = 'question_list'
+
+    def get_queryset(self):
+        """
+        Return up to 20 published questions matching the `q` parameter, best
+        matches first.
+        """
+        term = self.request.GET.get('q', '').strip()
+        if not term:
+            return Question.objects.none()
+        return search(term)[:20]
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.request.GET.get('q', '')
+        return context
+
+
+@question_condition
+def results_json(request, pk):
+    """
+    Returns the results of a published question as JSON, skipping model
+    instantiation and the template engine.
+    """
+    pk = int(pk)
+    question_text = Question.objects.filter(
+        pk=pk, pub_date__lte=timezone.now()
+    ).values_list('question_text', flat=True).first()
+    if question_text is None:
+        raise Http404("No question found matching the query")
+    tallies = get_results(pk)
+    return JsonResponse({
+        'id': pk,
+        'question_text': question_text,
+        'total_votes': sum(tally['votes'] for tally in tallies),
+        'choices': tallies,
+    })
+
 
 def vote(request, question_id):
-    question = get_object_or_404(Question, pk=question_id)
+    wait = check_rate_limit(request)
+    if wait:
+        response = HttpResponse("Too many votes, try again later.", status=429, content_type='text/plain')
+        response['Retry-After'] = int(math.ceil(wait))
+        return response
+    voter_key = None
+    if settings.POLLS_ONE_VOTE_PER_VOTER:
+        voter_key = get_voter_key(request)
+        if has_voted(question_id, voter_key):
+            return HttpResponseRedirect(reverse('polls:results', args=(question_id,)))
     try:
-        selected_choice = question.choice_set.get(pk=request.POST['choice'])
-    except (KeyError, Choice.DoesNotExist):
+        # Look up the choice and check it belongs to a published question
+        # in a single query.
+        selected_choice = Choice.objects.select_related('question').get(
+            pk=request.POST['choice'],
+            question_id=question_id,
+            question__pub_date__lte=timezone.now(),
+        )
+    except (KeyError, ValueError, Choice.DoesNotExist):
+        question = get_object_or_404(DetailView().get_queryset(), pk=question_id)
         # Redisplay the question voting form.
         return render(request, 'polls/detail.html', {
             'question': question,
             'error_message': "You didn't select a choice.",
         })
     else:
-        selected_choice.votes += 1
-        selected_choice.save()
+        # A vote that isn't counted because the voter already voted is
+        # answered like any other.
+        record_vote(selected_choice, voter_key=voter_key)
         # Always return an HttpResponseRedirect after successfully dealing
         # with POST data. This prevents data from being posted twice if a
         # user hits the Back button.
-        return HttpResponseRedirect(reverse('polls:results', args=(question.id,)))
+        return HttpResponseRedirect(reverse('polls:results', args=(selected_choice.question_id,)))
+
+
+def vote_batch_signature(secret, timestamp, body):
+    """
+    Returns the hex HMAC-SHA256 of a batch vote request's timestamp and
+    body with a key of ``POLLS_VOTE_BATCH_KEYS``.
+    """
+    return hmac.new(force_bytes(secret), force_bytes(timestamp) + b'.' + body, hashlib.sha256).hexdigest()
+
+
+def valid_vote_batch_signature(request):
+    secret = settings.POLLS_VOTE_BATCH_KEYS.get(request.META.get('HTTP_X_POLLS_KEY'))
+    if secret is None:
+        return False
+    timestamp = request.META.get('HTTP_X_POLLS_TIMESTAMP', '')
+    try:
+        age = time.time() - int(timestamp)
+    except ValueError:
+        return False
+    if abs(age) > settings.POLLS_VOTE_BATCH_SIGNATURE_MAX_AGE:
+        return False
+    return constant_time_compare(
+        vote_batch_signature(secret, timestamp, request.body), request.META.get('HTTP_X_POLLS_SIGNATURE', ''),
+    )
+
+
+@csrf_exempt
+@require_POST
+def vote_batch(request):
+    """
+    Counts a JSON list of ``{"question": id, "choice": id, "count": n}``
+    records in one transaction, for clients replaying votes collected
+    offline. Responds with a result per record.
+
+    Only trusted clients may post batches. They send the id of their key
+    in ``X-Polls-Key``, the current Unix time in ``X-Polls-Timestamp`` and
+    the `vote_batch_signature()` of both in ``X-Polls-Signature``.
+    """
+    if not valid_vote_batch_signature(request):
+        return JsonResponse({'error': "Invalid signature."}, status=403)
+    try:
+        records = json.loads(request.body.decode('utf-8'))
+    except ValueError:
+        return JsonResponse({'error': "Invalid JSON."}, status=400)
+    if not isinstance(records, list):
+        return JsonResponse({'error': "Expected a list of votes."}, status=400)
+    if len(records) > settings.POLLS_VOTE_BATCH_MAX_RECORDS:
+        return JsonResponse({
+            'error': "At most {} votes per batch.".format(settings.POLLS_VOTE_BATCH_MAX_RECORDS),
+        }, status=400)
+    return JsonResponse({'results': record_vote_batch(records)})
+
+
+@never_cache
+def csrf_token(request):
+    """
+    Returns a CSRF token on its own, for pre-rendered detail pages to
+    include in their form through SSI.
+    """
+    return HttpResponse(get_token(request), content_type='text/plain')
+
+
+@staff_member_required
+def export(request):
+    """
+    Streams every question with its choice tallies as CSV (the default) or
+    NDJSON, optionally restricted to questions published from `since` and
+    before `until`.
+    """
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in FORMATS:
+        return HttpResponseBadRequest("Unknown format.")
+    try:
+        since, until = (
+            parse_bound(request.GET[name]) if request.GET.get(name) else None
+            for name in ('since', 'until')
+        )
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+    content_type, lines = FORMATS[export_format]
+    response = StreamingHttpResponse(lines(export_questions(since, until)), content_type=content_type)
+    response['Content-Disposition'] = 'attachment; filename="polls.{}"'.format(export_format)
+    return response
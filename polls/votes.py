@@ -0,0 +1,324 @@
+"""
+Recording votes.
+
+Votes are applied as ``UPDATE ... SET votes = votes + n`` so concurrent
+requests never lose increments. With ``POLLS_VOTE_BUFFER`` enabled they are
+first collected in a process-local buffer and written behind in batches.
+Questions with `vote_shards` set spread their votes over counter shards
+instead, which `compact_shards()` later folds back into `Choice.votes`.
+
+Every path also adds the votes to the denormalized `Question.total_votes`
+in the same transaction. `repair_vote_totals()` recomputes the totals from
+the choices should they ever drift.
+"""
+import atexit
+import collections
+import logging
+import random
+import threading
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .ballots import cast_ballot
+from .cache import invalidate_results, set_last_modified
+from .live import notify
+from .models import Choice, ChoiceShard, Question
+
+logger = logging.getLogger(__name__)
+
+
+def apply_votes(counts):
+    """
+    Applies a mapping of choice id to number of votes inside a single
+    transaction, with one UPDATE for all choices receiving the same number
+    of votes.
+    """
+    choice_ids_by_count = collections.defaultdict(list)
+    for choice_id, count in counts.items():
+        choice_ids_by_count[count].append(choice_id)
+    with transaction.atomic(savepoint=False):
+        for count, choice_ids in choice_ids_by_count.items():
+            Choice.objects.filter(pk__in=choice_ids).update(votes=F('votes') + count)
+
+
+def apply_question_votes(counts):
+    """
+    Adds a mapping of question id to number of votes to the questions'
+    `total_votes`, and bumps their `last_voted_at` and `last_modified`
+    markers. Once the votes are committed, the cached tallies are dropped,
+    the cached `last_modified` markers bumped and the live results server
+    notified, in that order.
+    """
+    now = timezone.now()
+    question_ids_by_count = collections.defaultdict(list)
+    for question_id, count in counts.items():
+        question_ids_by_count[count].append(question_id)
+    with transaction.atomic(savepoint=False):
+        for count, question_ids in question_ids_by_count.items():
+            Question.objects.filter(pk__in=question_ids).update(
+                total_votes=F('total_votes') + count, last_voted_at=now, last_modified=now,
+            )
+        transaction.on_commit(lambda: votes_committed(now, *counts))
+
+
+def votes_committed(now, *question_ids):
+    # The tallies go first: a results request in between then pairs the old
+    # validator with fresh tallies, never the new one with stale tallies,
+    # which clients would then keep getting 304s for until the next vote.
+    invalidate_results(*question_ids)
+    set_last_modified(now, *question_ids)
+    notify(*question_ids)
+
+
+def repair_vote_totals(questions=None):
+    """
+    Recomputes `total_votes` from the choices and their counter shards for
+    `questions` (a Question queryset, all questions by default) and returns
+    how many questions were updated. `last_voted_at` can't be recovered and
+    is left as it is.
+    """
+    if questions is None:
+        questions = Question.objects.all()
+    choices = Choice.objects.filter(question=OuterRef('pk')).order_by().values('question')
+    shards = ChoiceShard.objects.filter(choice__question=OuterRef('pk')).order_by().values('choice__question')
+    return questions.update(total_votes=(
+        Coalesce(Subquery(choices.annotate(total=Sum('votes')).values('total'), output_field=IntegerField()), 0) +
+        Coalesce(Subquery(shards.annotate(total=Sum('votes')).values('total'), output_field=IntegerField()), 0)
+    ))
+
+
+def touch_questions(*question_ids):
+    """
+    Bumps the `last_modified` marker of the given questions.
+    """
+    now = timezone.now()
+    Question.objects.filter(pk__in=question_ids).update(last_modified=now)
+    set_last_modified(now, *question_ids)
+
+
+def increment_shard(choice, shards):
+    """
+    Adds one vote to a random one of `shards` counter shards of `choice`,
+    creating the shard row on its first vote.
+    """
+    shard = random.randrange(shards)
+    counter = ChoiceShard.objects.filter(choice_id=choice.pk, shard=shard)
+    if counter.update(votes=F('votes') + 1):
+        return
+    try:
+        with transaction.atomic():
+            ChoiceShard.objects.create(choice_id=choice.pk, shard=shard, votes=1)
+    except IntegrityError:
+        # Another request created the shard first.
+        counter.update(votes=F('votes') + 1)
+
+
+def compact_shards():
+    """
+    Folds the counter shards back into `Choice.votes` and returns the number
+    of votes moved. Votes added to a shard while it is being compacted are
+    kept in the shard.
+    """
+    moved = 0
+    shards = ChoiceShard.objects.filter(votes__gt=0).values_list('pk', 'choice_id', 'votes')
+    for pk, choice_id, votes in list(shards):
+        with transaction.atomic():
+            ChoiceShard.objects.filter(pk=pk).update(votes=F('votes') - votes)
+            Choice.objects.filter(pk=choice_id).update(votes=F('votes') + votes)
+        moved += votes
+    return moved
+
+
+def record_vote(choice, voter_key=None):
+    """
+    Counts one vote for `choice`, through the vote buffer, a counter shard
+    or directly, in that order of preference.
+
+    With a `voter_key` the voter's ballot is recorded along with the vote,
+    and nothing is counted if they already voted on the question. Returns
+    whether the vote was counted.
+    """
+    if settings.POLLS_VOTE_BUFFER:
+        if voter_key is not None and not cast_ballot(choice, voter_key):
+            return False
+        get_vote_buffer().add(choice.pk)
+        return True
+    # The vote and the question's total commit together, so a failed
+    # request never leaves a counted vote behind.
+    with transaction.atomic(savepoint=False):
+        if voter_key is not None and not cast_ballot(choice, voter_key):
+            return False
+        if choice.question.vote_shards:
+            increment_shard(choice, choice.question.vote_shards)
+        else:
+            apply_votes({choice.pk: 1})
+        apply_question_votes({choice.question_id: 1})
+    return True
+
+
+def record_vote_batch(records):
+    """
+    Counts a batch of votes given as dicts with `question`, `choice` and an
+    optional integer `count` (default 1, at most
+    ``POLLS_VOTE_BATCH_MAX_COUNT``).
+
+    All choices are validated in one query and the valid records applied in
+    a single transaction. Returns a list with a result dict per record.
+    """
+    max_count = settings.POLLS_VOTE_BATCH_MAX_COUNT
+    results = [None] * len(records)
+    parsed = {}
+    for index, record in enumerate(records):
+        try:
+            question_id = int(record['question'])
+            choice_id = int(record['choice'])
+            count = record.get('count', 1)
+        except (TypeError, KeyError, ValueError, AttributeError):
+            results[index] = {'status': 'error', 'error': "Malformed record."}
+            continue
+        # Neither 2.9 nor true is a number of votes.
+        if type(count) is not int or not 1 <= count <= max_count:
+            results[index] = {
+                'status': 'error', 'error': "Count must be an integer from 1 to {}.".format(max_count),
+            }
+            continue
+        parsed[index] = (question_id, choice_id, count)
+
+    choice_questions = dict(Choice.objects.filter(
+        pk__in={choice_id for _, choice_id, _ in parsed.values()},
+        question__pub_date__lte=timezone.now(),
+    ).values_list('pk', 'question_id'))
+
+    counts = collections.Counter()
+    question_counts = collections.Counter()
+    for index, (question_id, choice_id, count) in parsed.items():
+        if choice_questions.get(choice_id) != question_id:
+            results[index] = {'status': 'error', 'error': "Unknown choice."}
+        else:
+            counts[choice_id] += count
+            question_counts[question_id] += count
+            results[index] = {'status': 'ok'}
+
+    if counts:
+        with transaction.atomic():
+            apply_votes(counts)
+            apply_question_votes(question_counts)
+    return results
+
+
+class VoteBuffer(object):
+    """
+    Process-local write-behind buffer of votes keyed by choice id.
+
+    Votes are coalesced and flushed by a background thread every `interval`
+    seconds, or sooner once `max_size` votes are waiting.
+    """
+
+    def __init__(self, interval, max_size):
+        self.interval = interval
+        self.max_size = max_size
+        self._pending = collections.Counter()
+        self._depth = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread = None
+
+    @property
+    def depth(self):
+        """
+        Number of votes buffered but not yet written.
+        """
+        return self._depth
+
+    def add(self, choice_id, count=1):
+        with self._lock:
+            self._pending[choice_id] += count
+            self._depth += count
+            full = self._depth >= self.max_size
+        if full:
+            self._wake.set()
+
+    def flush(self):
+        """
+        Writes all buffered votes and returns how many were written. Votes
+        are put back into the buffer if the write fails.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, collections.Counter()
+            self._depth = 0
+        if not pending:
+            return 0
+        written = sum(pending.values())
+        try:
+            question_counts = collections.Counter()
+            for choice_id, question_id in Choice.objects.filter(
+                pk__in=list(pending)
+            ).values_list('pk', 'question_id'):
+                question_counts[question_id] += pending[choice_id]
+            with transaction.atomic():
+                apply_votes(pending)
+                apply_question_votes(question_counts)
+        except Exception:
+            with self._lock:
+                self._pending.update(pending)
+                self._depth += written
+            raise
+        logger.debug('Flushed %d votes for %d choices', written, len(pending))
+        return written
+
+    def start(self):
+        if self._thread is None:
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name='polls-vote-buffer')
+            self._thread.daemon = True
+            self._thread.start()
+
+    def stop(self):
+        """
+        Stops the flush thread and writes whatever is left in the buffer.
+        """
+        self._stopping = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _run(self):
+        while not self._stopping:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Failed to flush vote buffer (depth %d)', self.depth)
+            finally:
+                close_old_connections()
+
+
+_vote_buffer = None
+_vote_buffer_lock = threading.Lock()
+
+
+def get_vote_buffer():
+    """
+    Returns the process-wide vote buffer, starting its flush thread on first
+    use. The buffer is flushed when the process exits.
+    """
+    global _vote_buffer
+    if _vote_buffer is None:
+        with _vote_buffer_lock:
+            if _vote_buffer is None:
+                buffer = VoteBuffer(
+                    interval=settings.POLLS_VOTE_BUFFER_INTERVAL,
+                    max_size=settings.POLLS_VOTE_BUFFER_SIZE,
+                )
+                buffer.start()
+                atexit.register(buffer.stop)
+                _vote_buffer = buffer
+    return _vote_buffer